@@ -1,9 +1,11 @@
 
+from collections import OrderedDict
+from functools import wraps
 from itertools import product
 from timeit import default_timer as timer
 
 from aimacode.logic import associate
-from aimacode.search import InstrumentedProblem
+from aimacode.search import InstrumentedProblem, ProfiledProblem
 from aimacode.utils import expr
 
 
@@ -16,18 +18,40 @@ class PrintableProblem(InstrumentedProblem):
             len(self.problem.actions_list), self.succs, self.goal_tests, self.states)
 
 
-def run_search(problem, search_function, parameter=None):
-    ip = PrintableProblem(problem)
+class PrintableProfiledProblem(PrintableProblem, ProfiledProblem):
+    """ PrintableProblem that also collects the timing, frontier and memory
+    statistics of ProfiledProblem; only used when they are requested, since
+    timing every call to actions() and result() slows the search down
+    """
+
+
+def run_search(problem, search_function, parameter=None, profile=False, progress=None,
+               record=None):
+    """ Run the search, print its statistics and solution, and return the goal
+    node; if provided, record(ip, node, elapsed) is called after the search
+    with the instrumented problem
+    """
+    if profile or progress:
+        ip = PrintableProfiledProblem(problem, progress=progress)
+    else:
+        ip = PrintableProblem(problem)
+    if parameter is not None and profile:
+        parameter = ip.timed(parameter)
     start = timer()
     if parameter is not None:
         node = search_function(ip, parameter)
     else:
         node = search_function(ip)
     end = timer()
+    if record is not None:
+        record(ip, node, end - start)
     print("\n# Actions   Expansions   Goal Tests   New Nodes")
     print("{}\n".format(ip))
+    if profile:
+        print("{}\n".format(ip.stats))
     show_solution(node, end - start)
     print()
+    return node
 
 
 def show_solution(node, elapsed_time):
@@ -127,7 +151,8 @@ def encode_state(fs, fluent_map):
     -------
     tuple of True/False elements corresponding to the fluents in fluent_map
     """
-    return tuple([f in fs.pos for f in fluent_map])
+    pos = set(fs.pos)
+    return tuple([f in pos for f in fluent_map])
 
 
 def decode_state(state, fluent_map):
@@ -159,3 +184,126 @@ def decode_state(state, fluent_map):
         else:
             fs.neg.append(fluent_map[idx])
     return fs
+
+
+def pack_state(state):
+    """ Pack an ordered sequence of True/False values into a single integer
+
+    Bit i of the result is set when the i-th fluent is True. Packed states are
+    cheap to hash and compare, and they use a small fraction of the memory
+    of the equivalent tuple, so they are used as keys for caches and indexes.
+
+    Parameters
+    ----------
+    state:
+        A state represented as an ordered sequence of True/False values
+
+    Returns
+    -------
+    int
+    """
+    # reverse so that bit i is fluent i, then map the bytes 0/1 to the ASCII
+    # digits '0'/'1' and parse them as a binary number (all done in C)
+    return int(bytes(reversed(state)).translate(_BINARY_DIGITS) or b'0', 2)
+
+
+_BINARY_DIGITS = bytes.maketrans(b'\x00\x01', b'01')
+
+
+def unpack_state(bits, size):
+    """ Convert a packed integer state back into a tuple of True/False values
+
+    Parameters
+    ----------
+    bits : int
+        A state packed with `pack_state`
+
+    size : int
+        The number of fluents in the problem (i.e., len(problem.state_map))
+
+    Returns
+    -------
+    tuple of True/False elements
+    """
+    return tuple(bool(bits >> idx & 1) for idx in range(size))
+
+
+class HeuristicCache:
+    """ Bounded least-recently-used cache mapping packed states to heuristic values
+
+    Unlike `functools.lru_cache` on a method taking a search Node, the keys
+    are small integers rather than Node objects, so the cache does not keep
+    the search tree alive, and the number of entries is capped by `maxsize`.
+
+    Attributes
+    ----------
+    maxsize : int
+        Maximum number of entries held by the cache (None for unbounded)
+
+    hits : int
+        Number of lookups that were answered from the cache
+
+    misses : int
+        Number of lookups that had to be computed
+    """
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self.hits = self.misses = 0
+        self._store = OrderedDict()
+
+    def __len__(self):
+        return len(self._store)
+
+    def __contains__(self, key):
+        return key in self._store
+
+    def get(self, key, default=None):
+        try:
+            value = self._store[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._store.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._store[key] = value
+        self._store.move_to_end(key)
+        if self.maxsize is not None and len(self._store) > self.maxsize:
+            self._store.popitem(last=False)
+
+    def clear(self):
+        self._store.clear()
+        self.hits = self.misses = 0
+
+
+_MISSING = object()
+
+
+def cached_heuristic(fn=None, maxsize=100000):
+    """ Decorate a heuristic method `h(self, node)` of a planning problem so that
+    its values are memoized in a bounded `HeuristicCache` keyed on the packed
+    node state. Each problem instance keeps its own cache for each heuristic,
+    available from `problem.heuristic_caches[name]`.
+    """
+    def decorator(fn):
+        name = fn.__name__
+
+        @wraps(fn)
+        def wrapper(self, node):
+            caches = self.__dict__.setdefault('heuristic_caches', {})
+            cache = caches.get(name)
+            if cache is None:
+                cache = caches[name] = HeuristicCache(maxsize)
+            key = pack_state(node.state)
+            value = cache.get(key, _MISSING)
+            if value is _MISSING:
+                value = fn(self, node)
+                cache.put(key, value)
+            return value
+        return wrapper
+
+    if fn is not None:
+        return decorator(fn)
+    return decorator
@@ -20,7 +20,9 @@ Then we implement various functions for doing logical inference:
     pl_true          Evaluate a propositional logical sentence in a model
     tt_entails       Say if a statement is entailed by a KB
     pl_resolution    Do resolution on propositional sentences
+    ResolutionProver Set-of-support resolution with subsumption
     dpll_satisfiable See if a propositional sentence is satisfiable
+    CDCLSolver       Clause learning SAT solver over integer-encoded clauses
     WalkSAT          Try to find a solution for a set of clauses
 
 And a few other functions:
@@ -34,6 +36,7 @@ from .utils import (
     removeall, unique, first, isnumber, issequence, Expr, expr, subexpressions
 )
 
+import heapq
 import itertools
 from collections import defaultdict
 
@@ -73,16 +76,17 @@ class KB:
 
 
 class PropKB(KB):
-    """A KB for propositional logic. Inefficient, with no indexing. """
+    """A KB for propositional logic. The clauses are kept in a set, so
+    membership tests and retraction take constant time."""
 
     def __init__(self, sentence=None):
-        self.clauses = []
+        self.clauses = set()
         if sentence:
             self.tell(sentence)
 
     def tell(self, sentence):
         "Add the sentence's clauses to the KB."
-        self.clauses.extend(conjuncts(to_cnf(sentence)))
+        self.clauses.update(conjuncts(to_cnf(sentence)))
 
     def ask_generator(self, query):
         "Yield the empty substitution {} if KB entails query; else no results."
@@ -98,8 +102,7 @@ class PropKB(KB):
     def retract(self, sentence):
         "Remove the sentence's clauses from the KB."
         for c in conjuncts(to_cnf(sentence)):
-            if c in self.clauses:
-                self.clauses.remove(c)
+            self.clauses.discard(c)
 
 # ______________________________________________________________________________
 
@@ -408,24 +411,135 @@ def disjuncts(s):
 # ______________________________________________________________________________
 
 
-def pl_resolution(KB, alpha):
-    "Propositional-logic resolution: say if alpha follows from KB. [Figure 7.12]"
-    clauses = KB.clauses + conjuncts(to_cnf(~alpha))
-    new = set()
-    while True:
-        n = len(clauses)
-        pairs = [(clauses[i], clauses[j])
-                 for i in range(n) for j in range(i+1, n)]
-        for (ci, cj) in pairs:
-            resolvents = pl_resolve(ci, cj)
-            if False in resolvents:
-                return True
-            new = new.union(set(resolvents))
-        if new.issubset(set(clauses)):
-            return False
-        for c in new:
-            if c not in clauses:
-                clauses.append(c)
+def pl_resolution(KB, alpha, set_of_support=True):
+    """Propositional-logic resolution: say if alpha follows from KB. [Figure 7.12]
+    The clauses of KB and ~alpha are saturated by a ResolutionProver. With
+    set_of_support, only the clauses of ~alpha start in the set of support,
+    so two KB clauses are never resolved together (complete when KB is
+    satisfiable); otherwise every clause is in the set of support."""
+    prover = ResolutionProver()
+    for c in KB.clauses:
+        prover.add(c, support=not set_of_support)
+    for c in conjuncts(to_cnf(~alpha)):
+        prover.add(c)
+    return prover.refute()
+
+
+def complement(literal):
+    """The negation of a literal, without a double negation.
+    >>> complement(~A), complement(A)
+    (A, ~A)
+    """
+    return literal.args[0] if literal.op == '~' else ~literal
+
+
+def clause_literals(clause):
+    """The literals of a CNF clause as a frozenset, or None if the clause is
+    a tautology (it contains a literal and its complement, or True).
+    >>> sorted(clause_literals(A | ~B | A), key=str)
+    [A, ~B]
+    >>> clause_literals(A | B | ~A) is None
+    True
+    """
+    literals = set()
+    for literal in disjuncts(clause):
+        if literal in (True, False):
+            if literal:
+                return None
+            continue
+        if complement(literal) in literals:
+            return None
+        literals.add(literal)
+    return frozenset(literals)
+
+
+class ResolutionProver:
+
+    """Saturation of a set of clauses by resolution with the set-of-support
+    strategy, used by pl_resolution. Clauses are frozensets of literals. The
+    usable clauses have been resolved with each other (or never need to be);
+    at each step the smallest clause of the set of support is resolved with
+    every usable clause that holds the complement of one of its literals,
+    and then becomes usable. Tautologies are never kept, a new clause that
+    is a superset of a kept clause is dropped (forward subsumption), and a
+    new clause deletes the kept clauses it is a subset of (backward
+    subsumption). Each literal indexes the kept clauses that contain it.
+    >>> prover = ResolutionProver()
+    >>> prover.add(A | B, support=False); prover.add(~A | B, support=False)
+    >>> prover.add(~B)
+    >>> prover.refute()
+    True
+    """
+
+    def __init__(self):
+        self.usable = set()
+        self.support = set()
+        self.queue = []             # (size, order, clause) for the set of support
+        self.index = defaultdict(set)
+        self.count = itertools.count()
+        self.empty = False
+
+    @property
+    def clauses(self):
+        return self.usable | self.support
+
+    def add(self, clause, support=True):
+        """Add a clause (an Expr or a frozenset of literals) unless it is a
+        tautology or subsumed; it goes in the set of support or, with
+        support=False, directly among the usable clauses."""
+        if not isinstance(clause, frozenset):
+            clause = clause_literals(clause)
+        if clause is None or self.subsumed(clause):
+            return
+        if not clause:
+            self.empty = True
+        for c in self.subsumed_by(clause):
+            self.remove(c)
+        for literal in clause:
+            self.index[literal].add(clause)
+        if support:
+            self.support.add(clause)
+            heapq.heappush(self.queue, (len(clause), next(self.count), clause))
+        else:
+            self.usable.add(clause)
+
+    def remove(self, clause):
+        self.usable.discard(clause)
+        self.support.discard(clause)
+        for literal in clause:
+            self.index[literal].discard(clause)
+
+    def subsumed(self, clause):
+        "Is a kept clause a subset of clause?"
+        if self.empty:
+            return True
+        return any(c <= clause for literal in clause for c in self.index[literal])
+
+    def subsumed_by(self, clause):
+        "The kept clauses that are supersets of clause (by the rarest literal)."
+        if not clause:
+            return list(self.clauses)
+        rarest = min(clause, key=lambda literal: len(self.index[literal]))
+        return [c for c in self.index[rarest] if clause <= c]
+
+    def refute(self):
+        "Saturate the clauses; return True if the empty clause is derived."
+        while not self.empty and self.queue:
+            given = heapq.heappop(self.queue)[2]
+            if given not in self.support:
+                continue            # deleted by backward subsumption
+            self.support.remove(given)
+            self.usable.add(given)
+            for literal in given:
+                opposite = complement(literal)
+                for c in list(self.index[opposite]):
+                    if given not in self.usable:
+                        break       # a resolvent subsumed the given clause
+                    if c in self.usable:
+                        self.add((given - {literal}) | (c - {opposite}))
+                    if self.empty:
+                        return True
+        return self.empty
 
 
 def pl_resolve(ci, cj):
@@ -444,46 +558,56 @@ def pl_resolve(ci, cj):
 
 class PropDefiniteKB(PropKB):
 
-    "A KB of propositional definite clauses."
+    """A KB of propositional definite clauses. Each implication is indexed
+    under the symbols of its premise when it is told, so the clauses with a
+    given premise symbol are found in constant time."""
+
+    def __init__(self, sentence=None):
+        self.premises = {}
+        self.premise_index = defaultdict(set)
+        super().__init__(sentence)
 
     def tell(self, sentence):
         "Add a definite clause to this KB."
         assert is_definite_clause(sentence), "Must be definite clause"
-        self.clauses.append(sentence)
+        self.clauses.add(sentence)
+        if sentence.op == '==>' and sentence not in self.premises:
+            self.premises[sentence] = premise = frozenset(conjuncts(sentence.args[0]))
+            for p in premise:
+                self.premise_index[p].add(sentence)
 
     def ask_generator(self, query):
         "Yield the empty substitution if KB implies query; else nothing."
-        if pl_fc_entails(self.clauses, query):
+        if pl_fc_entails(self, query):
             yield {}
 
     def retract(self, sentence):
         self.clauses.remove(sentence)
+        for p in self.premises.pop(sentence, ()):
+            self.premise_index[p].discard(sentence)
 
     def clauses_with_premise(self, p):
-        """Return a list of the clauses in KB that have p in their premise.
-        This could be cached away for O(1) speed, but we'll recompute it."""
-        return [c for c in self.clauses
-                if c.op == '==>' and p in conjuncts(c.args[0])]
+        """Return a list of the clauses in KB that have p in their premise."""
+        return list(self.premise_index.get(p, ()))
 
 
 def pl_fc_entails(KB, q):
     """Use forward chaining to see if a PropDefiniteKB entails symbol q.
-    [Figure 7.15]
+    Each clause is visited once for each symbol of its premise, so this runs
+    in time linear in the size of the KB. [Figure 7.15]
     >>> pl_fc_entails(horn_clauses_KB, expr('Q'))
     True
     """
-    count = {c: len(conjuncts(c.args[0]))
-             for c in KB.clauses
-             if c.op == '==>'}
-    inferred = defaultdict(bool)
+    count = {c: len(premise) for c, premise in KB.premises.items()}
+    inferred = set()
     agenda = [s for s in KB.clauses if is_prop_symbol(s.op)]
     while agenda:
         p = agenda.pop()
         if p == q:
             return True
-        if not inferred[p]:
-            inferred[p] = True
-            for c in KB.clauses_with_premise(p):
+        if p not in inferred:
+            inferred.add(p)
+            for c in KB.premise_index.get(p, ()):
                 count[c] -= 1
                 if count[c] == 0:
                     agenda.append(c.args[1])
@@ -509,12 +633,27 @@ for s in "P==>Q; (L&M)==>P; (B&L)==>M; (A&P)==>L; (A&B)==>L; A;B".split(';'):
 def dpll_satisfiable(s):
     """Check satisfiability of a propositional sentence.
     This differs from the book code in two ways: (1) it returns a model
-    rather than True when it succeeds; this is more useful. (2) The
-    function find_pure_symbol is passed a list of unknown clauses, rather
-    than a list of all clauses and the model; this is more efficient."""
-    clauses = conjuncts(to_cnf(s))
+    rather than True when it succeeds; this is more useful. (2) The CNF
+    clauses are numbered and solved by CDCLSolver, a clause learning
+    descendant of DPLL, rather than by the recursive dpll below."""
     symbols = prop_symbols(s)
-    return dpll(clauses, symbols, {})
+    index = {symbol: i + 1 for i, symbol in enumerate(symbols)}
+    solver = CDCLSolver(len(symbols))
+    for clause in conjuncts(to_cnf(s)):
+        lits = []
+        for literal in disjuncts(clause):
+            if literal in (True, False):
+                if literal:
+                    break
+                continue
+            symbol, positive = inspect_literal(literal)
+            lits.append(index[symbol] if positive else -index[symbol])
+        else:
+            if not solver.add_clause(lits):
+                return False
+    if not solver.solve():
+        return False
+    return {symbol: solver.value(index[symbol]) for symbol in symbols}
 
 
 def dpll(clauses, symbols, model):
@@ -609,6 +748,323 @@ def inspect_literal(literal):
         return literal, True
 
 
+# ______________________________________________________________________________
+# Conflict-driven clause learning
+
+
+def luby(i):
+    """The i-th element (from 1) of the Luby sequence 1 1 2 1 1 2 4 1 1 2 ...,
+    used to space the restarts of CDCLSolver."""
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while (1 << k) - 1 != i:
+        i -= (1 << (k - 1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+    return 1 << (k - 1)
+
+
+class CDCLSolver:
+
+    """A conflict-driven clause learning SAT solver over integer literals.
+    Variables are numbered from 1, and a literal is v or -v (as in DIMACS).
+    Unit propagation uses two watched literals per clause; each conflict is
+    analyzed to its first unique implication point, and the learned clause
+    sends the search back to the level where it becomes unit. Branching
+    picks the unassigned variable with the highest VSIDS activity, with its
+    last value (phase saving), and the search restarts after a number of
+    conflicts that follows the Luby sequence. When too many learned clauses
+    have piled up, the half that spans the most decision levels is dropped
+    at a restart.
+    >>> solver = CDCLSolver()
+    >>> solver.add_clauses([[1, 2], [-1, 2], [-2, 3]])
+    True
+    >>> solver.solve(), solver.value(2), solver.value(3)
+    (True, True, True)
+    """
+
+    restart_interval = 64
+    var_decay = 0.95
+    min_learnts = 2000
+
+    def __init__(self, num_vars=0):
+        self.num_vars = 0
+        self.clauses = []
+        self.learnts = {}         # index of each learned clause -> its levels
+        self.watches = [[], []]   # watches[2*v] for v, watches[2*v+1] for -v
+        self.values = [0]         # 1 true, -1 false, 0 unassigned
+        self.level = [0]
+        self.reason = [None]
+        self.activity = [0.0]
+        self.phase = [False]
+        self.heap = []
+        self.var_inc = 1.0
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+        self.ok = True
+        self.conflicts = self.decisions = self.propagations = 0
+        self.new_vars(num_vars)
+
+    def new_vars(self, n):
+        "Add n variables, and return the number of the last one."
+        for _ in range(n):
+            self.num_vars += 1
+            self.watches += [[], []]
+            self.values.append(0)
+            self.level.append(0)
+            self.reason.append(None)
+            self.activity.append(0.0)
+            self.phase.append(False)
+            heapq.heappush(self.heap, (0.0, self.num_vars))
+        return self.num_vars
+
+    def value(self, lit):
+        "True, False or None for the value of a literal."
+        v = self.values[abs(lit)]
+        return None if v == 0 else (v > 0) == (lit > 0)
+
+    def add_clauses(self, clauses):
+        "Add every clause; return False if the formula became unsatisfiable."
+        for clause in clauses:
+            if not self.add_clause(clause):
+                return False
+        return True
+
+    def add_clause(self, lits):
+        """Add a clause (an iterable of literals) between calls to solve;
+        return False if the formula became unsatisfiable."""
+        if not self.ok:
+            return False
+        self._backtrack(0)
+        lits = set(lits)
+        if any(-lit in lits for lit in lits):
+            return True
+        clause = []
+        for lit in lits:
+            if abs(lit) > self.num_vars:
+                self.new_vars(abs(lit) - self.num_vars)
+            value = self.value(lit)
+            if value is True:
+                return True
+            if value is None:
+                clause.append(lit)
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self._assign(clause[0], None)
+            self.ok = self._propagate() is None
+        else:
+            self._attach(clause)
+        return self.ok
+
+    def _attach(self, clause):
+        ci = len(self.clauses)
+        self.clauses.append(clause)
+        for lit in clause[:2]:
+            self.watches[2 * lit if lit > 0 else -2 * lit + 1].append(ci)
+        return ci
+
+    def _assign(self, lit, reason):
+        v = abs(lit)
+        self.values[v] = 1 if lit > 0 else -1
+        self.level[v] = len(self.trail_lim)
+        self.reason[v] = reason
+        self.trail.append(lit)
+
+    def _propagate(self):
+        """Propagate the assignments on the trail; return the index of a
+        conflicting clause, or None."""
+        values, clauses, watches = self.values, self.clauses, self.watches
+        trail = self.trail
+        while self.qhead < len(trail):
+            false_lit = -trail[self.qhead]
+            self.qhead += 1
+            self.propagations += 1
+            code = 2 * false_lit if false_lit > 0 else -2 * false_lit + 1
+            watching = watches[code]
+            kept = []
+            for i, ci in enumerate(watching):
+                clause = clauses[ci]
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], false_lit
+                first = clause[0]
+                first_value = values[first] if first > 0 else -values[-first]
+                if first_value == 1:
+                    kept.append(ci)
+                    continue
+                for k in range(2, len(clause)):
+                    lit = clause[k]
+                    if (values[lit] if lit > 0 else -values[-lit]) != -1:
+                        clause[1], clause[k] = lit, false_lit
+                        watches[2 * lit if lit > 0 else -2 * lit + 1].append(ci)
+                        break
+                else:
+                    kept.append(ci)
+                    if first_value == -1:
+                        kept.extend(watching[i + 1:])
+                        watches[code] = kept
+                        return ci
+                    self._assign(first, ci)
+            watches[code] = kept
+        return None
+
+    def _analyze(self, ci):
+        """Return the first-UIP clause learned from the conflict in clause ci
+        (asserting literal first), the level to backjump to, and the number of
+        decision levels in the clause."""
+        level, reason, trail = self.level, self.reason, self.trail
+        current = len(self.trail_lim)
+        seen = set()
+        learnt = [None]
+        pending = 0
+        lits = self.clauses[ci]
+        idx = len(trail) - 1
+        while True:
+            for q in lits:
+                v = abs(q)
+                if v not in seen and level[v] > 0:
+                    seen.add(v)
+                    self._bump(v)
+                    if level[v] == current:
+                        pending += 1
+                    else:
+                        learnt.append(q)
+            while abs(trail[idx]) not in seen:
+                idx -= 1
+            p = trail[idx]
+            idx -= 1
+            seen.discard(abs(p))
+            pending -= 1
+            if pending == 0:
+                break
+            lits = self.clauses[reason[abs(p)]][1:]
+        learnt[0] = -p
+
+        # drop the literals implied by other literals of the learned clause
+        def redundant(q):
+            r = reason[abs(q)]
+            return r is not None and all(abs(x) in seen or level[abs(x)] == 0
+                                         for x in self.clauses[r][1:])
+        learnt = learnt[:1] + [q for q in learnt[1:] if not redundant(q)]
+
+        if len(learnt) == 1:
+            return learnt, 0, 1
+        top = max(range(1, len(learnt)), key=lambda k: level[abs(learnt[k])])
+        learnt[1], learnt[top] = learnt[top], learnt[1]
+        return learnt, level[abs(learnt[1])], len(set(level[abs(q)] for q in learnt))
+
+    def _bump(self, v):
+        activity = self.activity
+        activity[v] += self.var_inc
+        if activity[v] > 1e100:
+            for u in range(1, self.num_vars + 1):
+                activity[u] *= 1e-100
+            self.var_inc *= 1e-100
+            self.heap = [(-activity[u], u) for u in range(1, self.num_vars + 1)
+                         if self.values[u] == 0]
+            heapq.heapify(self.heap)
+        elif self.values[v] == 0:
+            heapq.heappush(self.heap, (-activity[v], v))
+
+    def _backtrack(self, target):
+        if len(self.trail_lim) <= target:
+            return
+        start = self.trail_lim[target]
+        for lit in self.trail[start:]:
+            v = abs(lit)
+            self.phase[v] = lit > 0
+            self.values[v] = 0
+            self.reason[v] = None
+            heapq.heappush(self.heap, (-self.activity[v], v))
+        del self.trail[start:]
+        del self.trail_lim[target:]
+        self.qhead = len(self.trail)
+
+    def _reduce(self):
+        """Forget the half of the learned clauses that span the most decision
+        levels (keeping those that span two or fewer); called at level 0,
+        where no clause is the reason of an assignment that matters."""
+        ranked = sorted(self.learnts, key=lambda ci: (self.learnts[ci], len(self.clauses[ci])))
+        dropped = set(ci for ci in ranked[len(ranked) // 2:] if self.learnts[ci] > 2)
+        clauses, learnts = [], {}
+        for ci, clause in enumerate(self.clauses):
+            if ci not in dropped:
+                if ci in self.learnts:
+                    learnts[len(clauses)] = self.learnts[ci]
+                clauses.append(clause)
+        self.clauses, self.learnts = clauses, learnts
+        for lit in self.trail:
+            self.reason[abs(lit)] = None
+        # every clause is watched by its first two literals
+        self.watches = [[] for _ in self.watches]
+        for ci, clause in enumerate(clauses):
+            for lit in clause[:2]:
+                self.watches[2 * lit if lit > 0 else -2 * lit + 1].append(ci)
+
+    def _pick(self):
+        heap, values, activity = self.heap, self.values, self.activity
+        while heap:
+            a, v = heapq.heappop(heap)
+            if values[v] == 0 and -a == activity[v]:
+                return v
+        for v in range(1, self.num_vars + 1):
+            if values[v] == 0:
+                return v
+        return None
+
+    def solve(self):
+        """Return True if the clauses are satisfiable (the model is then read
+        with value or model), else False."""
+        if not self.ok:
+            return False
+        self._backtrack(0)
+        if self._propagate() is not None:
+            self.ok = False
+            return False
+        restarts = 0
+        budget = self.restart_interval * luby(1)
+        max_learnts = max(self.min_learnts, len(self.clauses) // 3)
+        while True:
+            ci = self._propagate()
+            if ci is not None:
+                self.conflicts += 1
+                if not self.trail_lim:
+                    self.ok = False
+                    return False
+                learnt, target, levels = self._analyze(ci)
+                self._backtrack(target)
+                if len(learnt) == 1:
+                    self._assign(learnt[0], None)
+                else:
+                    ci = self._attach(learnt)
+                    self.learnts[ci] = levels
+                    self._assign(learnt[0], ci)
+                self.var_inc /= self.var_decay
+                budget -= 1
+                continue
+            if budget <= 0:
+                restarts += 1
+                budget = self.restart_interval * luby(restarts + 1)
+                self._backtrack(0)
+                if len(self.learnts) > max_learnts:
+                    self._reduce()
+                    max_learnts = int(max_learnts * 1.1)
+                continue
+            v = self._pick()
+            if v is None:
+                return True
+            self.decisions += 1
+            self.trail_lim.append(len(self.trail))
+            self._assign(v if self.phase[v] else -v, None)
+
+    def model(self):
+        "The satisfying assignment found by solve, as a list of true literals."
+        return [v if self.values[v] > 0 else -v for v in range(1, self.num_vars + 1)]
+
+
 def unify(x, y, s):
     """Unify expressions x,y with substitution s; return a substitution that
     would make x,y equal, or None if x,y can not unify. x and y can be
@@ -8,7 +8,10 @@ from .utils import (
     is_in, memoize, print_table, Stack, FIFOQueue, PriorityQueue, name
 )
 
+import functools
+import heapq
 import sys
+from timeit import default_timer as timer
 
 infinity = float('inf')
 
@@ -64,6 +67,18 @@ class Problem:
         """For optimization problems, each state has a value.  Hill-climbing
         and related algorithms try to maximize this value."""
         raise NotImplementedError
+
+    def key(self, state):
+        """Return a hashable key identifying the state, used by the graph
+        search algorithms to index the explored set and the frontier. Override
+        this to provide a more compact (or cheaper to hash) encoding."""
+        return state
+
+    def observe(self, frontier, explored):
+        """Called by the graph search algorithms after each expansion with the
+        current frontier and explored set. Does nothing by default; see
+        ProfiledProblem, which uses it to sample frontier and memory usage."""
+        pass
 # ______________________________________________________________________________
 
 
@@ -129,6 +144,12 @@ class Node:
     def __hash__(self):
         return hash(self.state)
 
+
+def node_key(problem):
+    """Return a function mapping a node to problem.key(node.state). The key is
+    computed once and cached on the node, like the f and h values."""
+    return memoize(lambda node: problem.key(node.state), 'key')
+
 # ______________________________________________________________________________
 # Uninformed Search algorithms
 
@@ -150,16 +171,18 @@ def graph_search(problem, frontier):
     """Search through the successors of a problem to find a goal.
     The argument frontier should be an empty queue.
     If two paths reach a state, only use the first one. [Figure 3.7]"""
+    key = node_key(problem)
     frontier.append(Node(problem.initial))
     explored = set()
     while frontier:
         node = frontier.pop()
         if problem.goal_test(node.state):
             return node
-        explored.add(node.state)
+        explored.add(key(node))
         frontier.extend(child for child in node.expand(problem)
-                        if child.state not in explored and
+                        if key(child) not in explored and
                         child not in frontier)
+        problem.observe(frontier, explored)
     return None
 
 
@@ -175,56 +198,67 @@ def depth_first_tree_search(problem):
 
 def depth_first_graph_search(problem):
     "Search the deepest nodes in the search tree first."
-    return graph_search(problem, Stack())
+    return graph_search(problem, Stack(node_key(problem)))
 
 
 def breadth_first_search(problem):
     "[Figure 3.11]"
+    key = node_key(problem)
     node = Node(problem.initial)
     if problem.goal_test(node.state):
         return node
-    frontier = FIFOQueue()
+    frontier = FIFOQueue(key)
     frontier.append(node)
     explored = set()
     while frontier:
         node = frontier.pop()
-        explored.add(node.state)
+        explored.add(key(node))
         for child in node.expand(problem):
-            if child.state not in explored and child not in frontier:
+            if key(child) not in explored and child not in frontier:
                 if problem.goal_test(child.state):
                     return child
                 frontier.append(child)
+        problem.observe(frontier, explored)
     return None
 
 
-def best_first_graph_search(problem, f):
+def best_first_graph_search(problem, f, prefetch=None):
     """Search the nodes with the lowest f scores first.
     You specify the function f(node) that you want to minimize; for example,
     if f is a heuristic estimate to the goal, then we have greedy best
     first search; if f is node.depth then we have breadth-first search.
     There is a subtlety: the line "f = memoize(f, 'f')" means that the f
     values will be cached on the nodes as they are computed. So after doing
-    a best first search you can examine the f values of the path returned."""
+    a best first search you can examine the f values of the path returned.
+    If prefetch is given, it is called with the list of the unexplored children
+    of each expanded node before any of their f values are used, so that it
+    can compute (and cache on the nodes) the values f depends on in a batch."""
     f = memoize(f, 'f')
+    key = node_key(problem)
     node = Node(problem.initial)
     if problem.goal_test(node.state):
         return node
-    frontier = PriorityQueue(min, f)
+    frontier = PriorityQueue(min, f, key)
     frontier.append(node)
     explored = set()
     while frontier:
         node = frontier.pop()
         if problem.goal_test(node.state):
             return node
-        explored.add(node.state)
-        for child in node.expand(problem):
-            if child.state not in explored and child not in frontier:
+        explored.add(key(node))
+        children = node.expand(problem)
+        if prefetch is not None:
+            children = [child for child in children if key(child) not in explored]
+            prefetch(children)
+        for child in children:
+            if key(child) not in explored and child not in frontier:
                 frontier.append(child)
             elif child in frontier:
                 incumbent = frontier[child]
                 if f(child) < f(incumbent):
                     # del frontier[incumbent]
                     frontier.append(child)
+        problem.observe(frontier, explored)
     return None
 
 
@@ -275,41 +309,278 @@ def astar_search(problem, h=None):
     h = memoize(h or problem.h, 'h')
     return best_first_graph_search(problem, lambda n: n.path_cost + h(n))
 
+
+def weighted_astar_search(problem, h=None, weight=2):
+    """Weighted A* search is best-first graph search with f(n) = g(n) + w * h(n).
+    With an admissible h the cost of the returned plan is at most w times the
+    optimal cost, and larger weights usually expand far fewer nodes."""
+    h = memoize(h or problem.h, 'h')
+    return best_first_graph_search(problem, lambda n: n.path_cost + weight * h(n))
+
+
+def enforced_hill_climbing(problem, h=None, helpful=True):
+    """Enforced hill-climbing (Hoffmann & Nebel, 2001). From the current node,
+    run a breadth-first search until a node with a strictly better heuristic
+    value is found, then commit to the path to that node and repeat. If helpful
+    is True and the problem defines helpful_actions(state), each breadth-first
+    search first considers only the helpful successors and falls back to every
+    successor if that fails. Returns None on a dead end (EHC is incomplete)."""
+    h = memoize(h or problem.h, 'h')
+    helpful_actions = getattr(problem, 'helpful_actions', None) if helpful else None
+
+    key = node_key(problem)
+
+    def improve(node, restrict):
+        best = h(node)
+        frontier = FIFOQueue()
+        frontier.append(node)
+        explored = {key(node)}
+        while frontier:
+            current = frontier.pop()
+            actions = problem.actions(current.state)
+            if restrict:
+                allowed = helpful_actions(current.state)
+                actions = [a for a in actions if a in allowed]
+            for action in actions:
+                child = current.child_node(problem, action)
+                if key(child) in explored:
+                    continue
+                explored.add(key(child))
+                if problem.goal_test(child.state) or h(child) < best:
+                    return child
+                frontier.append(child)
+        return None
+
+    node = Node(problem.initial)
+    while not problem.goal_test(node.state):
+        child = improve(node, True) if helpful_actions else None
+        if child is None:
+            child = improve(node, False)
+        if child is None:
+            return None
+        node = child
+    return node
+
+
+def ara_star_solutions(problem, h=None, weights=(5, 3, 2, 1.5, 1), time_limit=None):
+    """Anytime Repairing A* (Likhachev, Gordon & Thrun, 2003). Run a sequence of
+    weighted A* searches with decreasing weights, reusing the search effort of
+    the previous iterations. Yields (node, weight) each time a weight is
+    completed with a better solution; with an admissible h the cost of each
+    plan is at most weight times optimal. Once a first solution has been found,
+    stops early (after yielding the incumbent) when time_limit seconds have
+    elapsed."""
+    h = memoize(h or problem.h, 'h')
+    key = node_key(problem)
+    deadline = None if time_limit is None else timer() + time_limit
+    start = Node(problem.initial)
+    g = {key(start): 0}
+    nodes = {key(start): start}
+    incumbent = start if problem.goal_test(start.state) else None
+    if incumbent is not None:
+        yield incumbent, 1
+        return
+    inconsistent = {key(start)}
+    reported = None
+    for weight in weights:
+        open_list = [(g[s] + weight * h(nodes[s]), nodes[s]) for s in inconsistent]
+        heapq.heapify(open_list)
+        inconsistent = set()
+        closed = set()
+        bound = infinity if incumbent is None else incumbent.path_cost
+        while open_list and open_list[0][0] < bound:
+            if incumbent is not None and deadline is not None and timer() > deadline:
+                if incumbent is not reported:
+                    yield incumbent, weight
+                return
+            f, node = heapq.heappop(open_list)
+            if node.path_cost > g[key(node)] or key(node) in closed:
+                continue  # stale entry
+            closed.add(key(node))
+            for child in node.expand(problem):
+                if child.path_cost >= g.get(key(child), infinity):
+                    continue
+                g[key(child)] = child.path_cost
+                nodes[key(child)] = child
+                if problem.goal_test(child.state):
+                    if incumbent is None or child.path_cost < incumbent.path_cost:
+                        incumbent = child
+                        bound = child.path_cost
+                    continue
+                if key(child) in closed:
+                    inconsistent.add(key(child))
+                else:
+                    heapq.heappush(open_list, (child.path_cost + weight * h(child), child))
+            problem.observe(open_list, closed)
+        inconsistent.update(key(n) for _, n in open_list if n.path_cost == g[key(n)])
+        if incumbent is not None and incumbent is not reported:
+            reported = incumbent
+            yield incumbent, weight
+
+
+def anytime_repairing_astar(problem, h=None, weights=(5, 3, 2, 1.5, 1), time_limit=None):
+    """Return the best solution found by ARA* within time_limit seconds of the
+    start of the search (or the optimal solution, for an admissible h, if there
+    is no time limit). The search always runs until a first solution is found."""
+    node = None
+    for node, _ in ara_star_solutions(problem, h, weights, time_limit):
+        pass
+    return node
+
 # ______________________________________________________________________________
 # Other search algorithms
 
 
 def recursive_best_first_search(problem, h=None):
-    "[Figure 3.26]"
+    """[Figure 3.26]
+
+    MODIFIED FROM AIMA VERSION
+        - Successors are kept in a heap that is updated in place instead of
+          being re-sorted on every iteration"""
     h = memoize(h or problem.h, 'h')
 
     def RBFS(problem, node, flimit):
         if problem.goal_test(node.state):
             return node, 0   # (The second value is immaterial)
-        successors = node.expand(problem)
+        successors = []
+        for idx, s in enumerate(node.expand(problem)):
+            s.f = max(s.path_cost + h(s), node.f)
+            successors.append((s.f, idx, s))
         if len(successors) == 0:
             return None, infinity
-        for s in successors:
-            s.f = max(s.path_cost + h(s), node.f)
+        heapq.heapify(successors)
         while True:
             # Order by lowest f value
-            successors.sort(key=lambda x: x.f)
-            best = successors[0]
+            _, idx, best = successors[0]
             if best.f > flimit:
                 return None, best.f
             if len(successors) > 1:
-                alternative = successors[1].f
+                alternative = min(successors[1:3])[0]
             else:
                 alternative = infinity
             result, best.f = RBFS(problem, best, min(flimit, alternative))
             if result is not None:
                 return result, best.f
+            heapq.heapreplace(successors, (best.f, idx, best))
 
     node = Node(problem.initial)
     node.f = h(node)
     result, bestf = RBFS(problem, node, infinity)
     return result
 
+
+def iterative_deepening_astar_search(problem, h=None, table_size=1000000):
+    """Iterative deepening A* (Korf, 1985) with a transposition table.
+    Each iteration is a depth-first search bounded by f = g + h; the next bound
+    is the smallest f value that exceeded the current one. The transposition
+    table records the lowest g at which each state was reached in the current
+    iteration so that duplicate paths through the state space are pruned. It
+    holds at most table_size entries, which bounds the memory used by the
+    search; states that do not fit are only checked against the current path."""
+    h = memoize(h or problem.h, 'h')
+    key = node_key(problem)
+    table = {}
+
+    def dfs(node, bound, iteration, path):
+        f = node.path_cost + h(node)
+        if f > bound:
+            return None, f
+        if problem.goal_test(node.state):
+            return node, f
+        k = key(node)
+        seen = table.get(k)
+        if seen is not None and seen[0] == iteration and seen[1] <= node.path_cost:
+            return None, infinity
+        if seen is not None or len(table) < table_size:
+            table[k] = (iteration, node.path_cost)
+        next_bound = infinity
+        path.add(k)
+        children = sorted(node.expand(problem), key=lambda c: c.path_cost + h(c))
+        for child in children:
+            if key(child) in path:
+                continue
+            result, t = dfs(child, bound, iteration, path)
+            if result is not None:
+                return result, t
+            next_bound = min(next_bound, t)
+        path.discard(k)
+        return None, next_bound
+
+    root = Node(problem.initial)
+    bound = h(root)
+    for iteration in range(sys.maxsize):
+        result, bound = dfs(root, bound, iteration, set())
+        if result is not None:
+            return result
+        if bound == infinity:
+            return None
+
+
+def bidirectional_search(problem, goal=None):
+    """Bidirectional breadth-first search for problems with a single, explicit
+    goal state. Breadth-first layers are grown alternately from the initial
+    state and from the goal (expanding the smaller frontier each time) until
+    they meet. The backward search uses problem.predecessors(state), which must
+    yield (action, previous_state) pairs such that
+    problem.result(previous_state, action) == state.
+
+    The goal state defaults to problem.goal. Returns a Node whose solution() is
+    a shortest plan, or None if the goal is unreachable."""
+    key = node_key(problem)
+    goal = problem.goal if goal is None else goal
+    start = Node(problem.initial)
+    if key(start) == problem.key(goal):
+        return start
+
+    forward = {key(start): start}               # key -> Node
+    backward = {problem.key(goal): None}        # key -> (action, next state)
+    forward_layer = [start]
+    backward_layer = [goal]
+
+    def expand_forward():
+        layer, meetings = [], []
+        for node in forward_layer:
+            for child in node.expand(problem):
+                k = key(child)
+                if k in forward:
+                    continue
+                forward[k] = child
+                layer.append(child)
+                if k in backward:
+                    meetings.append(k)
+        return layer, meetings
+
+    def expand_backward():
+        layer, meetings = [], []
+        for state in backward_layer:
+            for action, previous in problem.predecessors(state):
+                k = problem.key(previous)
+                if k in backward:
+                    continue
+                backward[k] = (action, state)
+                layer.append(previous)
+                if k in forward:
+                    meetings.append(k)
+        return layer, meetings
+
+    def join(k):
+        node = forward[k]
+        while backward[k] is not None:
+            action, _ = backward[k]
+            node = node.child_node(problem, action)
+            k = key(node)
+        return node
+
+    while forward_layer and backward_layer:
+        if len(forward_layer) <= len(backward_layer):
+            forward_layer, meetings = expand_forward()
+        else:
+            backward_layer, meetings = expand_backward()
+        if meetings:
+            # every meeting found in the same layer has a path of the same length
+            return join(meetings[0])
+    return None
+
 # ______________________________________________________________________________
 
 # Code to compare searchers on various problems.
@@ -345,14 +616,160 @@ class InstrumentedProblem(Problem):
     def value(self, state):
         return self.problem.value(state)
 
+    def key(self, state):
+        return self.problem.key(state)
+
     def __getattr__(self, attr):
         return getattr(self.problem, attr)
 
+    def observe(self, frontier, explored):
+        return self.problem.observe(frontier, explored)
+
     def __repr__(self):
         return '<%4d/%4d/%4d/%s>' % (self.succs, self.goal_tests,
                                      self.states, str(self.found)[:4])
 
 
+class SearchStats:
+
+    """Statistics collected by a ProfiledProblem during a search. Times are in
+    seconds; samples is a list of (elapsed time, expansions) pairs taken at
+    every progress interval, from which the expansion rate over time can be
+    recovered. peak_explored_bytes is an estimate rather than a measurement:
+    the size of the explored set itself plus the size of one of its keys
+    times the number of keys."""
+
+    def __init__(self):
+        self.expansions = self.goal_tests = self.states = 0
+        self.elapsed = 0.0
+        self.actions_time = self.result_time = self.heuristic_time = 0.0
+        self.heuristic_calls = 0
+        self.cache_hits = self.cache_misses = 0
+        self.peak_frontier = 0
+        self.frontier_total = self.frontier_samples = 0
+        self.explored_size = 0
+        self.peak_explored_bytes = 0
+        self.samples = []
+
+    @property
+    def mean_frontier(self):
+        return self.frontier_total / self.frontier_samples if self.frontier_samples else 0
+
+    @property
+    def nodes_per_second(self):
+        return self.expansions / self.elapsed if self.elapsed else 0
+
+    @property
+    def cache_hit_rate(self):
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else 0
+
+    def as_dict(self):
+        stats = dict(vars(self))
+        stats.update(mean_frontier=self.mean_frontier,
+                     nodes_per_second=self.nodes_per_second,
+                     cache_hit_rate=self.cache_hit_rate)
+        return stats
+
+    def __repr__(self):
+        return ('{:d} expansions in {:.3f}s ({:.0f} nodes/s); actions {:.3f}s, '
+                'result {:.3f}s, heuristic {:.3f}s ({:d} calls, {:.1%} cache hits); '
+                'frontier peak {:d} mean {:.1f}; explored {:d} states ~{:d} KiB').format(
+            self.expansions, self.elapsed, self.nodes_per_second, self.actions_time,
+            self.result_time, self.heuristic_time, self.heuristic_calls,
+            self.cache_hit_rate, self.peak_frontier, self.mean_frontier,
+            self.explored_size, self.peak_explored_bytes // 1024)
+
+
+class ProfiledProblem(InstrumentedProblem):
+
+    """InstrumentedProblem that also times the calls to actions() and result(),
+    samples the frontier and explored set through the observe() hook, and
+    collects the results in a SearchStats object (see the stats property).
+
+    Heuristics are timed only when wrapped with timed(). If progress is a number
+    of seconds, a progress line is written to stream at that interval. Memory
+    of the explored set is estimated from the set itself plus one sampled key
+    per entry."""
+
+    def __init__(self, problem, progress=None, stream=None):
+        super().__init__(problem)
+        self._stats = SearchStats()
+        self.progress = progress
+        self.stream = stream or sys.stderr
+        self.start = timer()
+        self._explored = ()
+        self._next_sample = self.start + (progress or 1.0)
+
+    def actions(self, state):
+        start = timer()
+        actions = super().actions(state)
+        self._stats.actions_time += timer() - start
+        return actions
+
+    def result(self, state, action):
+        start = timer()
+        state = super().result(state, action)
+        self._stats.result_time += timer() - start
+        return state
+
+    def timed(self, h):
+        """Return h wrapped so that its calls are counted and timed. The
+        wrapper keeps the name of h, and its stats attribute is the
+        SearchStats that calls made elsewhere (e.g., in worker processes)
+        can be added to."""
+        stats = self._stats
+
+        @functools.wraps(h)
+        def timed_h(node):
+            start = timer()
+            value = h(node)
+            stats.heuristic_time += timer() - start
+            stats.heuristic_calls += 1
+            return value
+        timed_h.stats = stats
+        return timed_h
+
+    def observe(self, frontier, explored):
+        stats = self._stats
+        size = len(frontier)
+        stats.peak_frontier = max(stats.peak_frontier, size)
+        stats.frontier_total += size
+        stats.frontier_samples += 1
+        stats.explored_size = len(explored)
+        self._explored = explored
+        now = timer()
+        if now >= self._next_sample:
+            self._next_sample = now + (self.progress or 1.0)
+            self._sample_memory(explored)
+            stats.samples.append((now - self.start, self.succs))
+            if self.progress:
+                self.stream.write('[{:8.1f}s] {:d} expansions, {:.0f} nodes/s, '
+                                  'frontier {:d}, explored {:d}\n'.format(
+                                      now - self.start, self.succs,
+                                      self.succs / (now - self.start), size, len(explored)))
+                self.stream.flush()
+        self.problem.observe(frontier, explored)
+
+    def _sample_memory(self, explored):
+        if not explored:
+            return
+        size = sys.getsizeof(explored) + sys.getsizeof(next(iter(explored))) * len(explored)
+        self._stats.peak_explored_bytes = max(self._stats.peak_explored_bytes, size)
+
+    @property
+    def stats(self):
+        """Return the SearchStats collected so far."""
+        stats = self._stats
+        stats.expansions, stats.goal_tests, stats.states = self.succs, self.goal_tests, self.states
+        stats.elapsed = timer() - self.start
+        self._sample_memory(self._explored)
+        caches = getattr(self.problem, 'heuristic_caches', {})
+        stats.cache_hits = sum(c.hits for c in caches.values())
+        stats.cache_misses = sum(c.misses for c in caches.values())
+        return stats
+
+
 def compare_searchers(problems, header,
                       searchers=[breadth_first_tree_search,
                                  breadth_first_search,
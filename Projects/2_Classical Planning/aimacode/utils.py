@@ -9,6 +9,9 @@ import random
 import math
 
 import heapq
+import keyword
+import re
+import weakref
 from functools import lru_cache
 from collections import namedtuple, deque, Counter, defaultdict
 
@@ -142,24 +145,58 @@ class Expr(object):
     """A mathematical expression with an operator and 0 or more arguments.
     op is a str like '+' or 'sin'; args are Expressions.
     Expr('x') or Symbol('x') creates a symbol (a nullary Expr).
-    Expr('-', x) creates a unary; Expr('+', x, 1) creates a binary."""
-    __slots__ = ["op", "args", "__hash"]
-    def __init__(self, op, *args):
+    Expr('-', x) creates a unary; Expr('+', x, 1) creates a binary.
+
+    Expressions whose arguments are all Exprs (e.g., symbols and logical
+    sentences) are hash-consed: constructing a structurally identical one
+    returns the existing object, so they compare equal only when they are the
+    same object, and the negation of each one is built only once."""
+    __slots__ = ["op", "args", "__hash", "__interned", "__negation", "__weakref__"]
+    __table = weakref.WeakValueDictionary()
+
+    def __new__(cls, op, *args):
+        interned = all(isinstance(arg, Expr) for arg in args)
+        if interned:
+            key = (op, args)
+            self = cls.__table.get(key)
+            if self is not None:
+                return self
+        self = object.__new__(cls)
         self.op = op
         self.args = args
-        self.__hash = hash(self.op) ^ hash(self.args)
+        self.__hash = hash(op) ^ hash(args)
+        self.__interned = interned
+        self.__negation = None
+        if interned:
+            cls.__table[key] = self
+        return self
+
+    def __init__(self, op, *args):
+        pass  # initialized in __new__
+
+    def __reduce__(self):
+        # unpickling goes through __new__, so the result is interned again
+        return (Expr, (self.op,) + self.args)
 
     def __eq__(self, other):
-        return (isinstance(other, Expr)
-                and self.op == other.op
-                and self.args == other.args)
+        if self is other:
+            return True
+        if not isinstance(other, Expr) or (self.__interned and other.__interned):
+            return False
+        return self.op == other.op and self.args == other.args
 
     def __hash__(self): return self.__hash
 
     # custom unary operator overloads to handle 
     def __pos__(self): return self
     def __neg__(self): return self.args[0] if '-' == self.op else Expr("-", self)
-    def __invert__(self): return self.args[0] if '~' == self.op else Expr("~", self)
+
+    def __invert__(self):
+        if '~' == self.op:
+            return self.args[0]
+        if self.__negation is None:
+            self.__negation = Expr("~", self)
+        return self.__negation
 
     # Operator overloads
     # def __neg__(self): return Expr('-', self)
@@ -261,7 +298,7 @@ class PartialExpr:
     def __repr__(self):          return "PartialExpr('{}', {})".format(self.op, self.lhs)
 
 
-@lru_cache()
+@lru_cache(maxsize=65536)
 def expr(x):
     """Shortcut to create an Expression. x is a str in which:
     - identifiers are automatically defined as Symbols.
@@ -269,12 +306,27 @@ def expr(x):
     If x is already an Expression, it is returned unchanged. Example:
     >>> expr('P & Q ==> Q')
     ((P & Q) ==> Q)
+
+    Results are memoized (up to 65536 distinct arguments), and strings that
+    are a plain symbol or a (negated) atom such as 'At(C1, SFO)' are built
+    directly instead of being evaluated as Python code.
     """
     if isinstance(x, str):
+        match = _atom_pattern.match(x)
+        if match is not None:
+            negated, op, args = match.groups()
+            names = [op] + (args.replace(',', ' ').split() if args else [])
+            if not any(keyword.iskeyword(name) for name in names):
+                atom = Expr(op, *[Expr(name) for name in names[1:]])
+                return ~atom if negated else atom
         return eval(expr_handle_infix_ops(x), defaultkeydict(Symbol))
     else:
         return x
 
+# a symbol, or a name applied to a (possibly empty) list of symbols, optionally negated
+_atom_pattern = re.compile(r'\s*(~\s*)?([A-Za-z_]\w*)\s*'
+                           r'(?:\(\s*((?:[A-Za-z_]\w*\s*,\s*)*[A-Za-z_]\w*)?\s*\))?\s*$')
+
 infix_ops = '==> <== <=>'.split()
 
 
@@ -313,8 +365,10 @@ class Queue:
         q.pop()         -- return the top item from the queue
         len(q)          -- number of items in q (also q.__len())
         item in q       -- does q contain item?
-    Note that isinstance(Stack(), Queue) is false, because we implement stacks
-    as lists.  If Python ever gets interfaces, Queue will be an interface."""
+    Every queue keeps a hash index from key(item) to the items it contains so
+    that membership tests are O(1). The key function defaults to the identity;
+    search functions pass a key derived from the node state (see
+    Problem.key) so that nodes are indexed by a compact state encoding."""
 
     def __init__(self):
         raise NotImplementedError
@@ -324,36 +378,82 @@ class Queue:
             self.append(item)
 
 
-def Stack():
-    """Return an empty list, suitable as a Last-In-First-Out Queue."""
-    return []
+def _identity(x):
+    return x
+
+
+class _IndexedQueue(Queue):
+    """Shared membership index for the LIFO and FIFO queues. The index counts
+    the items with each key so that duplicates are handled correctly."""
 
+    def __init__(self, key=None):
+        self.key = key or _identity
+        self._keys = {}
 
-class FIFOQueue(Queue):
+    def _add_key(self, item):
+        k = self.key(item)
+        self._keys[k] = self._keys.get(k, 0) + 1
+
+    def _discard_key(self, item):
+        k = self.key(item)
+        count = self._keys[k] - 1
+        if count:
+            self._keys[k] = count
+        else:
+            del self._keys[k]
+
+    def __len__(self):
+        return len(self.A)
+
+    def __contains__(self, item):
+        return self.key(item) in self._keys
+
+
+class LIFOQueue(_IndexedQueue):
+    """A Last-In-First-Out Queue implemented with a list plus a membership index
+    
+    ADDED TO AIMA VERSION
+        - Replaces the plain list returned by Stack(), where membership tests
+          scan the whole frontier
+    """
+    def __init__(self, key=None):
+        super().__init__(key)
+        self.A = []
+
+    def append(self, item):
+        self.A.append(item)
+        self._add_key(item)
+
+    def pop(self):
+        item = self.A.pop()
+        self._discard_key(item)
+        return item
+
+
+def Stack(key=None):
+    """Return an empty Last-In-First-Out Queue."""
+    return LIFOQueue(key)
+
+
+class FIFOQueue(_IndexedQueue):
     """A First-In-First-Out Queue implemented with collections.deque
     
     MODIFIED FROM AIMA VERSION
         - Use deque
         - Use an additional dict to track membership
     """
-    def __init__(self):
+    def __init__(self, key=None):
+        super().__init__(key)
         self.A = deque()
-        self.__keys = set()
 
     def append(self, item):
         self.A.append(item)
-        self.__keys.add(item)
-
-    def __len__(self):
-        return len(self.A)
+        self._add_key(item)
 
     def pop(self):
-        key = self.A.popleft()
-        self.__keys.discard(key)
-        return key
-
-    def __contains__(self, item):
-        return item in self.__keys
+        item = self.A.popleft()
+        self._discard_key(item)
+        return item
 
 
 class PriorityQueue(Queue):
@@ -363,30 +463,35 @@ class PriorityQueue(Queue):
     MODIFIED FROM AIMA VERSION
         - Use heapq
         - Use an additional dict to track membership
+        - The membership dict counts the queued items per key(item)
     """
 
-    def __init__(self, order=None, f=lambda x: x):
+    def __init__(self, order=None, f=lambda x: x, key=None):
         self.A = []
         self._A = Counter()
         self.f = f
+        self.key = key or _identity
 
     def append(self, item):
         heapq.heappush(self.A, (self.f(item), item))
-        self._A[item] += 1
+        self._A[self.key(item)] += 1
 
     def __len__(self):
         return len(self.A)
 
     def pop(self):
         _, item = heapq.heappop(self.A)
-        self._A[item] -= 1
+        k = self.key(item)
+        self._A[k] -= 1
+        if not self._A[k]:
+            del self._A[k]
         return item
 
     def __contains__(self, item):
-        return self._A[item] > 0
+        return self._A.get(self.key(item), 0) > 0
 
     def __getitem__(self, key):
-        if self._A[key] > 0:
+        if self._A.get(self.key(key), 0) > 0:
             return key
 
 # ______________________________________________________________________________
@@ -1,10 +1,14 @@
 
+import random
+
 from aimacode.planning import Action
-from aimacode.utils import expr
+from aimacode.utils import expr, Expr
 from _utils import (
-    FluentState, encode_state, decode_state, create_expressions, make_relations
+    FluentState, encode_state, decode_state, create_expressions, make_relations,
+    cached_heuristic
 )
 
+from pattern_database import AirCargoPatterns
 from planning_problem import BasePlanningProblem
 
     ##############################################################################
@@ -41,6 +45,34 @@ class AirCargoProblem(BasePlanningProblem):
         self.planes = planes
         self.airports = airports
         self.actions_list = self.get_actions()
+        self.prune_unreachable()
+
+    # number of cargos in each pattern of h_pdb, and the directory where the
+    # pattern databases are saved (None to only build them in memory)
+    pattern_size = 2
+    pdb_directory = None
+
+    @property
+    def pattern_databases(self):
+        """ Pattern databases of this problem for h_pdb (loaded or built on first use) """
+        patterns = self.__dict__.get('_pattern_databases')
+        if patterns is None:
+            patterns = self._pattern_databases = AirCargoPatterns(
+                self, self.pattern_size, self.pdb_directory)
+        return patterns
+
+    @cached_heuristic
+    def h_pdb(self, node):
+        """ This heuristic looks up the exact distance to the goal in
+        projections of the problem onto small groups of cargos (together with
+        every plane), precomputed once by backward search, and returns the
+        largest one. It is admissible.
+
+        See Also
+        --------
+        Edelkamp, "Planning with pattern databases" (2001)
+        """
+        return self.pattern_databases.h(node.state)
 
     def get_actions(self):
         """ This method creates concrete actions (no variables) for all actions
@@ -54,6 +86,16 @@ class AirCargoProblem(BasePlanningProblem):
             list of Action objects
         """
 
+        fluents = {}
+
+        def fluent(name, *args):
+            """ Return the Expr name(*args), building each distinct one only once """
+            key = (name,) + args
+            e = fluents.get(key)
+            if e is None:
+                e = fluents[key] = Expr(name, *[Expr(arg) for arg in args])
+            return e
+
         def load_actions():
             """ Create all concrete Load actions
 
@@ -65,13 +107,11 @@ class AirCargoProblem(BasePlanningProblem):
             for c in self.cargos:
                 for p in self.planes:
                     for a in self.airports:
-                        precond_pos = set([expr("At({}, {})".format(c, a)),
-                                       expr("At({}, {})".format(p, a))
-                                       ])
+                        precond_pos = set([fluent("At", c, a), fluent("At", p, a)])
                         precond_neg = set([])
-                        effect_add = set([expr("In({}, {})".format(c, p))])
-                        effect_rem = set([expr("At({}, {})".format(c, a))])
-                        load = Action(expr("Load({}, {}, {})".format(c, p, a)),
+                        effect_add = set([fluent("In", c, p)])
+                        effect_rem = set([fluent("At", c, a)])
+                        load = Action(fluent("Load", c, p, a),
                                       [precond_pos, precond_neg],
                                       [effect_add, effect_rem])
                         loads.append(load)
@@ -88,13 +128,11 @@ class AirCargoProblem(BasePlanningProblem):
             for c in self.cargos:
                 for p in self.planes:
                     for a in self.airports:
-                        precond_pos = set([expr("In({}, {})".format(c, p)),
-                                       expr("At({}, {})".format(p, a)),
-                                       ])
+                        precond_pos = set([fluent("In", c, p), fluent("At", p, a)])
                         precond_neg = set([])
-                        effect_add = set([expr("At({}, {})".format(c, a))])
-                        effect_rem = set([expr("In({}, {})".format(c, p))])
-                        unload = Action(expr("Unload({}, {}, {})".format(c, p, a)),
+                        effect_add = set([fluent("At", c, a)])
+                        effect_rem = set([fluent("In", c, p)])
+                        unload = Action(fluent("Unload", c, p, a),
                                       [precond_pos, precond_neg],
                                       [effect_add, effect_rem])
                         unloads.append(unload)
@@ -112,12 +150,11 @@ class AirCargoProblem(BasePlanningProblem):
                 for to in self.airports:
                     if fr != to:
                         for p in self.planes:
-                            precond_pos = set([expr("At({}, {})".format(p, fr)),
-                                           ])
+                            precond_pos = set([fluent("At", p, fr)])
                             precond_neg = set([])
-                            effect_add = set([expr("At({}, {})".format(p, to))])
-                            effect_rem = set([expr("At({}, {})".format(p, fr))])
-                            fly = Action(expr("Fly({}, {}, {})".format(p, fr, to)),
+                            effect_add = set([fluent("At", p, to)])
+                            effect_rem = set([fluent("At", p, fr)])
+                            fly = Action(fluent("Fly", p, fr, to),
                                          [precond_pos, precond_neg],
                                          [effect_add, effect_rem])
                             flys.append(fly)
@@ -199,3 +236,45 @@ def air_cargo_p4():
     init = FluentState(pos, [r for r in at_relations + in_relations if r not in pos])
     goal = create_expressions(['At(C1, JFK)', 'At(C2, SFO)', 'At(C3, JFK)', 'At(C4, SFO)', 'At(C5, JFK)'])
     return AirCargoProblem(cargos, planes, airports, init, goal)
+
+
+def air_cargo_random(n_cargo, n_planes, n_airports, seed=None):
+    """ Generate a random air cargo problem
+
+    Every cargo and plane starts at an airport chosen uniformly at random, and
+    the goal sends each cargo to a different airport than the one it starts
+    at. The same arguments (including seed) always produce the same problem.
+
+    Parameters
+    ----------
+    n_cargo : int
+        Number of cargo entities (named C1, C2, ...)
+
+    n_planes : int
+        Number of airplanes (named P1, P2, ...)
+
+    n_airports : int
+        Number of airports (named A1, A2, ...); must be at least 2
+
+    seed : hashable (optional)
+        Seed for the random number generator
+
+    Returns
+    -------
+    AirCargoProblem
+    """
+    if n_airports < 2:
+        raise ValueError("air cargo problems need at least two airports")
+    rng = random.Random(seed)
+    cargos = ['C{}'.format(i + 1) for i in range(n_cargo)]
+    planes = ['P{}'.format(i + 1) for i in range(n_planes)]
+    airports = ['A{}'.format(i + 1) for i in range(n_airports)]
+    at_relations = make_relations('At', cargos + planes, airports)
+    in_relations = make_relations('In', cargos, planes)
+    start = {x: rng.choice(airports) for x in cargos + planes}
+    pos = create_expressions(['At({}, {})'.format(x, start[x]) for x in cargos + planes])
+    init = FluentState(pos, [r for r in at_relations + in_relations if r not in pos])
+    goal = create_expressions([
+        'At({}, {})'.format(c, rng.choice([a for a in airports if a != start[c]]))
+        for c in cargos])
+    return AirCargoProblem(cargos, planes, airports, init, goal)
@@ -0,0 +1,157 @@
+
+import argparse
+import csv
+import json
+import multiprocessing
+import sys
+
+from timeit import default_timer as timer
+
+from aimacode.search import InstrumentedProblem
+from air_cargo_problems import air_cargo_random
+from results import peak_memory_kb
+from run_search import SEARCHES
+
+FIELDS = ['n_cargo', 'n_planes', 'n_airports', 'seed', 'search', 'heuristic',
+          'status', 'plan_length', 'actions', 'expansions', 'goal_tests',
+          'new_nodes', 'time', 'peak_memory_kb']
+
+DEFAULT_SIZES = [(2, 2, 2), (3, 2, 3), (4, 2, 4), (5, 3, 4), (6, 3, 5),
+                 (8, 4, 6), (10, 4, 6), (12, 5, 8)]
+
+
+def _run_one(size, seed, s_choice, connection):
+    """ Solve one generated problem with one search and send back the stats """
+    n_cargo, n_planes, n_airports = size
+    _, search_fn, heuristic = SEARCHES[s_choice - 1]
+    problem = air_cargo_random(n_cargo, n_planes, n_airports, seed)
+    ip = InstrumentedProblem(problem)
+    start = timer()
+    if heuristic:
+        node = search_fn(ip, getattr(problem, heuristic))
+    else:
+        node = search_fn(ip)
+    elapsed = timer() - start
+    connection.send({
+        'status': 'solved' if node is not None else 'failed',
+        'plan_length': len(node.solution()) if node is not None else None,
+        'actions': len(problem.actions_list),
+        'expansions': ip.succs,
+        'goal_tests': ip.goal_tests,
+        'new_nodes': ip.states,
+        'time': elapsed,
+        'peak_memory_kb': peak_memory_kb(),
+    })
+    connection.close()
+
+
+def run_benchmark(sizes, s_choices, time_limit=60, seed=0, stream=None):
+    """ Run every selected search on a generated problem of each size
+
+    Each run executes in a separate process so that it can be stopped when it
+    exceeds time_limit seconds, and so that its peak memory is measured on its
+    own. Sizes should be ordered from smallest to largest: once a search times
+    out (or fails) it is skipped for the remaining, larger sizes.
+
+    Parameters
+    ----------
+    sizes : iterable
+        (n_cargo, n_planes, n_airports) tuples passed to `air_cargo_random`
+
+    s_choices : iterable
+        1-based indices into `run_search.SEARCHES`
+
+    time_limit : float
+        Wall-clock budget in seconds for each run
+
+    seed : int
+        Seed passed to `air_cargo_random`
+
+    stream : file-like (optional)
+        If provided, a one-line summary is written after each run
+
+    Returns
+    -------
+    list of dicts with the keys in FIELDS
+    """
+    results = []
+    stopped = set()
+    for size in sizes:
+        for s_choice in s_choices:
+            name, _, heuristic = SEARCHES[s_choice - 1]
+            row = dict(zip(FIELDS, list(size) + [seed, name, heuristic]))
+            if s_choice in stopped:
+                row['status'] = 'skipped'
+                results.append(row)
+                continue
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            worker = multiprocessing.Process(target=_run_one, args=(size, seed, s_choice, sender))
+            start = timer()
+            worker.start()
+            sender.close()
+            if receiver.poll(time_limit):
+                try:
+                    row.update(receiver.recv())
+                except EOFError:
+                    row['status'] = 'error'
+            else:
+                row['status'] = 'timeout'
+                row['time'] = timer() - start
+            worker.terminate()
+            worker.join()
+            receiver.close()
+            if row['status'] != 'solved':
+                stopped.add(s_choice)
+            results.append(row)
+            if stream is not None:
+                stream.write('{n_cargo}x{n_planes}x{n_airports} {search} {heuristic}: '
+                             '{status} {expansions} expansions in {time}s\n'.format(
+                                 **dict((k, row.get(k)) for k in FIELDS)))
+                stream.flush()
+    return results
+
+
+def write_results(results, output, fmt='csv'):
+    """ Write benchmark results to a file object as CSV or JSON """
+    if fmt == 'json':
+        json.dump(results, output, indent=2)
+        output.write('\n')
+    else:
+        writer = csv.DictWriter(output, fieldnames=FIELDS)
+        writer.writeheader()
+        for row in results:
+            writer.writerow(row)
+
+
+def _parse_size(text):
+    size = tuple(int(x) for x in text.split(','))
+    if len(size) != 3:
+        raise argparse.ArgumentTypeError("sizes must be given as CARGOS,PLANES,AIRPORTS")
+    return size
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the search algorithms in " +
+        "run_search.py on randomly generated air cargo problems of increasing size.")
+    parser.add_argument('-s', '--searches', nargs="+", type=int, metavar='',
+                        choices=range(1, len(SEARCHES)+1), default=list(range(1, len(SEARCHES)+1)),
+                        help="Indices of the searches to run (see run_search.py); default is all of them.")
+    parser.add_argument('-z', '--sizes', nargs="+", type=_parse_size, metavar='C,P,A',
+                        default=DEFAULT_SIZES,
+                        help="Problem sizes as CARGOS,PLANES,AIRPORTS, from smallest to largest.")
+    parser.add_argument('-t', '--time-limit', type=float, default=60,
+                        help="Wall-clock budget in seconds for each run (default 60).")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="Seed for the problem generator (default 0).")
+    parser.add_argument('-f', '--format', choices=['csv', 'json'], default='csv',
+                        help="Output format (default csv).")
+    parser.add_argument('-o', '--output', default=None,
+                        help="File to write the results to (default stdout).")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.sizes, args.searches, args.time_limit, args.seed, sys.stderr)
+    if args.output is None:
+        write_results(results, sys.stdout, args.format)
+    else:
+        with open(args.output, 'w', newline='') as output:
+            write_results(results, output, args.format)
@@ -0,0 +1,249 @@
+
+from weakref import WeakKeyDictionary
+
+
+def _bits(mask):
+    """ Yield the indices of the set bits in an integer bitmask """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class BitsetDomain:
+    """ Index-based encoding of the literals and actions of a planning problem
+
+    Literals are numbered 0..2n-1 (fluent i is literal i, and its negation is
+    literal i + n), and actions are numbered 0..2n+m-1 where the first 2n
+    actions are the no-op actions that persist each literal. Every relation in
+    the planning graph is stored as a boolean matrix whose rows are Python
+    integers used as bit vectors, so set operations over a whole row (e.g.,
+    testing every precondition of an action against a layer) are a single
+    integer operation.
+
+    Attributes
+    ----------
+    precondition_rows : list
+        precondition_rows[a] is a literal mask of the preconditions of action a
+
+    effect_rows : list
+        effect_rows[a] is a literal mask of the effects of action a
+
+    achievers : list
+        achievers[l] is an action mask of the actions that have literal l as an effect
+
+    consumers : list
+        consumers[l] is an action mask of the actions that require literal l
+
+    static_mutex_rows : list
+        static_mutex_rows[a] is an action mask of the actions that are mutex with
+        action a by inconsistent effects or interference
+
+    real_actions : int
+        action mask of every action that is not a no-op
+    """
+    def __init__(self, problem):
+        self.num_fluents = n = len(problem.state_map)
+        self.num_literals = 2 * n
+        index = {f: i for i, f in enumerate(problem.state_map)}
+        self.literals = list(problem.state_map) + [~f for f in problem.state_map]
+        self.goal_literals = [index[g] for g in problem.goal]
+
+        self.precondition_rows = []
+        self.effect_rows = []
+        for lit in range(2 * n):
+            self.precondition_rows.append(1 << lit)
+            self.effect_rows.append(1 << lit)
+        for action in problem.actions_list:
+            pre = 0
+            for f in action.precond_pos: pre |= 1 << index[f]
+            for f in action.precond_neg: pre |= 1 << (index[f] + n)
+            eff = 0
+            for f in action.effect_add: eff |= 1 << index[f]
+            for f in action.effect_rem: eff |= 1 << (index[f] + n)
+            self.precondition_rows.append(pre)
+            self.effect_rows.append(eff)
+        self.num_actions = len(self.precondition_rows)
+        self.real_actions = ((1 << self.num_actions) - 1) ^ ((1 << (2 * n)) - 1)
+
+        self.achievers = [0] * (2 * n)
+        self.consumers = [0] * (2 * n)
+        for a in range(self.num_actions):
+            for lit in _bits(self.effect_rows[a]):
+                self.achievers[lit] |= 1 << a
+            for lit in _bits(self.precondition_rows[a]):
+                self.consumers[lit] |= 1 << a
+
+        # Inconsistent effects: an effect of a negates an effect of b
+        # Interference: an effect of a negates a precondition of b (or vice versa)
+        self.static_mutex_rows = []
+        for a in range(self.num_actions):
+            row = 0
+            for lit in _bits(self.effect_rows[a]):
+                row |= self.achievers[self.negate(lit)] | self.consumers[self.negate(lit)]
+            for lit in _bits(self.precondition_rows[a]):
+                row |= self.achievers[self.negate(lit)]
+            self.static_mutex_rows.append(row & ~(1 << a))
+
+    def negate(self, lit):
+        n = self.num_fluents
+        return lit + n if lit < n else lit - n
+
+    def state_mask(self, state):
+        """ Return the literal mask of a state (tuple of True/False values) """
+        n, mask = self.num_fluents, 0
+        for i, f in enumerate(state):
+            mask |= 1 << (i if f else i + n)
+        return mask
+
+
+_domains = WeakKeyDictionary()
+
+
+def bitset_domain(problem):
+    """ Return the BitsetDomain for a problem, creating it on first use """
+    domain = _domains.get(problem)
+    if domain is None:
+        domain = _domains[problem] = BitsetDomain(problem)
+    return domain
+
+
+class BitsetPlanningGraph:
+    """ Drop-in replacement for `my_planning_graph.PlanningGraph` heuristics that
+    stores every layer as bitmasks over the literal and action indices of a
+    `BitsetDomain`. Mutex relations are computed with row-wise bit operations
+    instead of pairwise Python predicates, and the values of h_levelsum,
+    h_maxlevel and h_setlevel match the reference planning graph.
+
+    Attributes
+    ----------
+    literal_layers : list
+        literal_layers[k] is the literal mask of literal layer k
+
+    action_layers : list
+        action_layers[k] is the action mask of action layer k
+
+    literal_mutexes : list
+        literal_mutexes[k] is a dict mapping each literal index in layer k to
+        the literal mask of the literals that are mutex with it in that layer
+
+    action_mutexes : list
+        action_mutexes[k] is a dict mapping each action index in layer k to the
+        action mask of the actions that are mutex with it in that layer
+    """
+    def __init__(self, problem, state, serialize=True, ignore_mutexes=False):
+        self._serialize = serialize
+        self._ignore_mutexes = ignore_mutexes
+        self._is_leveled = False
+        self.domain = bitset_domain(problem)
+
+        layer = self.domain.state_mask(state)
+        self.literal_layers = [layer]
+        self.literal_mutexes = [self._negation_mutexes(layer)]
+        self.action_layers = []
+        self.action_mutexes = []
+
+    def _negation_mutexes(self, layer):
+        domain = self.domain
+        return {lit: layer & (1 << domain.negate(lit)) for lit in _bits(layer)}
+
+    def fill(self, maxlevels=-1):
+        while not self._is_leveled:
+            if maxlevels == 0: break
+            self._extend()
+            maxlevels -= 1
+        return self
+
+    def _extend(self):
+        if self._is_leveled: return
+        domain = self.domain
+        literals = self.literal_layers[-1]
+        literal_mutexes = self.literal_mutexes[-1]
+
+        # actions whose precondition row is covered by the parent literal layer
+        actions = self.action_layers[-1] if self.action_layers else 0
+        for a in range(domain.num_actions):
+            if not (actions >> a & 1) and not (domain.precondition_rows[a] & ~literals):
+                actions |= 1 << a
+
+        action_mutexes = {}
+        for a in _bits(actions):
+            row = domain.static_mutex_rows[a]
+            if self._serialize and a >= domain.num_literals:
+                row |= domain.real_actions & ~(1 << a)
+            if not self._ignore_mutexes:
+                # competing needs: some precondition of b is mutex with some
+                # precondition of a in the parent literal layer
+                needs = 0
+                for lit in _bits(domain.precondition_rows[a]):
+                    needs |= literal_mutexes[lit]
+                for lit in _bits(needs):
+                    row |= domain.consumers[lit]
+            action_mutexes[a] = row & actions & ~(1 << a)
+
+        next_literals = 0
+        for a in _bits(actions):
+            next_literals |= domain.effect_rows[a]
+
+        if self._ignore_mutexes:
+            next_mutexes = self._negation_mutexes(next_literals)
+        else:
+            # inconsistent support: every pair of achievers is mutex, i.e., no
+            # achiever of the second literal is compatible with an achiever of the first
+            support = {lit: domain.achievers[lit] & actions for lit in _bits(next_literals)}
+            compatible = {}
+            for lit, achievers in support.items():
+                row = 0
+                for a in _bits(achievers):
+                    row |= actions & ~action_mutexes[a]
+                compatible[lit] = row
+            next_mutexes = {}
+            for lit, row in compatible.items():
+                mutex = 0
+                for other, achievers in support.items():
+                    if not (row & achievers):
+                        mutex |= 1 << other
+                next_mutexes[lit] = mutex | (next_literals & (1 << domain.negate(lit)))
+
+        self.action_layers.append(actions)
+        self.action_mutexes.append(action_mutexes)
+        self.literal_layers.append(next_literals)
+        self.literal_mutexes.append(next_mutexes)
+        self._is_leveled = (next_literals == literals and next_mutexes == literal_mutexes)
+
+    def level_cost(self, goal):
+        for cost, layer in enumerate(self.literal_layers):
+            if layer >> goal & 1:
+                return cost
+        return 0
+
+    def _goals_met(self):
+        layer = self.literal_layers[-1]
+        return all(layer >> g & 1 for g in self.domain.goal_literals)
+
+    def h_levelsum(self):
+        while not self._is_leveled:
+            if self._goals_met():
+                return sum(self.level_cost(g) for g in self.domain.goal_literals)
+            self._extend()
+
+    def h_maxlevel(self):
+        while not self._is_leveled:
+            if self._goals_met():
+                return max((self.level_cost(g) for g in self.domain.goal_literals), default=0)
+            self._extend()
+
+    def h_setlevel(self):
+        goals = self.domain.goal_literals
+        goal_mask = 0
+        for g in goals:
+            goal_mask |= 1 << g
+        level = 0
+        while not self._is_leveled:
+            if self._goals_met():
+                mutexes = self.literal_mutexes[-1]
+                if not any(mutexes[g] & goal_mask for g in goals):
+                    return level
+            self._extend()
+            level += 1
+        return -1
@@ -0,0 +1,209 @@
+
+import heapq
+import os
+import tempfile
+
+from aimacode.search import Node
+
+_NO_ACTION = 0xFFFFFFFF
+_CHUNK = 4096
+
+
+class _LayerFiles:
+    """ Fixed-width records (key, parent key, action index) stored in files
+
+    Keys are packed states (see `_utils.pack_state`) written as big-endian
+    unsigned integers of `width` bytes, so the byte order of the records is
+    the numeric order of their keys, and sorted files can be merged and
+    searched without decoding them.
+    """
+    def __init__(self, directory, width):
+        self.directory = directory
+        self.width = width
+        self.size = 2 * width + 4
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def record(self, key, parent, action):
+        width = self.width
+        return (key.to_bytes(width, 'big') + parent.to_bytes(width, 'big') +
+                action.to_bytes(4, 'big'))
+
+    def decode(self, record):
+        width = self.width
+        return (int.from_bytes(record[:width], 'big'),
+                int.from_bytes(record[width:2 * width], 'big'),
+                int.from_bytes(record[2 * width:], 'big'))
+
+    def write(self, name, records):
+        with open(self.path(name), 'wb') as f:
+            for record in records:
+                f.write(record)
+
+    def read(self, name):
+        size = self.size
+        with open(self.path(name), 'rb') as f:
+            while True:
+                block = f.read(size * _CHUNK)
+                if not block:
+                    return
+                for start in range(0, len(block), size):
+                    yield block[start:start + size]
+
+    def find(self, name, key):
+        """ Binary search a sorted file for the record of key """
+        target = key.to_bytes(self.width, 'big')
+        size = self.size
+        with open(self.path(name), 'rb') as f:
+            lo, hi = 0, os.path.getsize(self.path(name)) // size
+            while lo < hi:
+                mid = (lo + hi) // 2
+                f.seek(mid * size)
+                record = f.read(size)
+                if record[:self.width] < target:
+                    lo = mid + 1
+                elif record[:self.width] > target:
+                    hi = mid
+                else:
+                    return record
+        return None
+
+
+def external_breadth_first_search(problem, directory=None, buffer_size=500000, locality=None):
+    """ Breadth-first search with delayed duplicate detection on disk
+
+    The search proceeds one depth layer at a time, and only the layer being
+    expanded is streamed from disk. Successors are collected in a buffer of at
+    most buffer_size records, which is sorted and written to a run file each
+    time it fills up. At the end of the layer the runs are merged, and
+    duplicates are removed by merging against the sorted files of the previous
+    layers (the last `locality` layers if given; two is enough when every
+    action can be undone, as in the air cargo domain). Every record keeps the
+    parent key and the action index, so the solution is recovered by binary
+    searching the layer files backwards from the goal.
+
+    The problem must be a planning problem: `problem.key(state)` must return a
+    packed integer state, `problem.state_from_key(key)` must invert it, and
+    the actions must come from `problem.actions_list`.
+
+    Parameters
+    ----------
+    directory : str (optional)
+        Directory for the layer files; a temporary directory is created (and
+        removed afterwards) if it is not provided
+
+    buffer_size : int
+        Maximum number of successor records held in memory
+
+    locality : int (optional)
+        Number of previous layers checked for duplicates (default all)
+
+    Returns
+    -------
+    Node for the goal with the usual parent chain, or None
+    """
+    if directory is None:
+        with tempfile.TemporaryDirectory(prefix='external-bfs-') as tmp:
+            return external_breadth_first_search(problem, tmp, buffer_size, locality)
+
+    actions = list(problem.actions_list)
+    action_index = {id(action): idx for idx, action in enumerate(actions)}
+    files = _LayerFiles(directory, max(1, (len(problem.state_map) + 7) // 8))
+    start = problem.key(problem.initial)
+    if problem.goal_test(problem.initial):
+        return Node(problem.initial)
+    files.write('layer0', [files.record(start, start, _NO_ACTION)])
+
+    depth = 0
+    while True:
+        runs = []
+        buffer = []
+
+        def flush():
+            buffer.sort()
+            name = 'layer{}.run{}'.format(depth + 1, len(runs))
+            files.write(name, _unique(buffer, files.width))
+            runs.append(name)
+            del buffer[:]
+
+        for record in files.read('layer{}'.format(depth)):
+            key, _, _ = files.decode(record)
+            state = problem.state_from_key(key)
+            for action in problem.actions(state):
+                child = problem.key(problem.result(state, action))
+                buffer.append(files.record(child, key, action_index[id(action)]))
+                if len(buffer) >= buffer_size:
+                    flush()
+        if buffer:
+            flush()
+        if not runs:
+            return None
+
+        # merge the runs and drop the keys already present in earlier layers
+        first = 0 if locality is None else max(0, depth + 1 - locality)
+        previous = [files.read('layer{}'.format(d)) for d in range(first, depth + 1)]
+        merged = _unique(heapq.merge(*[files.read(run) for run in runs]), files.width)
+        name = 'layer{}'.format(depth + 1)
+        goal = None
+        with open(files.path(name), 'wb') as f:
+            written = 0
+            for record in _subtract(merged, previous, files.width):
+                f.write(record)
+                written += 1
+                if goal is None:
+                    key, _, _ = files.decode(record)
+                    if problem.goal_test(problem.state_from_key(key)):
+                        goal = key
+        for run in runs:
+            os.remove(files.path(run))
+        depth += 1
+        if goal is not None:
+            return _reconstruct(problem, files, actions, goal, depth)
+        if not written:
+            return None
+
+
+def _unique(records, width):
+    """ Yield the first record for each key of a sorted record stream """
+    last = None
+    for record in records:
+        key = record[:width]
+        if key != last:
+            last = key
+            yield record
+
+
+def _subtract(records, layers, width):
+    """ Yield the records of a sorted stream whose keys do not appear in any of
+    the sorted record streams in layers (a merge join)
+    """
+    heads = [next(layer, None) for layer in layers]
+    for record in records:
+        key = record[:width]
+        duplicate = False
+        for idx, layer in enumerate(layers):
+            head = heads[idx]
+            while head is not None and head[:width] < key:
+                head = next(layer, None)
+            heads[idx] = head
+            if head is not None and head[:width] == key:
+                duplicate = True
+        if not duplicate:
+            yield record
+
+
+def _reconstruct(problem, files, actions, goal, depth):
+    """ Follow the parent records from the goal back to the initial state and
+    replay the actions to build the Node chain
+    """
+    plan = []
+    key = goal
+    for d in range(depth, 0, -1):
+        key, parent, action = files.decode(files.find('layer{}'.format(d), key))
+        plan.append(actions[action])
+        key = parent
+    node = Node(problem.initial)
+    for action in reversed(plan):
+        node = node.child_node(problem, action)
+    return node
@@ -0,0 +1,131 @@
+
+from collections import defaultdict
+from itertools import combinations
+
+from aimacode.search import Node
+from my_planning_graph import PlanningGraph
+
+
+class GraphPlan:
+    """ GraphPlan (Blum & Furst, 1997) over the project planning graph
+
+    The planning graph is built without serializing actions, so several
+    non-mutex actions can be chosen in the same layer, and extended one level
+    at a time until every goal literal appears with no pair of goals mutex.
+    Then a backward search tries to choose, for each goal, a non-mutex
+    achiever in the preceding action layer (persisting the goal with its no-op
+    whenever possible); the preconditions of the chosen actions become the
+    goals of the previous level. Goal sets that fail at some level are
+    memoized as nogoods so they are never searched again.
+
+    Once the graph has leveled off (see `PlanningGraph._is_leveled`), all
+    later layers are identical to the last one. If a further stage adds no new
+    nogoods at the level where the graph leveled off, no stage ever will, so
+    the problem has no solution and the search stops.
+
+    See Also
+    --------
+    Russell-Norvig 10.3.2 (3rd Edition)
+    """
+    def __init__(self, problem):
+        self.problem = problem
+        self.graph = PlanningGraph(problem, problem.initial, serialize=False)
+        self.goals = frozenset(problem.goal)
+        self.nogoods = defaultdict(set)
+        self.actions = {str(action): action for action in problem.actions_list}
+
+    def literal_layer(self, level):
+        layers = self.graph.literal_layers
+        return layers[min(level, len(layers) - 1)]
+
+    def action_layer(self, level):
+        layers = self.graph.action_layers
+        return layers[min(level, len(layers) - 1)]
+
+    def _goals_reachable(self, goals, level):
+        layer = self.literal_layer(level)
+        return (all(g in layer for g in goals) and
+                not any(layer.is_mutex(a, b) for a, b in combinations(goals, 2)))
+
+    def solve(self):
+        """ Return the parallel plan as a list of steps, where each step is a
+        list of Action objects that can be executed in any order, or None if
+        the problem has no solution
+        """
+        level = 0
+        leveled_at = None
+        previous_count = None
+        while True:
+            if self._goals_reachable(self.goals, level):
+                plan = self._extract(self.goals, level)
+                if plan is not None:
+                    return [[self.actions[str(a)] for a in step if not a.no_op] for step in plan]
+            if self.graph._is_leveled:
+                if leveled_at is None:
+                    leveled_at = len(self.graph.literal_layers) - 1
+                    if not self._goals_reachable(self.goals, leveled_at):
+                        return None
+                count = len(self.nogoods[leveled_at])
+                if level > leveled_at and count == previous_count:
+                    return None
+                previous_count = count
+            else:
+                self.graph._extend()
+            level += 1
+
+    def _extract(self, goals, level):
+        if level == 0:
+            return []
+        if goals in self.nogoods[level]:
+            return None
+        if not self._goals_reachable(goals, level):
+            plan = None
+        else:
+            # the goals with the fewest achievers are the most constrained
+            layer = self.literal_layer(level)
+            ordered = sorted(goals, key=lambda g: (len(layer.parents[g]), str(g)))
+            plan = self._assign(ordered, 0, [], level)
+        if plan is None:
+            self.nogoods[level].add(goals)
+        return plan
+
+    def _assign(self, goals, idx, chosen, level):
+        if idx == len(goals):
+            subgoals = frozenset(p for action in chosen for p in action.preconditions)
+            plan = self._extract(subgoals, level - 1)
+            return None if plan is None else plan + [chosen]
+        goal = goals[idx]
+        if any(goal in action.effects for action in chosen):
+            return self._assign(goals, idx + 1, chosen, level)
+        actions = self.action_layer(level - 1)
+        achievers = sorted(self.literal_layer(level).parents[goal],
+                           key=lambda a: (not a.no_op, str(a)))
+        for action in achievers:
+            if any(actions.is_mutex(action, other) for other in chosen):
+                continue
+            plan = self._assign(goals, idx + 1, chosen + [action], level)
+            if plan is not None:
+                return plan
+        return None
+
+
+def graphplan_steps(problem):
+    """ Return a parallel plan for the problem as a list of steps (lists of
+    Action objects), or None if the problem has no solution
+    """
+    return GraphPlan(problem).solve()
+
+
+def graphplan(problem):
+    """ Solve the problem with GraphPlan and return a search Node for the
+    goal, like the state-space searches. The actions in each parallel step are
+    executed one after the other (in any order, since they are not mutex).
+    """
+    steps = graphplan_steps(problem)
+    if steps is None:
+        return None
+    node = Node(problem.initial)
+    for step in steps:
+        for action in step:
+            node = node.child_node(problem, action)
+    return node
@@ -1,8 +1,10 @@
 
 from copy import deepcopy
 from functools import lru_cache
-from itertools import combinations
-from collections import defaultdict, MutableSet
+from itertools import chain, combinations
+from collections import defaultdict
+from collections.abc import MutableSet
+from weakref import WeakKeyDictionary
 
 from aimacode.planning import Action
 from aimacode.utils import expr, Expr
@@ -41,6 +43,80 @@ def makeNoOp(literal):
             Action(~action, [set([~literal]), []], [set([~literal]), []]))
 
 
+class StaticGraphData:
+    """ Layer-independent structure shared by every planning graph built for
+    the same problem instance
+
+    The action nodes (including no-ops) and the static mutex relations between
+    pairs of actions (inconsistent effects and interference) depend only on the
+    problem domain, not on the state at the root of the graph or on the layer,
+    so they are computed once and reused by every graph built for a heuristic.
+
+    Attributes
+    ----------
+    action_nodes : list
+        ActionNode instances for every no-op and every action in the problem
+
+    static_mutexes : dict
+        Sparse adjacency sets mapping each ActionNode to a frozenset of the
+        ActionNodes that are mutex with it by inconsistent effects or
+        interference (actions with no static mutexes map to an empty set)
+
+    consumers : dict
+        Mapping from each literal to the (non no-op) ActionNodes that have it
+        as a precondition
+
+    unconditional : list
+        The (non no-op) ActionNodes without preconditions
+    """
+    def __init__(self, problem):
+        no_ops = [make_node(n, no_op=True) for n in chain(*(makeNoOp(s) for s in problem.state_map))]
+        self.action_nodes = no_ops + [make_node(a) for a in problem.actions_list]
+
+        # index the actions by the literals they produce and consume so that each
+        # action is only compared with the actions that touch the negation of one
+        # of its literals instead of every other action in the problem
+        achievers = defaultdict(set)
+        consumers = defaultdict(set)
+        for action in self.action_nodes:
+            for literal in action.effects:
+                achievers[literal].add(action)
+            for literal in action.preconditions:
+                consumers[literal].add(action)
+        self.consumers = {literal: [a for a in actions if not a.no_op]
+                          for literal, actions in consumers.items()}
+        self.unconditional = [a for a in self.action_nodes if not a.no_op and not a.preconditions]
+
+        self.static_mutexes = {}
+        for action in self.action_nodes:
+            mutexes = set()
+            for literal in action.effects:
+                negation = ~literal
+                mutexes |= achievers.get(negation, ())   # inconsistent effects
+                mutexes |= consumers.get(negation, ())   # interference
+            for literal in action.preconditions:
+                mutexes |= achievers.get(~literal, ())   # interference
+            mutexes.discard(action)
+            self.static_mutexes[action] = frozenset(mutexes)
+
+    def is_mutex(self, actionA, actionB):
+        """ Return True if actionA and actionB are mutex by inconsistent effects
+        or interference
+        """
+        return actionB in self.static_mutexes.get(actionA, ())
+
+
+_static_graph_data = WeakKeyDictionary()
+
+
+def static_graph_data(problem):
+    """ Return the StaticGraphData for a problem, creating it on first use """
+    data = _static_graph_data.get(problem)
+    if data is None:
+        data = _static_graph_data[problem] = StaticGraphData(problem)
+    return data
+
+
 class ActionNode(object):
     """ Efficient representation of Actions for planning graph
 
@@ -171,11 +247,15 @@ class BaseActionLayer(BaseLayer):
     def __init__(self, actions=[], parent_layer=None, serialize=True, ignore_mutexes=False):
         super().__init__(actions, parent_layer, ignore_mutexes)
         self._serialize=serialize
+        self.static = None
         if isinstance(actions, BaseActionLayer):
             self.parents.update({k: set(v) for k, v in actions.parents.items()})
             self.children.update({k: set(v) for k, v in actions.children.items()})
+            self.static = actions.static
 
     def update_mutexes(self):
+        if self.static is not None:
+            return self._update_mutexes_static()
         for actionA, actionB in combinations(iter(self), 2):
             if self._serialize and actionA.no_op == actionB.no_op == False:
                 self.set_mutex(actionA, actionB)
@@ -187,6 +267,23 @@ class BaseActionLayer(BaseLayer):
             elif self._competing_needs(actionA, actionB):
                 self.set_mutex(actionA, actionB)
 
+    def _update_mutexes_static(self):
+        # static mutexes (and serialization) are copied from the precomputed
+        # relation, so only the dynamic competing needs test is evaluated pairwise
+        # and only for pairs that are not already mutex
+        for action in self:
+            for other in self.static.static_mutexes.get(action, ()):
+                if other in self:
+                    self.set_mutex(action, other)
+        if self._serialize:
+            for actionA, actionB in combinations([a for a in self if not a.no_op], 2):
+                self.set_mutex(actionA, actionB)
+        if self._ignore_mutexes:
+            return
+        for actionA, actionB in combinations(iter(self), 2):
+            if not self.is_mutex(actionA, actionB) and self._competing_needs(actionA, actionB):
+                self.set_mutex(actionA, actionB)
+
     def add_inbound_edges(self, action, literals):
         # inbound action edges are many-to-one
         self.parents[action] |= set(literals)
@@ -2,7 +2,7 @@ from itertools import chain, combinations
 from aimacode.planning import Action
 from aimacode.utils import expr
 
-from layers import BaseActionLayer, BaseLiteralLayer, makeNoOp, make_node
+from layers import BaseActionLayer, BaseLiteralLayer, static_graph_data
 
 
 class ActionLayer(BaseActionLayer):
@@ -134,27 +134,101 @@ class PlanningGraph:
         self._ignore_mutexes = ignore_mutexes
         self.goal = set(problem.goal)
 
-        # make no-op actions that persist every literal to the next layer
-        no_ops = [make_node(n, no_op=True) for n in chain(*(makeNoOp(s) for s in problem.state_map))]
-        self._actionNodes = no_ops + [make_node(a) for a in problem.actions_list]
-        
+        # the action nodes (including no-op actions that persist every literal
+        # to the next layer) and static mutexes are shared by all graphs built
+        # for the same problem
+        self._static = static_graph_data(problem)
+        self._actionNodes = self._static.action_nodes
+
         # initialize the planning graph by finding the literals that are in the
         # first layer and finding the actions they they should be connected to
         literals = [s if f else ~s for f, s in zip(state, problem.state_map)]
-        layer = LiteralLayer(literals, ActionLayer(), self._ignore_mutexes)
+        root_actions = ActionLayer()
+        root_actions.static = self._static
+        layer = LiteralLayer(literals, root_actions, self._ignore_mutexes)
         layer.update_mutexes()
         self.literal_layers = [layer]
         self.action_layers = []
-    
+
+        # incremental level tracking: the level where each literal first
+        # appears, plus running totals over the goal literals, are updated one
+        # layer at a time by _track_levels as the graph is extended
+        self._first_level = {}
+        self._unmet_goals = set(self.goal)
+        self._goal_level_sum = 0
+        self._goal_level_max = 0
+        self._mutex_goal_pairs = set()
+        self._tracked_layers = 0
+        # number of preconditions of each action that have not appeared yet
+        # (filled in lazily), and the literals that the actions enabled in the
+        # last tracked layer bring into the next one
+        self._unmet_preconditions = {}
+        self._next_literals = set()
+        self._track_levels()
+
+    def _track_levels(self):
+        """ Update the level tracking with the literal layers that were added
+        since the last call (by _extend, which may also be called directly,
+        e.g., by GraphPlan)
+        """
+        while self._tracked_layers < len(self.literal_layers):
+            level = self._tracked_layers
+            layer = self.literal_layers[level]
+            if level == 0:
+                new_literals = set(layer)
+            else:
+                new_literals = self._next_literals
+            self._track_layer(level, layer, new_literals)
+            if level == 0:
+                for action in self._static.unconditional:
+                    self._next_literals |= action.effects
+            self._tracked_layers += 1
+
+    def _track_layer(self, level, layer, new_literals):
+        """ Record the first level of the literals that are new in layer, and
+        update the goal totals for the layer.
+
+        An action is added to the graph in the first layer where all of its
+        preconditions have appeared, so the literals that are new in the next
+        layer are the effects of the actions whose last precondition is new
+        in this one; counting the missing preconditions of each action keeps
+        the work proportional to the new literals and the actions that use
+        them. Literal mutexes only ever disappear as the graph grows, so only
+        goal pairs that were mutex in the previous layer, or that involve a
+        goal that is new in this layer, need to be tested.
+        """
+        new_goals = []
+        next_literals = set()
+        for literal in new_literals:
+            if literal in self._first_level:
+                continue
+            self._first_level[literal] = level
+            if literal in self._unmet_goals:
+                self._unmet_goals.discard(literal)
+                self._goal_level_sum += level
+                self._goal_level_max = max(self._goal_level_max, level)
+                new_goals.append(literal)
+            for action in self._static.consumers.get(literal, ()):
+                unmet = self._unmet_preconditions.get(action, len(action.preconditions)) - 1
+                self._unmet_preconditions[action] = unmet
+                if unmet == 0:
+                    next_literals |= action.effects
+        self._next_literals = next_literals
+        self._mutex_goal_pairs = set(
+            pair for pair in self._mutex_goal_pairs if layer.is_mutex(*pair))
+        present = [g for g in self.goal if g in self._first_level]
+        for goal in new_goals:
+            for other in present:
+                if other != goal and layer.is_mutex(goal, other):
+                    self._mutex_goal_pairs.add(frozenset((goal, other)))
+
     def level_cost(self, goal):
-        level_cost = 0
-        for cost, layer in enumerate(self.literal_layers):
-            if goal in layer:
-                if cost >= level_cost:
-                    level_cost = cost
-                    break
-        return level_cost
-    
+        """ Return the level where goal first appears in the graph (0 if it has
+        not appeared yet)
+        """
+        self._track_levels()
+        return self._first_level.get(goal, 0)
+
     def h_levelsum(self):
         """ Calculate the level sum heuristic for the planning graph
 
@@ -180,31 +254,12 @@ class PlanningGraph:
         --------
         Russell-Norvig 10.3.1 (3rd Edition)
         """
-        # TODO: implement this function
-        '''
-        costs = []
-        self.fill()
-        for goal in self.goal:
-            costs.append(self.level_cost(goal))
-        return sum(costs)
-        '''
-        
-        costs = []
-        
+        self._track_levels()
         while not self._is_leveled:
-            all_goals_met = True
-            for goal in self.goal:
-                costs.append(self.level_cost(goal))
-                if goal not in self.literal_layers[-1]:
-                    all_goals_met = False
-            if all_goals_met:
-                return sum(costs)
-            else:
-                costs.clear()
-                self._extend()
-        
-        pass
-        #raise NotImplementedError
+            if not self._unmet_goals:
+                return self._goal_level_sum
+            self._extend()
+            self._track_levels()
 
     def h_maxlevel(self):
         """ Calculate the max level heuristic for the planning graph
@@ -233,29 +288,12 @@ class PlanningGraph:
         -----
         WARNING: you should expect long runtimes using this heuristic with A*
         """
-        # TODO: implement maxlevel heuristic
-        '''
-        costs = []
-        self.fill()
-        for goal in self.goal:
-            costs.append(self.level_cost(goal))
-        return max(costs)
-        '''
-        costs = []
-
+        self._track_levels()
         while not self._is_leveled:
-            all_goals_met = True
-            for goal in self.goal:
-                costs.append(self.level_cost(goal))
-                if goal not in self.literal_layers[-1]:
-                    all_goals_met = False
-            if all_goals_met:
-                return max(costs)
-            else:
-                costs.clear()
-                self._extend()
-
-        #raise NotImplementedError
+            if not self._unmet_goals:
+                return self._goal_level_max
+            self._extend()
+            self._track_levels()
 
     def h_setlevel(self):
         """ Calculate the set level heuristic for the planning graph
@@ -279,56 +317,15 @@ class PlanningGraph:
         -----
         WARNING: you should expect long runtimes using this heuristic on complex problems
         """
-        # TODO: implement setlevel heuristic
-        '''
-        self.fill()
-        
-        for i,layer in enumerate(self.literal_layers):
-            all_goals_met = True
-            for goal in self.goal:
-                if goal not in layer:
-                    all_goals_met = False
-            if not all_goals_met:
-                continue
-            
-            goals_are_mutex = False
-            
-            for goalA in self.goal:
-                for goalB in self.goal:
-                    if layer.is_mutex(goalA,goalB):
-                        goals_are_mutex = True
-            if not goals_are_mutex:
-                return i
-                
-        pass
-        '''
-        
-        def all_goals_met(layer):
-            for goal in self.goal:
-                if goal not in layer:
-                    return False
-            return True
-            
-        def no_mutex(layer):
-            goals_are_mutex = False
-            for goalA in self.goal:
-                for goalB in self.goal:
-                    if layer.is_mutex(goalA,goalB):
-                        return False
-            return True
-             
-        i = 0
+        self._track_levels()
+        level = 0
         while not self._is_leveled:
-            if all_goals_met(self.literal_layers[-1]) and no_mutex(self.literal_layers[-1]):
-                return i
+            if not self._unmet_goals and not self._mutex_goal_pairs:
+                return level
             self._extend()
-            i = i+1
+            self._track_levels()
+            level += 1
         return -1
-                
-        #raise NotImplementedError
-        
-            
-        
 
     ##############################################################################
     #                     DO NOT MODIFY CODE BELOW THIS LINE                     #
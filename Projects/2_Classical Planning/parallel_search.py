@@ -0,0 +1,104 @@
+
+import multiprocessing
+from timeit import default_timer as timer
+
+from aimacode.search import Node, best_first_graph_search
+from aimacode.utils import memoize
+from _utils import pack_state
+
+
+_worker_problem = None
+_worker_heuristic = None
+
+
+def _init_worker(problem, heuristic):
+    global _worker_problem, _worker_heuristic
+    _worker_problem = problem
+    _worker_heuristic = getattr(problem, heuristic)
+
+
+def _evaluate(key):
+    start = timer()
+    value = _worker_heuristic(Node(_worker_problem.state_from_key(key)))
+    return value, timer() - start
+
+
+class HeuristicPool:
+    """ Pool of worker processes that evaluate a heuristic method of a planning
+    problem for batches of search nodes
+
+    Each worker receives its own copy of the problem once, when the pool
+    starts; after that only packed states (see `_utils.pack_state`) and
+    heuristic values are sent between processes. The values are stored in the
+    `h` slot of the nodes, where `memoize(h, 'h')` finds them, and they are
+    identical to evaluating the heuristic in this process, so a search that
+    uses the pool expands exactly the same nodes in the same order.
+
+    Parameters
+    ----------
+    problem : BasePlanningProblem
+        The problem; wrappers such as InstrumentedProblem are removed so
+        that the workers do not update (and the parent does not pickle) them
+
+    h : callable or str
+        A heuristic method of the problem (e.g., problem.h_pg_setlevel), or
+        its name; it may be wrapped with `functools.wraps` (e.g., by
+        ProfiledProblem.timed), and the calls made by the workers are then
+        added to the stats of the wrapper
+
+    processes : int (optional)
+        Number of worker processes (default: one per CPU)
+    """
+    def __init__(self, problem, h, processes=None):
+        while hasattr(problem, 'problem'):
+            problem = problem.problem
+        method = h
+        while hasattr(method, '__wrapped__'):
+            method = method.__wrapped__
+        name = method if isinstance(method, str) else getattr(method, '__name__', None)
+        if not callable(getattr(problem, name or '', None)):
+            raise ValueError("the heuristic must be a method of the problem, got {!r}".format(h))
+        self.heuristic = getattr(problem, name) if isinstance(h, str) else h
+        self.stats = getattr(h, 'stats', None)
+        self.pool = multiprocessing.Pool(processes, _init_worker, (problem, name))
+
+    def evaluate(self, nodes):
+        """ Compute the heuristic of every node that does not have one yet """
+        pending = [node for node in nodes if not hasattr(node, 'h')]
+        if len(pending) == 1:
+            pending[0].h = self.heuristic(pending[0])
+        elif pending:
+            results = self.pool.map(_evaluate, [pack_state(node.state) for node in pending], 1)
+            for node, (value, elapsed) in zip(pending, results):
+                node.h = value
+            if self.stats is not None:
+                self.stats.heuristic_calls += len(results)
+                self.stats.heuristic_time += sum(elapsed for _, elapsed in results)
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def parallel_astar_search(problem, h, processes=None):
+    """ A* search that evaluates the heuristic for all the children of each
+    expanded node in parallel (see `HeuristicPool`)
+    """
+    with HeuristicPool(problem, h, processes) as workers:
+        h = memoize(workers.heuristic, 'h')
+        return best_first_graph_search(problem, lambda n: n.path_cost + h(n), workers.evaluate)
+
+
+def parallel_greedy_best_first_graph_search(problem, h, processes=None):
+    """ Greedy best-first search that evaluates the heuristic for all the
+    children of each expanded node in parallel (see `HeuristicPool`)
+    """
+    with HeuristicPool(problem, h, processes) as workers:
+        h = memoize(workers.heuristic, 'h')
+        return best_first_graph_search(problem, h, workers.evaluate)
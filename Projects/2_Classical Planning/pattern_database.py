@@ -0,0 +1,246 @@
+
+import hashlib
+import os
+import sys
+from array import array
+from collections import deque
+
+infinity = float('inf')
+
+# unsolvable abstract states are stored as the largest value of the table type
+_UNSOLVABLE = 0xFFFF
+
+# version of the table layout and of the search that fills it, part of the
+# signature so that tables saved by an older version are never loaded
+FORMAT_VERSION = 2
+
+
+class PatternDatabase:
+    """ Table of the exact goal distances of every state of a projection
+
+    The abstract states assign a value to each variable of the pattern, and
+    are numbered in mixed radix: state index = sum(value[v] * stride[v]). The
+    distances are computed by a backward breadth-first search from the
+    abstract goal states, regressing each state through every abstract action,
+    and stored in an unsigned 16-bit array.
+
+    Parameters
+    ----------
+    domains : list
+        Number of values of each pattern variable
+
+    actions : iterable
+        Abstract actions as (pre, eff) pairs of dicts mapping a pattern
+        variable index to a value
+
+    goal : dict
+        Goal value of the pattern variables that have one
+    """
+    def __init__(self, domains, actions, goal):
+        self.domains = list(domains)
+        self.strides = []
+        size = 1
+        for radix in self.domains:
+            self.strides.append(size)
+            size *= radix
+        self.size = size
+        self.actions = sorted(set((tuple(sorted(pre.items())), tuple(sorted(eff.items())))
+                                  for pre, eff in actions))
+        self.goal = dict(goal)
+        self.distances = None
+
+    def signature(self):
+        """ Return a digest that identifies the projection (and the version
+        and layout of its table on this platform), used to name the file of
+        the table
+        """
+        text = repr((FORMAT_VERSION, self.domains, self.actions, sorted(self.goal.items()),
+                     sys.byteorder))
+        return hashlib.sha1(text.encode()).hexdigest()
+
+    def _states(self, fixed):
+        """ Return the indices of the states that agree with the assignment fixed """
+        indices = [sum(self.strides[v] * value for v, value in fixed.items())]
+        for v, radix in enumerate(self.domains):
+            if v not in fixed:
+                stride = self.strides[v]
+                indices = [i + stride * value for i in indices for value in range(radix)]
+        return indices
+
+    def _compile(self):
+        """ Precompute, for each action, the (stride, radix, value) conditions a
+        state must satisfy to be reached by it, the index offset back to the
+        predecessor, and the effect variables whose previous value is free
+        """
+        compiled = []
+        for pre, eff in self.actions:
+            pre, eff = dict(pre), dict(eff)
+            conditions, free = [], []
+            offset = 0
+            for v, value in eff.items():
+                conditions.append((self.strides[v], self.domains[v], value))
+                if v in pre:
+                    offset += (pre[v] - value) * self.strides[v]
+                else:
+                    free.append(v)
+            for v, value in pre.items():
+                if v not in eff:
+                    conditions.append((self.strides[v], self.domains[v], value))
+            compiled.append((conditions, offset, free))
+        return compiled
+
+    def build(self):
+        """ Compute the distance table by backward breadth-first search """
+        distances = array('H', [_UNSOLVABLE]) * self.size
+        queue = deque()
+        for idx in self._states(self.goal):
+            distances[idx] = 0
+            queue.append(idx)
+        compiled = self._compile()
+        while queue:
+            idx = queue.popleft()
+            d = distances[idx] + 1
+            for conditions, offset, free in compiled:
+                if any(idx // stride % radix != value for stride, radix, value in conditions):
+                    continue
+                predecessors = [idx + offset]
+                for v in free:
+                    stride, radix = self.strides[v], self.domains[v]
+                    base = [p - (p // stride % radix) * stride for p in predecessors]
+                    predecessors = [b + value * stride for b in base for value in range(radix)]
+                for p in predecessors:
+                    if distances[p] == _UNSOLVABLE:
+                        distances[p] = d
+                        queue.append(p)
+        self.distances = distances
+        return self
+
+    def load(self, directory):
+        """ Read the table from directory, or build it and save it there if it
+        is missing or does not have the expected size
+        """
+        path = os.path.join(directory, self.signature() + '.pdb')
+        if os.path.exists(path) and os.path.getsize(path) == self.size * 2:
+            distances = array('H')
+            with open(path, 'rb') as f:
+                distances.fromfile(f, self.size)
+            self.distances = distances
+            return self
+        self.build()
+        os.makedirs(directory, exist_ok=True)
+        # write to a temporary file first, so that concurrent runs never read
+        # a partially written table
+        tmp = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmp, 'wb') as f:
+            self.distances.tofile(f)
+        os.replace(tmp, path)
+        return self
+
+    def distance(self, idx):
+        d = self.distances[idx]
+        return infinity if d == _UNSOLVABLE else d
+
+
+class AirCargoPatterns:
+    """ Pattern-database heuristic for an air cargo problem
+
+    The problem is rewritten over multi-valued variables: the location of each
+    cargo (an airport or a plane) and the location of each plane (an airport).
+    The cargos are split into groups of `pattern_size`, and each pattern holds
+    the variables of one group together with all the planes, so the projection
+    of the problem onto a pattern keeps every Fly action and the Load/Unload
+    actions of its cargos, and drops the other cargos. The distance in the
+    projection is a lower bound on the real distance, and the maximum over
+    the patterns is an admissible heuristic that costs one table lookup per
+    pattern.
+
+    If a directory is given, the tables are saved there (named by a digest of
+    the projection), so later runs on the same problem load them instead of
+    searching again.
+
+    Parameters
+    ----------
+    problem : AirCargoProblem
+
+    pattern_size : int
+        Number of cargos in each pattern
+
+    directory : str (optional)
+        Where the tables are saved and loaded from; by default they are
+        only built in memory
+
+    max_size : int
+        Largest number of abstract states in a pattern; groups are made smaller
+        until their patterns fit
+
+    See Also
+    --------
+    Culberson & Schaeffer, "Pattern databases" (1998)
+    Edelkamp, "Planning with pattern databases" (2001)
+    """
+    def __init__(self, problem, pattern_size=2, directory=None, max_size=1000000):
+        airports = list(problem.airports)
+        planes = list(problem.planes)
+        cargos = list(problem.cargos)
+        domains = {c: len(airports) + len(planes) for c in cargos}
+        domains.update((p, len(airports)) for p in planes)
+
+        # each fluent sets one variable to one value
+        values = {}
+        for f in problem.state_map:
+            x, y = str(f.args[0]), str(f.args[1])
+            if f.op == 'At':
+                values[f] = (x, airports.index(y))
+            elif f.op == 'In':
+                values[f] = (x, len(airports) + planes.index(y))
+        self.fluent_values = [values.get(f) for f in problem.state_map]
+        actions = []
+        for action in problem.actions_list:
+            pre = dict(values[f] for f in action.precond_pos if f in values)
+            eff = dict(values[f] for f in action.effect_add if f in values)
+            actions.append((pre, eff))
+        goal = dict(values[g] for g in problem.goal)
+
+        plane_size = 1
+        for p in planes:
+            plane_size *= domains[p]
+        size = max(1, min(pattern_size, len(cargos)))
+        while size > 1 and plane_size * (len(airports) + len(planes)) ** size > max_size:
+            size -= 1
+        if plane_size * (len(airports) + len(planes)) > max_size:
+            raise ValueError("the planes alone have more than {} abstract states".format(max_size))
+
+        self.patterns = [cargos[i:i + size] + planes for i in range(0, len(cargos), size)] or [planes]
+        self.databases = []
+        self.weights = []
+        for pattern in self.patterns:
+            position = {x: v for v, x in enumerate(pattern)}
+            projected = []
+            for pre, eff in actions:
+                eff = {position[x]: value for x, value in eff.items() if x in position}
+                if eff:
+                    pre = {position[x]: value for x, value in pre.items() if x in position}
+                    projected.append((pre, eff))
+            database = PatternDatabase([domains[x] for x in pattern], projected,
+                                       {position[x]: value for x, value in goal.items() if x in position})
+            if directory:
+                database.load(directory)
+            else:
+                database.build()
+            self.databases.append(database)
+            # contribution of each true fluent to the index of the abstract state
+            weights = []
+            for fv in self.fluent_values:
+                if fv is None or fv[0] not in position:
+                    weights.append(0)
+                else:
+                    weights.append(fv[1] * database.strides[position[fv[0]]])
+            self.weights.append(weights)
+
+    def h(self, state):
+        """ Return the maximum over the patterns of the abstract goal distance
+        of state (a tuple of True/False values for each fluent)
+        """
+        true = [i for i, value in enumerate(state) if value]
+        return max(database.distance(sum(weights[i] for i in true))
+                   for database, weights in zip(self.databases, self.weights))
@@ -0,0 +1,305 @@
+
+import re
+
+from aimacode.planning import Action
+from aimacode.utils import Expr
+from _utils import FluentState
+from planning_problem import BasePlanningProblem
+
+
+def tokenize(text):
+    """ Split PDDL text into a list of parentheses and lowercase symbols,
+    dropping comments (from ';' to the end of the line)
+    """
+    text = re.sub(r';[^\n]*', ' ', text).lower()
+    return re.findall(r'[()]|[^\s()]+', text)
+
+
+def parse_sexp(text):
+    """ Parse a single PDDL s-expression into nested lists of symbols """
+    tokens = tokenize(text)
+    stack = [[]]
+    for token in tokens:
+        if token == '(':
+            stack.append([])
+        elif token == ')':
+            if len(stack) == 1:
+                raise ValueError("unbalanced ')' in PDDL input")
+            closed = stack.pop()
+            stack[-1].append(closed)
+        else:
+            stack[-1].append(token)
+    if len(stack) != 1 or len(stack[0]) != 1:
+        raise ValueError("PDDL input must contain exactly one balanced expression")
+    return stack[0][0]
+
+
+def parse_typed_list(items, default='object'):
+    """ Parse a PDDL typed list (e.g., `?x ?y - block ?z`) into a list of
+    (name, type) pairs; untyped names get the default type
+    """
+    pairs, names = [], []
+    idx = 0
+    while idx < len(items):
+        if items[idx] == '-':
+            if idx + 1 >= len(items) or isinstance(items[idx + 1], list):
+                raise ValueError("unsupported type specification in {}".format(items))
+            pairs.extend((name, items[idx + 1]) for name in names)
+            names = []
+            idx += 2
+        else:
+            names.append(items[idx])
+            idx += 1
+    pairs.extend((name, default) for name in names)
+    return pairs
+
+
+def _sections(expression, keyword):
+    """ Check the header of a `(define (keyword name) ...)` expression and
+    return its name and a dict mapping each section keyword to its contents
+    """
+    if not expression or expression[0] != 'define' or expression[1][0] != keyword:
+        raise ValueError("expected (define ({} <name>) ...)".format(keyword))
+    sections = {}
+    for section in expression[2:]:
+        sections.setdefault(section[0], []).append(section[1:])
+    return expression[1][1], sections
+
+
+def _literals(formula):
+    """ Flatten a conjunction of literals into (positive, atom) pairs, where
+    atom is a tuple (predicate, arg1, arg2, ...)
+    """
+    if not formula:
+        return []
+    if formula[0] == 'and':
+        return [lit for part in formula[1:] for lit in _literals(part)]
+    if formula[0] == 'not':
+        return [(not positive, atom) for positive, atom in _literals(formula[1])]
+    if any(isinstance(x, list) for x in formula):
+        raise ValueError("only conjunctions of literals are supported: {}".format(formula))
+    return [(True, tuple(formula))]
+
+
+class Operator:
+    """ A lifted PDDL action schema
+
+    Attributes
+    ----------
+    parameters : list
+        (variable, type) pairs
+
+    precondition : list
+        (positive, atom) pairs, where each atom is a tuple of symbols
+
+    effect : list
+        (positive, atom) pairs
+    """
+    def __init__(self, name, parameters, precondition, effect):
+        self.name = name
+        self.parameters = parameters
+        self.precondition = precondition
+        self.effect = effect
+
+
+class Domain:
+    """ The contents of a PDDL domain file (STRIPS with typing, negative
+    preconditions and equality)
+    """
+    def __init__(self, name, types, constants, predicates, operators):
+        self.name = name
+        self.types = types                # type -> parent type
+        self.constants = constants        # (name, type) pairs
+        self.predicates = predicates      # predicate -> arity
+        self.operators = operators
+
+    def subtypes(self, type_name):
+        """ Return the set of types derived from type_name (including itself) """
+        result = {type_name}
+        changed = True
+        while changed:
+            changed = False
+            for child, parent in self.types.items():
+                if parent in result and child not in result:
+                    result.add(child)
+                    changed = True
+        return result
+
+    def fluent_predicates(self):
+        """ Return the predicates that appear in some action effect; all other
+        predicates are static (their value is fixed by the initial state)
+        """
+        return set(atom[0] for op in self.operators for _, atom in op.effect)
+
+
+class Task:
+    """ The contents of a PDDL problem file """
+    def __init__(self, name, domain_name, objects, init, goal):
+        self.name = name
+        self.domain_name = domain_name
+        self.objects = objects            # (name, type) pairs
+        self.init = init                  # set of atoms
+        self.goal = goal                  # (positive, atom) pairs
+
+
+def parse_domain(text):
+    """ Parse the text of a PDDL domain file into a Domain """
+    name, sections = _sections(parse_sexp(text), 'domain')
+    types = {}
+    for items in sections.get(':types', []):
+        for child, parent in parse_typed_list(items):
+            types[child] = parent
+    constants = []
+    for items in sections.get(':constants', []):
+        constants.extend(parse_typed_list(items))
+    predicates = {}
+    for items in sections.get(':predicates', []):
+        for predicate in items:
+            predicates[predicate[0]] = len(parse_typed_list(predicate[1:]))
+    operators = []
+    for items in sections.get(':action', []):
+        fields = dict(zip(items[1::2], items[2::2]))
+        unknown = set(fields) - {':parameters', ':precondition', ':effect'}
+        if unknown:
+            raise ValueError("unsupported action fields {} in {}".format(sorted(unknown), items[0]))
+        operators.append(Operator(items[0],
+                                  parse_typed_list(fields.get(':parameters', [])),
+                                  _literals(fields.get(':precondition', [])),
+                                  _literals(fields.get(':effect', []))))
+    return Domain(name, types, constants, predicates, operators)
+
+
+def parse_problem(text):
+    """ Parse the text of a PDDL problem file into a Task """
+    name, sections = _sections(parse_sexp(text), 'problem')
+    domain_name = sections[':domain'][0][0]
+    objects = []
+    for items in sections.get(':objects', []):
+        objects.extend(parse_typed_list(items))
+    init = set(tuple(atom) for items in sections.get(':init', []) for atom in items)
+    goal = [lit for items in sections.get(':goal', []) for lit in _literals(items[0])]
+    return Task(name, domain_name, objects, init, goal)
+
+
+def _symbol(name):
+    """ PDDL names may contain hyphens, which cannot appear in Expr symbols """
+    return name.replace('-', '_')
+
+
+def _atom_expr(atom, cache):
+    e = cache.get(atom)
+    if e is None:
+        e = cache[atom] = Expr(_symbol(atom[0]), *[Expr(_symbol(x)) for x in atom[1:]])
+    return e
+
+
+def ground(domain, task):
+    """ Ground every operator of the domain over the objects of the task
+
+    Each parameter only ranges over the objects of its declared type (or a
+    subtype). Preconditions over static predicates and equalities are checked
+    against the initial state as soon as their variables are bound, so
+    bindings that can never apply are cut off early, and they are removed from
+    the ground actions since their value never changes.
+
+    Returns
+    -------
+    (actions, fluents, exprs)
+        a list of Action objects, the set of ground fluent atoms (tuples) that
+        appear in the initial state, the goal or some ground action, and a dict
+        mapping each atom tuple to its Expr
+    """
+    objects = task.objects + domain.constants
+    by_type = {}
+    for obj, type_name in objects:
+        by_type.setdefault(type_name, []).append(obj)
+    fluent_predicates = domain.fluent_predicates()
+    cache = {}
+
+    actions = []
+    fluents = set(atom for atom in task.init if atom[0] in fluent_predicates)
+    fluents.update(atom for _, atom in task.goal)
+    for op in domain.operators:
+        variables = [var for var, _ in op.parameters]
+        domains = []
+        for _, type_name in op.parameters:
+            allowed = domain.subtypes(type_name)
+            domains.append(sorted(set(obj for t in allowed for obj in by_type.get(t, []))))
+
+        # static tests are checked once their last variable has been bound
+        # (checks[k] holds the tests whose variables are all among the first k)
+        position = {var: idx for idx, var in enumerate(variables)}
+        checks = [[] for _ in range(len(variables) + 1)]
+        dynamic = []
+        for positive, atom in op.precondition:
+            if atom[0] == '=' or atom[0] not in fluent_predicates:
+                depth = max([position[x] + 1 for x in atom[1:] if x in position] or [0])
+                checks[depth].append((positive, atom))
+            else:
+                dynamic.append((positive, atom))
+
+        def holds(positive, atom, binding):
+            args = tuple(binding.get(x, x) for x in atom[1:])
+            if atom[0] == '=':
+                return (args[0] == args[1]) == positive
+            return ((atom[0],) + args in task.init) == positive
+
+        def bindings(depth, binding):
+            if not all(holds(positive, atom, binding) for positive, atom in checks[depth]):
+                return
+            if depth == len(variables):
+                yield dict(binding)
+                return
+            for obj in domains[depth]:
+                binding[variables[depth]] = obj
+                yield from bindings(depth + 1, binding)
+            binding.pop(variables[depth], None)
+
+        for binding in bindings(0, {}):
+            def bind(atom):
+                return (atom[0],) + tuple(binding.get(x, x) for x in atom[1:])
+            precond = [[], []]
+            for positive, atom in dynamic:
+                precond[0 if positive else 1].append(bind(atom))
+            effect = [[], []]
+            for positive, atom in op.effect:
+                effect[0 if positive else 1].append(bind(atom))
+            fluents.update(precond[0] + precond[1] + effect[0] + effect[1])
+            name = (op.name,) + tuple(binding[var] for var in variables)
+            actions.append(Action(_atom_expr(name, cache),
+                                  [[_atom_expr(a, cache) for a in atoms] for atoms in precond],
+                                  [[_atom_expr(a, cache) for a in atoms] for atoms in effect]))
+    return actions, fluents, cache
+
+
+class PddlProblem(BasePlanningProblem):
+    def __init__(self, domain, task):
+        """
+        Parameters
+        ----------
+        domain : Domain
+            A parsed PDDL domain (see `parse_domain`)
+
+        task : Task
+            A parsed PDDL problem for the domain (see `parse_problem`)
+        """
+        if any(not positive for positive, _ in task.goal):
+            raise ValueError("negative goals are not supported")
+        actions, fluents, cache = ground(domain, task)
+        pos = [_atom_expr(atom, cache) for atom in fluents if atom in task.init]
+        neg = [_atom_expr(atom, cache) for atom in fluents if atom not in task.init]
+        goal = [_atom_expr(atom, cache) for _, atom in task.goal]
+        super().__init__(FluentState(pos, neg), goal)
+        self.domain = domain
+        self.task = task
+        self.actions_list = actions
+        self.prune_unreachable()
+
+
+def load_pddl(domain_file, problem_file):
+    """ Read a PDDL domain file and problem file and return a PddlProblem """
+    with open(domain_file) as f:
+        domain = parse_domain(f.read())
+    with open(problem_file) as f:
+        task = parse_problem(f.read())
+    return PddlProblem(domain, task)
@@ -1,11 +1,10 @@
 
-from functools import lru_cache
-
 from aimacode.logic import PropKB
 from aimacode.search import Node, Problem
 
-from _utils import encode_state, decode_state
+from _utils import encode_state, decode_state, cached_heuristic, pack_state, unpack_state
 from my_planning_graph import PlanningGraph
+from relaxation import RelaxedTask
 
     ##############################################################################
     #                 YOU DO NOT NEED TO MODIFY CODE IN THIS FILE                #
@@ -13,12 +12,16 @@ from my_planning_graph import PlanningGraph
 
 
 class BasePlanningProblem(Problem):
+    # planning graph implementation used by the h_pg_* heuristics; set this to
+    # bitset_planning_graph.BitsetPlanningGraph to use the bitset engine
+    planning_graph = PlanningGraph
+
     def __init__(self, initial, goal):
         self.state_map = sorted(initial.pos + initial.neg, key=str)
         self.initial_state_TF = encode_state(initial, self.state_map)
         super().__init__(self.initial_state_TF, goal=goal)
 
-    @lru_cache()
+    @cached_heuristic
     def h_unmet_goals(self, node):
         """ This heuristic estimates the minimum number of actions that must be
         carried out from the current state in order to satisfy all of the goal
@@ -27,7 +30,7 @@ class BasePlanningProblem(Problem):
         """
         return sum(1 for i, f in enumerate(self.state_map) if not node.state[i] and f in self.goal)
 
-    @lru_cache()
+    @cached_heuristic
     def h_pg_levelsum(self, node):
         """ This heuristic uses a planning graph representation of the problem
         state space to estimate the sum of the number of actions that must be
@@ -38,11 +41,11 @@ class BasePlanningProblem(Problem):
         --------
         Russell-Norvig 10.3.1 (3rd Edition)
         """
-        pg = PlanningGraph(self, node.state, serialize=True, ignore_mutexes=True)
+        pg = self.planning_graph(self, node.state, serialize=True, ignore_mutexes=True)
         score = pg.h_levelsum()
         return score
 
-    @lru_cache()
+    @cached_heuristic
     def h_pg_maxlevel(self, node):
         """ This heuristic uses a planning graph representation of the problem
         to estimate the maximum level cost out of all the individual goal literals.
@@ -53,11 +56,11 @@ class BasePlanningProblem(Problem):
         --------
         Russell-Norvig 10.3.1 (3rd Edition)
         """
-        pg = PlanningGraph(self, node.state, serialize=True, ignore_mutexes=True)
+        pg = self.planning_graph(self, node.state, serialize=True, ignore_mutexes=True)
         score = pg.h_maxlevel()
         return score
 
-    @lru_cache()
+    @cached_heuristic
     def h_pg_setlevel(self, node):
         """ This heuristic uses a planning graph representation of the problem
         to estimate the level cost in the planning graph to achieve all of the
@@ -67,10 +70,64 @@ class BasePlanningProblem(Problem):
         --------
         Russell-Norvig 10.3.1 (3rd Edition)
         """
-        pg = PlanningGraph(self, node.state, serialize=True)
+        pg = self.planning_graph(self, node.state, serialize=True)
         score = pg.h_setlevel()
         return score
 
+    @property
+    def relaxed_task(self):
+        """ Integer encoding of the delete-relaxation of this problem (built on
+        first use, after the subclass has populated `actions_list`)
+        """
+        task = self.__dict__.get('_relaxed_task')
+        if task is None:
+            task = self._relaxed_task = RelaxedTask(self)
+        return task
+
+    @cached_heuristic
+    def h_max(self, node):
+        """ This heuristic estimates the cost of the most expensive goal literal
+        in the delete relaxation of the problem, where the cost of an action is
+        one plus the maximum cost of its preconditions. It is admissible.
+
+        See Also
+        --------
+        Bonet & Geffner, "Planning as heuristic search" (2001)
+        """
+        return self.relaxed_task.h_max(node.state)
+
+    @cached_heuristic
+    def h_add(self, node):
+        """ This heuristic estimates the sum of the costs of the goal literals in
+        the delete relaxation of the problem, where the cost of an action is one
+        plus the sum of the costs of its preconditions. It is not admissible, but
+        is usually much more informative than h_max.
+
+        See Also
+        --------
+        Bonet & Geffner, "Planning as heuristic search" (2001)
+        """
+        return self.relaxed_task.h_add(node.state)
+
+    @cached_heuristic
+    def h_ff(self, node):
+        """ This heuristic counts the actions in a relaxed plan extracted by
+        following the best supporters of each goal literal back to the current
+        state in the delete relaxation of the problem.
+
+        See Also
+        --------
+        Hoffmann & Nebel, "The FF planning system" (2001)
+        """
+        return self.relaxed_task.h_ff(node.state)
+
+    def helpful_actions(self, state):
+        """ Return the set of actions from the FF relaxed plan for state that are
+        applicable in state; used to restrict successors in enforced hill-climbing
+        """
+        task = self.relaxed_task
+        return set(task.actions[a] for a in task.helpful_actions(state))
+
     def actions(self, state):
         """ Return the actions that can be executed in the given state. """
         possible_actions = []
@@ -98,6 +155,89 @@ class BasePlanningProblem(Problem):
             for f, s in zip(state, self.state_map)
         ])
 
+    def prune_unreachable(self):
+        """ Remove the actions and fluents that cannot be reached from the
+        initial state, even when delete effects are ignored.
+
+        Starting from the fluents that are true in the initial state, actions
+        whose positive preconditions have all been reached are added to a
+        fixpoint, and their add effects are reached in turn. Actions that are
+        never added can never be executed, and fluents that are never reached
+        are false in every reachable state, so both are dropped from
+        `actions_list` and `state_map` (goal fluents are always kept). Call
+        this after the subclass has populated `actions_list`.
+        """
+        initial = decode_state(self.initial_state_TF, self.state_map)
+        reached = set(initial.pos)
+        waiting = {}
+        missing = []
+        pending = []
+        for idx, action in enumerate(self.actions_list):
+            unmet = set(action.precond_pos) - reached
+            for f in unmet:
+                waiting.setdefault(f, []).append(idx)
+            missing.append(len(unmet))
+            if not unmet: pending.append(idx)
+        applicable = set()
+        while pending:
+            idx = pending.pop()
+            applicable.add(idx)
+            for f in self.actions_list[idx].effect_add:
+                if f in reached: continue
+                reached.add(f)
+                for other in waiting.pop(f, ()):
+                    missing[other] -= 1
+                    if missing[other] == 0: pending.append(other)
+
+        self.actions_list = [a for i, a in enumerate(self.actions_list) if i in applicable]
+        self.state_map = [f for f in self.state_map if f in reached or f in self.goal]
+        kept = set(self.state_map)
+        for action in self.actions_list:
+            # pruned fluents are always false, so they trivially satisfy
+            # negative preconditions and deleting them has no effect
+            action.precond_neg &= kept
+            action.effect_rem &= kept
+        self.initial_state_TF = encode_state(initial, self.state_map)
+        self.initial = self.initial_state_TF
+
+    def predecessors(self, state):
+        """ Yield (action, previous_state) pairs such that executing action in
+        previous_state results in the given state; used for backward search.
+
+        Fluents that an action adds or removes and that are not fixed by its
+        preconditions could have held either value before the action, so every
+        combination of their values is generated.
+        """
+        index = {f: i for i, f in enumerate(self.state_map)}
+        for action in self.actions_list:
+            previous = list(state)
+            if any(not state[index[f]] for f in action.effect_add): continue
+            if any(state[index[f]] for f in action.effect_rem
+                   if f not in action.effect_add): continue
+            free = []
+            for f in set(action.effect_add) | set(action.effect_rem):
+                if f in action.precond_pos: previous[index[f]] = True
+                elif f in action.precond_neg: previous[index[f]] = False
+                else: free.append(index[f])
+            if any(not previous[index[f]] for f in action.precond_pos): continue
+            if any(previous[index[f]] for f in action.precond_neg): continue
+            for values in range(1 << len(free)):
+                for bit, i in enumerate(free):
+                    previous[i] = bool(values >> bit & 1)
+                yield action, tuple(previous)
+
+    def key(self, state):
+        """ Return the packed integer encoding of the state, used to index the
+        explored set and frontier during search
+        """
+        return pack_state(state)
+
+    def state_from_key(self, key):
+        """ Return the state with the given packed integer encoding (the inverse
+        of `key`), used by searches that store states on disk
+        """
+        return unpack_state(key, len(self.state_map))
+
     def goal_test(self, state: str) -> bool:
         """ Test the state to see if goal is reached """
         return all(f for f, c in zip(state, self.state_map) if c in self.goal)
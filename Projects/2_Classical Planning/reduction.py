@@ -0,0 +1,313 @@
+
+from aimacode.search import Problem
+from aimacode.utils import Expr
+from _utils import pack_state
+from my_planning_graph import PlanningGraph
+
+
+def object_groups(problem):
+    """ Return the groups of objects of a planning problem that may be
+    interchangeable: the cargos and the planes of an air cargo problem, or the
+    objects of each type of a PDDL problem
+    """
+    if hasattr(problem, 'cargos'):
+        return [problem.cargos, problem.planes]
+    task = getattr(problem, 'task', None)
+    if task is not None:
+        by_type = {}
+        for name, type_name in task.objects:
+            by_type.setdefault(type_name, []).append(name.replace('-', '_'))
+        return list(by_type.values())
+    return []
+
+
+class ObjectSymmetries:
+    """ Interchangeable objects of a planning problem and a canonical form of
+    the states under the permutations of those objects
+
+    Two objects of the same group are interchangeable when swapping them maps
+    the fluents, the actions and the goal of the problem onto themselves. Such
+    transpositions generate the full symmetric group on each class of
+    interchangeable objects, and states related by any of these permutations
+    have the same distance to the goal, so a search only needs to visit one
+    of them.
+
+    `canonical_key` permutes the objects of each class into an order computed
+    from the state by color refinement: every object starts with the color of
+    its class and is repeatedly recolored by the fluents it takes part in
+    (with the colors of the other arguments), and ties left after refinement
+    are broken by singling out the first object of the smallest tied cell and
+    refining again. The result is always the packed encoding of a state that
+    is symmetric to the given one, and symmetric states almost always get the
+    same key.
+
+    Attributes
+    ----------
+    classes : list
+        lists of interchangeable objects (Expr symbols) with at least two members
+    """
+    def __init__(self, problem, groups):
+        self.state_map = list(problem.state_map)
+        self.fluents = [(f.op, f.args) for f in self.state_map]
+        self.index = {f: i for i, f in enumerate(self.fluents)}
+        fluents = set(self.state_map)
+        goal = set(problem.goal)
+        signatures = set(self._action_signature(a) for a in problem.actions_list)
+
+        def symmetric(a, b):
+            swap = {a: b, b: a}
+            rename = lambda e: Expr(e.op, *[swap.get(x, x) for x in e.args])
+            return (all(rename(f) in fluents for f in fluents) and
+                    set(map(rename, goal)) == goal and
+                    all(self._action_signature(action, rename) in signatures
+                        for action in problem.actions_list))
+
+        self.classes = []
+        for group in groups:
+            classes = []
+            for obj in sorted((Expr(name) for name in group), key=str):
+                for members in classes:
+                    if symmetric(members[0], obj):
+                        members.append(obj)
+                        break
+                else:
+                    classes.append([obj])
+            self.classes.extend(members for members in classes if len(members) > 1)
+
+        self.objects = [obj for members in self.classes for obj in members]
+        self.colors = {obj: idx for idx, members in enumerate(self.classes) for obj in members}
+        # every other object is fixed by the permutations and gets its own color
+        others = sorted(set(x for _, args in self.fluents for x in args) - set(self.colors), key=str)
+        self.colors.update((obj, -1 - idx) for idx, obj in enumerate(others))
+
+    @staticmethod
+    def _action_signature(action, rename=lambda e: e):
+        return (rename(Expr(action.name, *action.args)),
+                frozenset(map(rename, action.precond_pos)), frozenset(map(rename, action.precond_neg)),
+                frozenset(map(rename, action.effect_add)), frozenset(map(rename, action.effect_rem)))
+
+    def _refine(self, true):
+        """ Return a color for each object such that the objects of each class
+        have distinct colors, computed from the true fluents of a state
+        """
+        colors = dict(self.colors)
+        cells = len(self.classes)
+        while True:
+            while True:
+                signatures = {obj: [] for obj in self.objects}
+                for op, args in true:
+                    args_colors = tuple(colors[x] for x in args)
+                    for pos, x in enumerate(args):
+                        if x in signatures:
+                            signatures[x].append((op, pos, args_colors))
+                keys = {obj: (colors[obj], tuple(sorted(sig))) for obj, sig in signatures.items()}
+                colors = self._recolor(colors, keys)
+                count = len(set(colors[obj] for obj in self.objects))
+                if count == cells:
+                    break
+                cells = count
+            if cells == len(self.objects):
+                return colors
+            tied = {}
+            for obj in self.objects:
+                tied.setdefault(colors[obj], []).append(obj)
+            first = min(c for c, members in tied.items() if len(members) > 1)
+            chosen = tied[first][0]
+            colors = self._recolor(colors, {obj: (colors[obj], obj is not chosen)
+                                            for obj in self.objects})
+            cells += 1
+
+    @staticmethod
+    def _recolor(colors, keys):
+        """ Replace the color of each object in keys by the rank of its key """
+        ranks = {key: idx for idx, key in enumerate(sorted(set(keys.values())))}
+        colors = dict(colors)
+        for obj, key in keys.items():
+            colors[obj] = ranks[key]
+        return colors
+
+    def canonical_key(self, state):
+        """ Return the packed encoding of the canonical state symmetric to state """
+        if not self.classes:
+            return pack_state(state)
+        true = [self.fluents[i] for i, value in enumerate(state) if value]
+        colors = self._refine(true)
+        mapping = {}
+        for members in self.classes:
+            mapping.update(zip(sorted(members, key=colors.__getitem__), members))
+        bits = 0
+        for op, args in true:
+            bits |= 1 << self.index[(op, tuple(mapping.get(x, x) for x in args))]
+        return bits
+
+
+class StubbornSets:
+    """ Strong stubborn sets for partial-order reduction of a planning problem
+
+    In each state only the applicable actions of a strong stubborn set are
+    expanded. The set starts from the achievers of an unsatisfied goal (one of
+    them must occur in every plan) and is closed under two rules: for an
+    applicable action, every action that interferes with it (disables one of
+    its preconditions, or has a conflicting effect) is added; for an action
+    that is not applicable, the achievers of one unsatisfied precondition are
+    added. Independent actions (e.g., two planes flying) are then explored in
+    a single order, and every state keeps an optimal plan in the reduced
+    state space, so optimal searches remain optimal.
+
+    The reduction depends on the problem having actions that do not
+    interfere. In the air cargo problems every plane can load and unload
+    every cargo, so the stubborn set of any unsatisfied goal grows to every
+    applicable action and nothing is pruned; symmetry reduction is what
+    helps there.
+
+    See Also
+    --------
+    Alkhazraji et al., "A stubborn set algorithm for optimal planning" (2012)
+    Wehrle & Helmert, "Efficient stubborn sets: generalized algorithms and
+    selection strategies" (2014)
+    """
+    def __init__(self, problem):
+        self.actions_list = list(problem.actions_list)
+        index = {f: i for i, f in enumerate(problem.state_map)}
+
+        def mask(fluents):
+            bits = 0
+            for f in fluents: bits |= 1 << index[f]
+            return bits
+
+        self.pre_pos, self.pre_neg, self.add, self.rem = [], [], [], []
+        for action in self.actions_list:
+            self.pre_pos.append(mask(action.precond_pos))
+            self.pre_neg.append(mask(action.precond_neg))
+            self.add.append(mask(action.effect_add))
+            # add effects win over delete effects in BasePlanningProblem.result
+            self.rem.append(mask(action.effect_rem - action.effect_add))
+
+        n = len(problem.state_map)
+        self.adders = [[] for _ in range(n)]
+        self.deleters = [[] for _ in range(n)]
+        for a in range(len(self.actions_list)):
+            for i in range(n):
+                if self.add[a] >> i & 1: self.adders[i].append(a)
+                if self.rem[a] >> i & 1: self.deleters[i].append(a)
+        self.goals = sorted((index[g] for g in problem.goal), key=lambda i: (len(self.adders[i]), i))
+
+        # fluents that are mutex in the leveled planning graph of the initial
+        # state can never hold together, so actions that require a pair of them
+        # are never applicable in the same state and cannot interfere
+        layer = PlanningGraph(problem, problem.initial, serialize=False).fill().literal_layers[-1]
+        exclusive = lambda a, b: any(layer.is_mutex(p, q) for p in a.precond_pos for q in b.precond_pos)
+
+        self.interference = [[] for _ in self.actions_list]
+        for a in range(len(self.actions_list)):
+            for b in range(a + 1, len(self.actions_list)):
+                if ((self.rem[a] & self.pre_pos[b] or self.rem[b] & self.pre_pos[a] or
+                        self.add[a] & self.pre_neg[b] or self.add[b] & self.pre_neg[a] or
+                        self.add[a] & self.rem[b] or self.add[b] & self.rem[a]) and
+                        not exclusive(self.actions_list[a], self.actions_list[b])):
+                    self.interference[a].append(b)
+                    self.interference[b].append(a)
+
+    def _enablers(self, a, bits):
+        """ Return the achievers of the unsatisfied precondition of action a
+        with the fewest achievers
+        """
+        best = None
+        unmet = self.pre_pos[a] & ~bits
+        violated = self.pre_neg[a] & bits
+        i = 0
+        while unmet or violated:
+            if unmet & 1 and (best is None or len(self.adders[i]) < len(best)):
+                best = self.adders[i]
+            if violated & 1 and (best is None or len(self.deleters[i]) < len(best)):
+                best = self.deleters[i]
+            unmet >>= 1
+            violated >>= 1
+            i += 1
+        return best
+
+    def actions(self, state):
+        """ Return the applicable actions of a strong stubborn set for state,
+        in the order of `problem.actions_list`
+        """
+        bits = pack_state(state)
+        applicable = lambda a: not (self.pre_pos[a] & ~bits or self.pre_neg[a] & bits)
+        unmet = [g for g in self.goals if not bits >> g & 1]
+        if not unmet:
+            return [action for a, action in enumerate(self.actions_list) if applicable(a)]
+        stubborn = set(self.adders[unmet[0]])
+        queue = list(stubborn)
+        while queue:
+            a = queue.pop()
+            related = self.interference[a] if applicable(a) else self._enablers(a, bits)
+            for b in related:
+                if b not in stubborn:
+                    stubborn.add(b)
+                    queue.append(b)
+        return [self.actions_list[a] for a in sorted(stubborn) if applicable(a)]
+
+
+class ReducedProblem(Problem):
+    """ Delegates to a planning problem, and prunes symmetric states and
+    redundant orderings of independent actions from its state space
+
+    With `symmetry`, `key` returns the canonical key of each state (see
+    `ObjectSymmetries`), so graph searches treat symmetric states as
+    duplicates; with `partial_order`, `actions` only returns the applicable
+    actions of a strong stubborn set (see `StubbornSets`). The states and
+    actions along the search paths are unchanged, so the solutions are valid
+    plans for the original problem.
+
+    Searches that rebuild states from their keys or search backwards from the
+    goal (external_breadth_first_search, bidirectional_search) assume that
+    `key` encodes the state itself, and cannot be used with `symmetry`.
+
+    Parameters
+    ----------
+    problem : BasePlanningProblem
+        The problem to reduce
+
+    symmetry : bool
+        Merge the states related by permutations of interchangeable objects
+
+    partial_order : bool
+        Expand only the actions of a strong stubborn set in each state
+
+    groups : list (optional)
+        Lists of object names that may be interchangeable (by default, see
+        `object_groups`)
+    """
+    def __init__(self, problem, symmetry=True, partial_order=True, groups=None):
+        self.problem = problem
+        self.symmetries = None
+        self.stubborn_sets = None
+        if symmetry:
+            groups = object_groups(problem) if groups is None else groups
+            self.symmetries = ObjectSymmetries(problem, groups)
+        if partial_order:
+            self.stubborn_sets = StubbornSets(problem)
+
+    def actions(self, state):
+        if self.stubborn_sets is None:
+            return self.problem.actions(state)
+        return self.stubborn_sets.actions(state)
+
+    def result(self, state, action):
+        return self.problem.result(state, action)
+
+    def goal_test(self, state):
+        return self.problem.goal_test(state)
+
+    def path_cost(self, c, state1, action, state2):
+        return self.problem.path_cost(c, state1, action, state2)
+
+    def key(self, state):
+        if self.symmetries is None:
+            return self.problem.key(state)
+        return self.symmetries.canonical_key(state)
+
+    def observe(self, frontier, explored):
+        return self.problem.observe(frontier, explored)
+
+    def __getattr__(self, attr):
+        return getattr(self.problem, attr)
@@ -0,0 +1,168 @@
+
+from heapq import heappop, heappush
+
+infinity = float('inf')
+
+
+class RelaxedTask:
+    """ Delete-relaxation of a planning problem encoded over integer literals
+
+    Every fluent f in the problem state map gives rise to two literals: f
+    (index i) and ~f (index i + n), which matches the way the planning graph
+    treats negative preconditions and delete effects. In the relaxed task a
+    literal stays true once it has been reached, so the cost of reaching every
+    literal can be computed by a single counter-based fixpoint that visits each
+    action once (a generalized Dijkstra search over the fluent/action graph).
+
+    Attributes
+    ----------
+    preconditions : list
+        preconditions[a] is a tuple of the literal indices required by action a
+
+    effects : list
+        effects[a] is a tuple of the literal indices made true by action a
+
+    consumers : list
+        consumers[l] is a list of the actions that have literal l as a precondition
+
+    goals : tuple
+        literal indices of the problem goal fluents
+
+    See Also
+    --------
+    Bonet & Geffner, "Planning as heuristic search" (2001)
+    Hoffmann & Nebel, "The FF planning system" (2001)
+    """
+    def __init__(self, problem):
+        self.actions = list(problem.actions_list)
+        self.num_fluents = n = len(problem.state_map)
+        index = {f: i for i, f in enumerate(problem.state_map)}
+        self.preconditions = []
+        self.effects = []
+        self.consumers = [[] for _ in range(2 * n)]
+        for a, action in enumerate(self.actions):
+            pre = sorted(set([index[f] for f in action.precond_pos] +
+                             [index[f] + n for f in action.precond_neg]))
+            eff = sorted(set([index[f] for f in action.effect_add] +
+                             [index[f] + n for f in action.effect_rem]))
+            self.preconditions.append(tuple(pre))
+            self.effects.append(tuple(eff))
+            for lit in pre:
+                self.consumers[lit].append(a)
+        self.goals = tuple(sorted(index[g] for g in problem.goal))
+
+    def state_literals(self, state):
+        """ Return the literal indices that hold in a state (tuple of True/False) """
+        n = self.num_fluents
+        return [i if f else i + n for i, f in enumerate(state)]
+
+    def costs(self, state, combine=max, goals=None):
+        """ Compute the relaxed cost of every literal reachable from state
+
+        Parameters
+        ----------
+        state : tuple(bool)
+            An ordered sequence of True/False values for each fluent
+
+        combine : callable
+            Either `max` (for h_max) or `sum` (for h_add); used to aggregate
+            the cost of the preconditions of each action
+
+        goals : iterable (optional)
+            If provided, the fixpoint stops as soon as every goal literal has
+            been settled
+
+        Returns
+        -------
+        (cost, supporter)
+            cost is a dict from literal index to relaxed cost, and supporter is
+            a dict from literal index to the action index that first achieved
+            it at that cost (literals true in the state have no supporter)
+        """
+        use_max = combine is max
+        cost = {}
+        supporter = {}
+        counter = [len(p) for p in self.preconditions]
+        accumulated = [0] * len(self.actions)
+        pending = set(goals) if goals is not None else None
+        queue = []
+        for lit in self.state_literals(state):
+            cost[lit] = 0
+            heappush(queue, (0, lit))
+        for a, pre in enumerate(self.preconditions):
+            if not pre:
+                self._apply(a, 1, cost, supporter, queue)
+
+        settled = set()
+        while queue:
+            c, lit = heappop(queue)
+            if lit in settled or c > cost[lit]:
+                continue
+            settled.add(lit)
+            if pending is not None:
+                pending.discard(lit)
+                if not pending:
+                    break
+            for a in self.consumers[lit]:
+                counter[a] -= 1
+                if use_max:
+                    accumulated[a] = c
+                else:
+                    accumulated[a] += c
+                if counter[a] == 0:
+                    self._apply(a, accumulated[a] + 1, cost, supporter, queue)
+        return cost, supporter
+
+    def _apply(self, a, c, cost, supporter, queue):
+        for eff in self.effects[a]:
+            if c < cost.get(eff, infinity):
+                cost[eff] = c
+                supporter[eff] = a
+                heappush(queue, (c, eff))
+
+    def h_max(self, state):
+        cost, _ = self.costs(state, max, self.goals)
+        return max((cost.get(g, infinity) for g in self.goals), default=0)
+
+    def h_add(self, state):
+        cost, _ = self.costs(state, sum, self.goals)
+        return sum(cost.get(g, infinity) for g in self.goals)
+
+    def relaxed_plan(self, state):
+        """ Extract a relaxed plan from the best supporters found by h_add
+
+        Returns
+        -------
+        set of action indices in the relaxed plan, or None if some goal is
+        unreachable even in the relaxed task
+        """
+        cost, supporter = self.costs(state, sum, self.goals)
+        if any(g not in cost for g in self.goals):
+            return None
+        plan = set()
+        stack = [g for g in self.goals if g in supporter]
+        visited = set(stack)
+        while stack:
+            a = supporter[stack.pop()]
+            if a in plan:
+                continue
+            plan.add(a)
+            for lit in self.preconditions[a]:
+                if lit in supporter and lit not in visited:
+                    visited.add(lit)
+                    stack.append(lit)
+        return plan
+
+    def helpful_actions(self, state):
+        """ Return the indices of the actions in the relaxed plan for state that
+        are applicable in state (the first step of the relaxed plan)
+        """
+        plan = self.relaxed_plan(state)
+        if not plan:
+            return set()
+        literals = set(self.state_literals(state))
+        return set(a for a in plan if literals.issuperset(self.preconditions[a]))
+
+    def h_ff(self, state):
+        plan = self.relaxed_plan(state)
+        return infinity if plan is None else len(plan)
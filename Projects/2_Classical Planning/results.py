@@ -0,0 +1,278 @@
+
+import argparse
+import csv
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+DEFAULT_DATABASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results.sqlite')
+
+RESULT_FIELDS = ['problem', 'search', 'heuristic', 'status', 'plan_length', 'actions',
+                 'expansions', 'goal_tests', 'new_nodes', 'time', 'peak_memory_kb']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started TEXT NOT NULL,
+    revision TEXT,
+    label TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    problem TEXT NOT NULL,
+    search TEXT NOT NULL,
+    heuristic TEXT NOT NULL,
+    status TEXT NOT NULL,
+    plan_length INTEGER,
+    actions INTEGER,
+    expansions INTEGER,
+    goal_tests INTEGER,
+    new_nodes INTEGER,
+    time REAL,
+    peak_memory_kb INTEGER
+);
+"""
+
+
+def peak_memory_kb():
+    """ Return the peak resident set size of this process in KiB (or None) """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def _proc_status_kb(field):
+    """ Read a memory field (e.g., VmRSS) of /proc/self/status in KiB, or None """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+class MemoryMeter:
+    """ Peak memory of one search run in this process
+
+    The peak resident set size of a process never goes down, so when one
+    process runs several searches, each would report the peak of the ones
+    before it. Where the kernel allows it (Linux), `start` resets the peak
+    counter and the meter reports the peak above the memory in use when the
+    search started; elsewhere it reports how much the peak of the process
+    grew during the search (0 if it stayed below an earlier peak).
+    """
+    def __init__(self):
+        self.baseline = None
+        self.reset = False
+
+    def start(self):
+        try:
+            with open('/proc/self/clear_refs', 'w') as f:
+                f.write('5')
+            self.reset = _proc_status_kb('VmHWM') is not None
+        except OSError:
+            self.reset = False
+        self.baseline = _proc_status_kb('VmRSS') if self.reset else peak_memory_kb()
+        return self
+
+    def peak_kb(self):
+        """ Return the peak memory in KiB since `start` (or None) """
+        peak = _proc_status_kb('VmHWM') if self.reset else peak_memory_kb()
+        if peak is None or self.baseline is None:
+            return None
+        return max(0, peak - self.baseline)
+
+
+def git_revision(directory=None):
+    """ Return the git revision of the working tree (with a "-dirty" suffix if
+    it has uncommitted changes), or None outside a git checkout
+    """
+    try:
+        output = subprocess.check_output(['git', 'describe', '--always', '--dirty'],
+                                         cwd=directory or os.path.dirname(os.path.abspath(__file__)),
+                                         stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.decode().strip() or None
+
+
+class ResultsDatabase:
+    """ Store of search results in a local sqlite database
+
+    Every invocation of a benchmark (e.g., one `run_search.py` command) is a
+    run, identified by an integer id and tagged with the time it started, the
+    git revision of the code and a free-form label; each search of a problem
+    in the run adds one row of results (see RESULT_FIELDS).
+    """
+    def __init__(self, path=DEFAULT_DATABASE):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(_SCHEMA)
+
+    def start_run(self, label=None, revision=None):
+        """ Create a run and return its id (the revision defaults to `git_revision()`) """
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO runs (started, revision, label) VALUES (?, ?, ?)",
+                (time.strftime('%Y-%m-%d %H:%M:%S'), revision or git_revision(), label))
+        return cursor.lastrowid
+
+    def add(self, run_id, **values):
+        """ Add the results of one search to a run; values are the RESULT_FIELDS
+        (missing ones are stored as NULL, except the heuristic, which is '')
+        """
+        values['heuristic'] = values.get('heuristic') or ''
+        row = [values.get(field) for field in RESULT_FIELDS]
+        with self.connection:
+            self.connection.execute("INSERT INTO results (run_id, {}) VALUES ({})".format(
+                ', '.join(RESULT_FIELDS), ', '.join('?' * (len(RESULT_FIELDS) + 1))), [run_id] + row)
+
+    def record(self, run_id, problem, search, heuristic, ip, node, elapsed, memory=None):
+        """ Add the results of a search that used the InstrumentedProblem ip;
+        the peak memory is measured by memory (a started MemoryMeter), or is
+        the peak RSS of this process when the search ended
+        """
+        self.add(run_id, problem=problem, search=search, heuristic=heuristic or '',
+                 status='solved' if node is not None else 'failed',
+                 plan_length=len(node.solution()) if node is not None else None,
+                 actions=len(ip.actions_list), expansions=ip.succs, goal_tests=ip.goal_tests,
+                 new_nodes=ip.states, time=elapsed,
+                 peak_memory_kb=memory.peak_kb() if memory is not None else peak_memory_kb())
+
+    def runs(self):
+        """ Return every run as a dict, with the number of results it holds """
+        rows = self.connection.execute(
+            "SELECT runs.*, COUNT(results.run_id) AS results FROM runs "
+            "LEFT JOIN results ON runs.run_id = results.run_id "
+            "GROUP BY runs.run_id ORDER BY runs.run_id")
+        return [dict(row) for row in rows]
+
+    def results(self, run_id):
+        """ Return the results of a run as a list of dicts """
+        rows = self.connection.execute(
+            "SELECT {} FROM results WHERE run_id = ? ORDER BY rowid".format(', '.join(RESULT_FIELDS)),
+            (run_id,))
+        return [dict(row) for row in rows]
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class Regression:
+    """ A measurement that got worse between two results of the same search """
+    def __init__(self, problem, search, heuristic, field, baseline, candidate):
+        self.problem = problem
+        self.search = search
+        self.heuristic = heuristic
+        self.field = field
+        self.baseline = baseline
+        self.candidate = candidate
+
+    def __repr__(self):
+        name = self.search if not self.heuristic else '{} with {}'.format(self.search, self.heuristic)
+        return '{}, {}: {} {} -> {}'.format(self.problem, name, self.field, self.baseline, self.candidate)
+
+
+def compare(baseline, candidate, time_tolerance=0.1, min_time=0.05, memory_tolerance=0.2):
+    """ Compare two lists of results and return the regressions of candidate
+
+    Results are matched on (problem, search, heuristic). A search regresses
+    if it no longer solves the problem, if its plan gets longer, if it expands
+    more nodes (the counters are deterministic, so any increase is reported),
+    if its time grows by more than time_tolerance (relative) and min_time
+    seconds, or if the peak memory grows by more than memory_tolerance.
+
+    Returns
+    -------
+    list of Regression
+    """
+    def key(row):
+        return row['problem'], row['search'], row['heuristic'] or ''
+
+    before = {key(row): row for row in baseline}
+    regressions = []
+    for row in candidate:
+        old = before.get(key(row))
+        if old is None or old['status'] != 'solved':
+            continue
+
+        def report(field):
+            regressions.append(Regression(*(key(row) + (field, old[field], row[field]))))
+
+        if row['status'] != 'solved':
+            report('status')
+            continue
+        if row['plan_length'] > old['plan_length']:
+            report('plan_length')
+        if row['expansions'] > old['expansions']:
+            report('expansions')
+        if row['time'] > old['time'] * (1 + time_tolerance) and row['time'] - old['time'] > min_time:
+            report('time')
+        if (old['peak_memory_kb'] and row['peak_memory_kb'] and
+                row['peak_memory_kb'] > old['peak_memory_kb'] * (1 + memory_tolerance)):
+            report('peak_memory_kb')
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List, export and compare the search " +
+        "results recorded with `run_search.py --record`.")
+    parser.add_argument('-d', '--database', default=DEFAULT_DATABASE,
+                        help="Results database (default {}).".format(DEFAULT_DATABASE))
+    commands = parser.add_subparsers(dest='command')
+    commands.add_parser('list', help="List the recorded runs.")
+    export = commands.add_parser('export', help="Write the results of a run as CSV.")
+    export.add_argument('run', type=int, help="Run id.")
+    export.add_argument('-o', '--output', default=None, help="Output file (default stdout).")
+    compare_parser = commands.add_parser('compare', help="Report the regressions of a run " +
+        "against a baseline run (by default, the last run against the one before it); " +
+        "exits with status 1 if there are any.")
+    compare_parser.add_argument('runs', type=int, nargs='*', metavar='RUN',
+                                help="Baseline and candidate run ids.")
+    compare_parser.add_argument('--time-tolerance', type=float, default=0.1,
+                                help="Relative increase in time that is reported (default 0.1).")
+    compare_parser.add_argument('--min-time', type=float, default=0.05,
+                                help="Smallest increase in seconds that is reported (default 0.05).")
+    args = parser.parse_args()
+
+    with ResultsDatabase(args.database) as database:
+        if args.command == 'export':
+            output = sys.stdout if args.output is None else open(args.output, 'w', newline='')
+            writer = csv.DictWriter(output, fieldnames=RESULT_FIELDS)
+            writer.writeheader()
+            writer.writerows(database.results(args.run))
+            if output is not sys.stdout:
+                output.close()
+        elif args.command == 'compare':
+            runs = args.runs or [run['run_id'] for run in database.runs()[-2:]]
+            if len(runs) != 2:
+                parser.error("compare needs two runs")
+            regressions = compare(database.results(runs[0]), database.results(runs[1]),
+                                  args.time_tolerance, args.min_time)
+            print("Comparing run {} against run {}: {} regression(s)".format(runs[1], runs[0], len(regressions)))
+            for regression in regressions:
+                print("    {}".format(regression))
+            sys.exit(1 if regressions else 0)
+        else:
+            print("{:>5}  {:19}  {:20}  {:>7}  {}".format('run', 'started', 'revision', 'results', 'label'))
+            for run in database.runs():
+                print("{run_id:>5}  {started:19}  {revision!s:20}  {results:>7}  {label}".format(
+                    **dict(run, label=run['label'] or '')))
@@ -1,11 +1,26 @@
 
 import argparse
+import sys
+
+from contextlib import ExitStack
+from functools import partial
+from inspect import signature
 
 from aimacode.search import (breadth_first_search, astar_search,
     breadth_first_tree_search, depth_first_graph_search, uniform_cost_search,
     greedy_best_first_graph_search, depth_limited_search,
-    recursive_best_first_search)
+    recursive_best_first_search, weighted_astar_search, enforced_hill_climbing,
+    anytime_repairing_astar, iterative_deepening_astar_search)
 from air_cargo_problems import air_cargo_p1, air_cargo_p2, air_cargo_p3, air_cargo_p4
+from bitset_planning_graph import BitsetPlanningGraph
+from external_search import external_breadth_first_search
+from graphplan import graphplan
+from parallel_search import parallel_astar_search, parallel_greedy_best_first_graph_search
+from pddl import load_pddl
+from reduction import ReducedProblem
+from results import MemoryMeter, ResultsDatabase, DEFAULT_DATABASE
+from satplan import bounded_satplan
+from validate import PlanValidator
 
 from _utils import run_search
 
@@ -44,9 +59,37 @@ SEARCHES = [["breadth_first_search", breadth_first_search, ""],
             ['astar_search', astar_search, 'h_unmet_goals'],
             ['astar_search', astar_search, 'h_pg_levelsum'],
             ['astar_search', astar_search, 'h_pg_maxlevel'],
-            ['astar_search', astar_search, 'h_pg_setlevel']
+            ['astar_search', astar_search, 'h_pg_setlevel'],
+            ['greedy_best_first_graph_search', greedy_best_first_graph_search, 'h_add'],
+            ['greedy_best_first_graph_search', greedy_best_first_graph_search, 'h_ff'],
+            ['astar_search', astar_search, 'h_max'],
+            ['astar_search', astar_search, 'h_add'],
+            ['astar_search', astar_search, 'h_ff'],
+            ['weighted_astar_search', weighted_astar_search, 'h_ff'],
+            ['enforced_hill_climbing', enforced_hill_climbing, 'h_ff'],
+            ['anytime_repairing_astar', anytime_repairing_astar, 'h_add'],
+            ['iterative_deepening_astar_search', iterative_deepening_astar_search, 'h_max'],
+            ['recursive_best_first_search', recursive_best_first_search, 'h_max'],
+            ['external_breadth_first_search', external_breadth_first_search, ""],
+            ['graphplan', graphplan, ""],
+            ['parallel_greedy_best_first_graph_search', parallel_greedy_best_first_graph_search, 'h_pg_setlevel'],
+            ['parallel_astar_search', parallel_astar_search, 'h_pg_levelsum'],
+            ['astar_search', astar_search, 'h_pdb'],
+            ['satplan', bounded_satplan, ""]
             ]
 
+# searches that recover states with problem.state_from_key(problem.key(state)),
+# which ReducedProblem does not support with symmetry reduction
+KEY_DECODING_SEARCHES = [external_breadth_first_search]
+
+
+def check_symmetry(s_choices):
+    """ Raise ValueError if one of the searches cannot be used with --symmetry """
+    for sname, search_fn, _ in (SEARCHES[i-1] for i in map(int, s_choices)):
+        if search_fn in KEY_DECODING_SEARCHES:
+            raise ValueError("{} rebuilds states from their keys, so it cannot be used with "
+                             "--symmetry (the keys are canonical forms of symmetric states)".format(sname))
+
 
 def manual():
     print(PROBLEM_CHOICE_MSG)
@@ -66,19 +109,40 @@ def manual():
         __file__, " ".join(p_choices), " ".join(s_choices)))
 
 
-def main(p_choices, s_choices):
+def main(p_choices, s_choices, bitset_graph=False, time_limit=None, profile=False, progress=None,
+         pddl=None, symmetry=False, partial_order=False, record=None):
     problems = [PROBLEMS[i-1] for i in map(int, p_choices)]
+    if pddl is not None:
+        problems.append(["PDDL problem {}".format(pddl[1]), partial(load_pddl, *pddl)])
     searches = [SEARCHES[i-1] for i in map(int, s_choices)]
-
-    for pname, problem_fn in problems:
-        for sname, search_fn, heuristic in searches:
-            hstring = heuristic if not heuristic else " with {}".format(heuristic)
-            print("\nSolving {} using {}{}...".format(pname, sname, hstring))
-
-            problem_instance = problem_fn()
-            heuristic_fn = None if not heuristic else getattr(problem_instance, heuristic)
-            run_search(problem_instance, search_fn, heuristic_fn)
-
+    if symmetry:
+        check_symmetry(s_choices)
+    with ExitStack() as stack:
+        if record is not None:
+            database = stack.enter_context(ResultsDatabase(record))
+            run_id = database.start_run(label=" ".join(sys.argv[1:]) or None)
+
+        for pname, problem_fn in problems:
+            for sname, search_fn, heuristic in searches:
+                hstring = heuristic if not heuristic else " with {}".format(heuristic)
+                print("\nSolving {} using {}{}...".format(pname, sname, hstring))
+
+                problem_instance = problem_fn()
+                if bitset_graph:
+                    problem_instance.planning_graph = BitsetPlanningGraph
+                heuristic_fn = None if not heuristic else getattr(problem_instance, heuristic)
+                if symmetry or partial_order:
+                    problem_instance = ReducedProblem(problem_instance, symmetry, partial_order)
+                if time_limit is not None and 'time_limit' in signature(search_fn).parameters:
+                    search_fn = partial(search_fn, time_limit=time_limit)
+                recorder = None
+                if record is not None:
+                    recorder = partial(database.record, run_id, pname, sname, heuristic,
+                                       memory=MemoryMeter().start())
+                node = run_search(problem_instance, search_fn, heuristic_fn, profile, progress, recorder)
+                if node is not None:
+                    result = PlanValidator(problem_instance).validate_node(node)
+                    print("Plan validation: {}\n".format(result))
 
 if __name__=="__main__":
     parser = argparse.ArgumentParser(description="Solve air cargo planning problems " + 
@@ -90,12 +154,37 @@ if __name__=="__main__":
                         help="Specify the indices of the problems to solve as a list of space separated values. Choose from: {!s}".format(list(range(1, len(PROBLEMS)+1))))
     parser.add_argument('-s', '--searches', nargs="+", choices=range(1, len(SEARCHES)+1), type=int, metavar='',
                         help="Specify the indices of the search algorithms to use as a list of space separated values. Choose from: {!s}".format(list(range(1, len(SEARCHES)+1))))
+    parser.add_argument('-b', '--bitset-graph', action="store_true",
+                        help="Use the bitset planning graph engine for the h_pg_* heuristics.")
+    parser.add_argument('-t', '--time-limit', type=float, default=None,
+                        help="Wall-clock budget in seconds for anytime searches (e.g., anytime_repairing_astar).")
+    parser.add_argument('--profile', action="store_true",
+                        help="Report time spent in actions(), result() and the heuristic, frontier size, explored-set memory and heuristic cache hit rate.")
+    parser.add_argument('--progress', type=float, default=None, metavar='SECONDS',
+                        help="Print a progress line (expansions, nodes/s, frontier and explored size) every SECONDS seconds.")
+    parser.add_argument('--pddl', nargs=2, metavar=('DOMAIN', 'PROBLEM'), default=None,
+                        help="Also solve the problem in a pair of PDDL (STRIPS) domain and problem files.")
+    parser.add_argument('--symmetry', action="store_true",
+                        help="Treat states that differ only by a permutation of interchangeable objects (e.g., planes) as duplicates.")
+    parser.add_argument('--por', action="store_true",
+                        help="Partial-order reduction: expand only the actions of a strong stubborn set in each state. " +
+                             "This prunes nothing on the air cargo problems (every plane can interfere with every cargo); " +
+                             "it helps on PDDL domains with independent subgoals.")
+    parser.add_argument('--record', nargs='?', const=DEFAULT_DATABASE, default=None, metavar='DATABASE',
+                        help="Store the statistics of every search in a sqlite database (default {}); compare runs with results.py.".format(DEFAULT_DATABASE))
     args = parser.parse_args()
 
     if args.manual:
         manual()
-    elif args.problems and args.searches:
-        main(list(sorted(set(args.problems))), list(sorted(set((args.searches)))))
+    elif (args.problems or args.pddl) and args.searches:
+        if args.symmetry:
+            try:
+                check_symmetry(args.searches)
+            except ValueError as error:
+                parser.error(str(error))
+        main(list(sorted(set(args.problems or []))), list(sorted(set((args.searches)))),
+             args.bitset_graph, args.time_limit, args.profile, args.progress, args.pddl,
+             args.symmetry, args.por, args.record)
     else:
         print()
         parser.print_help()
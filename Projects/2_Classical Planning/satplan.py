@@ -0,0 +1,257 @@
+
+import multiprocessing
+import queue
+
+from aimacode.logic import CDCLSolver
+from aimacode.search import Node
+
+
+class SATPlanEncoding:
+    """ Propositional encoding of a planning problem for a fixed horizon
+
+    For a horizon of T steps there is a variable for every fluent at every
+    time 0..T and for every action at every step 0..T-1. The clauses say
+    that the fluents at time 0 are the initial state and that the goals hold
+    at time T; that an action at step t requires its preconditions at time t
+    and causes its effects at time t+1; that a fluent only changes between t
+    and t+1 if an action at step t adds or deletes it (explanatory frame
+    axioms); and that two interfering actions are never taken in the same
+    step (action exclusion). Any set of non-interfering actions can then be
+    executed one after the other in any order, so each step of a satisfying
+    assignment is a parallel step of a plan.
+
+    The delete-relaxed reachability of every literal is computed per time
+    step, like the levels of a planning graph without mutexes: actions that
+    cannot have their preconditions at step t get no variable at that step,
+    fluents that cannot hold (or cannot be false) at time t are fixed, and
+    the shortest horizon worth trying is the first level where every goal
+    is reachable.
+
+    The encoding only holds integers, so it is cheap to send to other
+    processes.
+
+    Parameters
+    ----------
+    problem : BasePlanningProblem
+
+    See Also
+    --------
+    Kautz & Selman, "Planning as satisfiability" (1992)
+    Rintanen, Heljanko & Niemelä, "Planning as satisfiability: parallel plans
+    and algorithms for plan search" (2006)
+    """
+    def __init__(self, problem):
+        self.num_fluents = n = len(problem.state_map)
+        index = {f: i for i, f in enumerate(problem.state_map)}
+        self.pre_pos, self.pre_neg, self.add, self.rem = [], [], [], []
+        for action in problem.actions_list:
+            self.pre_pos.append(sorted(index[f] for f in action.precond_pos))
+            self.pre_neg.append(sorted(index[f] for f in action.precond_neg))
+            self.add.append(sorted(index[f] for f in action.effect_add))
+            # add effects win over delete effects in BasePlanningProblem.result
+            self.rem.append(sorted(index[f] for f in action.effect_rem - action.effect_add))
+        self.num_actions = len(self.add)
+        self.initial = tuple(bool(value) for value in problem.initial)
+        self.goals = sorted(index[g] for g in problem.goal)
+
+        self.adders = [[] for _ in range(n)]
+        self.deleters = [[] for _ in range(n)]
+        for a in range(self.num_actions):
+            for i in self.add[a]: self.adders[i].append(a)
+            for i in self.rem[a]: self.deleters[i].append(a)
+
+        self.interference = [[] for _ in range(self.num_actions)]
+        for a in range(self.num_actions):
+            pre_pos, pre_neg = set(self.pre_pos[a]), set(self.pre_neg[a])
+            add, rem = set(self.add[a]), set(self.rem[a])
+            for b in range(a + 1, self.num_actions):
+                if (rem.intersection(self.pre_pos[b]) or pre_pos.intersection(self.rem[b]) or
+                        add.intersection(self.pre_neg[b]) or pre_neg.intersection(self.add[b]) or
+                        add.intersection(self.rem[b]) or rem.intersection(self.add[b])):
+                    self.interference[a].append(b)
+
+        # relaxed reachability: literal i is "fluent i is true", i + n is
+        # "fluent i is false"; layers[t] holds the literals reachable at time t
+        # and steps[t] the actions whose preconditions are all reachable at t
+        literals = set(i if value else i + n for i, value in enumerate(self.initial))
+        self.layers = []
+        self.steps = []
+        while True:
+            self.layers.append(frozenset(literals))
+            applicable = [a for a in range(self.num_actions)
+                          if all(i in literals for i in self.pre_pos[a]) and
+                          all(i + n in literals for i in self.pre_neg[a])]
+            self.steps.append(applicable)
+            reached = set(literals)
+            for a in applicable:
+                reached.update(self.add[a])
+                reached.update(i + n for i in self.rem[a])
+            if reached == literals:
+                break
+            literals = reached
+
+    def layer(self, t):
+        return self.layers[min(t, len(self.layers) - 1)]
+
+    def step(self, t):
+        return self.steps[min(t, len(self.steps) - 1)]
+
+    def min_horizon(self):
+        """ Return the first time at which every goal is reachable in the
+        relaxation, or None if the goals are never reachable
+        """
+        for t, layer in enumerate(self.layers):
+            if all(g in layer for g in self.goals):
+                return t
+        return None
+
+    def clauses(self, horizon):
+        """ Return (num_vars, clauses, actions) for the given horizon, where
+        the clauses are lists of integer literals and actions[t] maps the
+        variable of each action at step t to its index in `actions_list`
+        """
+        n = self.num_fluents
+        fluent = lambda i, t: t * n + i + 1
+        num_vars = (horizon + 1) * n
+        clauses = [[fluent(i, 0) if value else -fluent(i, 0)] for i, value in enumerate(self.initial)]
+        clauses.extend([fluent(g, horizon)] for g in self.goals)
+        for t in range(1, horizon + 1):
+            layer = self.layer(t)
+            for i in range(n):
+                if i not in layer:
+                    clauses.append([-fluent(i, t)])
+                elif i + n not in layer:
+                    clauses.append([fluent(i, t)])
+
+        actions = []
+        for t in range(horizon):
+            variables = {}
+            for a in self.step(t):
+                num_vars += 1
+                variables[a] = num_vars
+                clauses.extend([-num_vars, fluent(i, t)] for i in self.pre_pos[a])
+                clauses.extend([-num_vars, -fluent(i, t)] for i in self.pre_neg[a])
+                clauses.extend([-num_vars, fluent(i, t + 1)] for i in self.add[a])
+                clauses.extend([-num_vars, -fluent(i, t + 1)] for i in self.rem[a])
+            for a, var in variables.items():
+                clauses.extend([-var, -variables[b]] for b in self.interference[a] if b in variables)
+            for i in range(n):
+                clauses.append([-fluent(i, t), fluent(i, t + 1)] +
+                               [variables[a] for a in self.deleters[i] if a in variables])
+                clauses.append([fluent(i, t), -fluent(i, t + 1)] +
+                               [variables[a] for a in self.adders[i] if a in variables])
+            actions.append({var: a for a, var in variables.items()})
+        return num_vars, clauses, actions
+
+    def solve(self, horizon):
+        """ Return the plan for the given horizon as a list of steps (lists of
+        action indices), or None if there is none
+        """
+        num_vars, clauses, actions = self.clauses(horizon)
+        solver = CDCLSolver(num_vars)
+        if not (solver.add_clauses(clauses) and solver.solve()):
+            return None
+        return [sorted(a for var, a in step.items() if solver.value(var)) for step in actions]
+
+
+_worker_encoding = None
+
+
+def _init_worker(encoding):
+    global _worker_encoding
+    _worker_encoding = encoding
+
+
+def _solve(horizon):
+    return horizon, _worker_encoding.solve(horizon)
+
+
+def satplan_steps(problem, processes=None, max_horizon=None):
+    """ Return a parallel plan for the problem as a list of steps (lists of
+    Action objects), or None if no plan is found
+
+    The horizons are tried in increasing order from the first one where the
+    goals are reachable (see `SATPlanEncoding`), so the plan has the fewest
+    parallel steps. With more than one process, that many consecutive
+    horizons are solved at the same time in worker processes, and whenever
+    one finishes the next horizon is started. Once a horizon has a plan, no
+    longer horizon is started, and the others are cancelled as soon as every
+    shorter horizon has been shown to be unsatisfiable.
+
+    Parameters
+    ----------
+    problem : BasePlanningProblem
+
+    processes : int (optional)
+        Number of worker processes (default: one per CPU); with a single
+        process the horizons are solved in this process
+
+    max_horizon : int (optional)
+        Largest horizon to try; by default the search only stops early if
+        the goals are unreachable in the relaxation, so it never ends on
+        problems that are solvable in the relaxation but have no plan
+    """
+    encoding = SATPlanEncoding(problem)
+    horizon = encoding.min_horizon()
+    if horizon is None:
+        return None
+    processes = processes or multiprocessing.cpu_count()
+    in_range = lambda h: max_horizon is None or h <= max_horizon
+
+    steps = None
+    if processes == 1:
+        while steps is None and in_range(horizon):
+            steps = encoding.solve(horizon)
+            horizon += 1
+    else:
+        results = queue.Queue()
+        pool = multiprocessing.Pool(processes, _init_worker, (encoding,))
+        try:
+            running = set()
+            best = None
+            while True:
+                while (len(running) < processes and in_range(horizon) and
+                        (best is None or horizon < best)):
+                    pool.apply_async(_solve, (horizon,), callback=results.put,
+                                     error_callback=results.put)
+                    running.add(horizon)
+                    horizon += 1
+                if not running or (best is not None and min(running) > best):
+                    break
+                result = results.get()
+                if isinstance(result, BaseException):
+                    raise result
+                running.discard(result[0])
+                if result[1] is not None and (best is None or result[0] < best):
+                    best, steps = result
+        finally:
+            pool.terminate()
+            pool.join()
+
+    if steps is None:
+        return None
+    actions = list(problem.actions_list)
+    return [[actions[a] for a in step] for step in steps if step]
+
+
+def satplan(problem, processes=None, max_horizon=None):
+    """ Solve the problem with SATPlan and return a search Node for the goal,
+    like the state-space searches. The actions in each parallel step are
+    executed one after the other (in any order, since they do not interfere).
+    """
+    steps = satplan_steps(problem, processes, max_horizon)
+    if steps is None:
+        return None
+    node = Node(problem.initial)
+    for step in steps:
+        for action in step:
+            node = node.child_node(problem, action)
+    return node
+
+
+def bounded_satplan(problem, processes=None):
+    """ SATPlan with the horizon bounded by twice the number of fluents of
+    the problem, so that it also stops on problems that have no plan (plans
+    with more parallel steps than that are not found)
+    """
+    return satplan(problem, processes, 2 * len(problem.state_map))
@@ -0,0 +1,59 @@
+
+import io
+import json
+import unittest
+
+from aimacode.search import breadth_first_search
+from air_cargo_problems import air_cargo_random
+from benchmark import run_benchmark, write_results, FIELDS
+from run_search import SEARCHES
+
+
+def search_index(name, heuristic=""):
+    """ Return the 1-based index of a search in run_search.SEARCHES """
+    return [(n, h) for n, _, h in SEARCHES].index((name, heuristic)) + 1
+
+
+class TestAirCargoRandom(unittest.TestCase):
+    def test_generator_is_deterministic(self):
+        p1 = air_cargo_random(3, 2, 3, seed=7)
+        p2 = air_cargo_random(3, 2, 3, seed=7)
+        self.assertEqual(p1.initial, p2.initial)
+        self.assertEqual(p1.goal, p2.goal)
+        self.assertEqual(len(p1.goal), 3)
+        self.assertEqual(len(p1.actions_list), 3 * 2 * 3 * 2 + 2 * 3 * 2)
+
+    def test_generated_problem_is_solvable(self):
+        problem = air_cargo_random(2, 1, 3, seed=1)
+        self.assertTrue(problem.goal_test(breadth_first_search(problem).state))
+
+    def test_needs_two_airports(self):
+        self.assertRaises(ValueError, air_cargo_random, 2, 2, 1)
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_run_benchmark(self):
+        searches = [search_index('breadth_first_search'),
+                    search_index('greedy_best_first_graph_search', 'h_ff')]
+        results = run_benchmark([(2, 2, 2), (3, 2, 3)], searches, time_limit=30, seed=0)
+        self.assertEqual(len(results), 4)
+        for row in results:
+            self.assertEqual(row['status'], 'solved')
+            self.assertGreater(row['expansions'], 0)
+
+        output = io.StringIO()
+        write_results(results, output, 'csv')
+        self.assertEqual(output.getvalue().splitlines()[0], ','.join(FIELDS))
+        output = io.StringIO()
+        write_results(results, output, 'json')
+        self.assertEqual(len(json.loads(output.getvalue())), 4)
+
+    def test_timeout_skips_larger_sizes(self):
+        # breadth-first search cannot solve 12 cargos in a second on any machine
+        results = run_benchmark([(12, 5, 8), (14, 5, 8)], [search_index('breadth_first_search')],
+                                time_limit=1)
+        self.assertEqual([row['status'] for row in results], ['timeout', 'skipped'])
+
+
+if __name__ == '__main__':
+    unittest.main()
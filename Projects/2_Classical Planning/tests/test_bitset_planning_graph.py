@@ -0,0 +1,64 @@
+
+import unittest
+
+from aimacode.search import Node
+from example_have_cake import have_cake
+from air_cargo_problems import air_cargo_p1, air_cargo_p2
+from my_planning_graph import PlanningGraph
+from bitset_planning_graph import BitsetPlanningGraph
+
+
+class TestBitsetPlanningGraph(unittest.TestCase):
+    def setUp(self):
+        self.problems = [have_cake(), air_cargo_p1(), air_cargo_p2()]
+
+    def test_heuristics_match_reference_graph(self):
+        for problem in self.problems:
+            node = Node(problem.initial)
+            for child in [node] + list(node.expand(problem)):
+                for h in ['h_levelsum', 'h_maxlevel', 'h_setlevel']:
+                    for ignore_mutexes in (True, False):
+                        expected = getattr(PlanningGraph(problem, child.state, True, ignore_mutexes), h)()
+                        actual = getattr(BitsetPlanningGraph(problem, child.state, True, ignore_mutexes), h)()
+                        self.assertEqual(expected, actual, "{} mismatch for {}".format(h, child))
+
+    def test_fill_levels_off_at_same_layer(self):
+        for problem in self.problems:
+            expected = PlanningGraph(problem, problem.initial, serialize=False).fill()
+            actual = BitsetPlanningGraph(problem, problem.initial, serialize=False).fill()
+            self.assertEqual(len(expected.literal_layers), len(actual.literal_layers))
+            for layer, mask in zip(expected.literal_layers, actual.literal_layers):
+                self.assertEqual(len(layer), bin(mask).count("1"))
+
+    def test_problem_heuristics_use_selected_engine(self):
+        problem = air_cargo_p1()
+        problem.planning_graph = BitsetPlanningGraph
+        node = Node(problem.initial)
+        self.assertEqual(problem.h_pg_maxlevel(node), 2)
+        self.assertEqual(problem.h_pg_levelsum(node), 4)
+        self.assertEqual(problem.h_pg_setlevel(node), 4)
+
+
+class TestLevelTracker(unittest.TestCase):
+    def test_first_levels_match_layers(self):
+        problem = air_cargo_p1()
+        pg = PlanningGraph(problem, problem.initial, serialize=False).fill()
+        # layers added by fill() are tracked lazily
+        pg._track_levels()
+        for literal, level in pg._first_level.items():
+            self.assertIn(literal, pg.literal_layers[level])
+            if level:
+                self.assertNotIn(literal, pg.literal_layers[level - 1])
+        self.assertEqual(set(pg._first_level), set(pg.literal_layers[-1]))
+
+    def test_goal_totals(self):
+        problem = air_cargo_p1()
+        pg = PlanningGraph(problem, problem.initial, serialize=True, ignore_mutexes=True)
+        self.assertEqual(len(pg._unmet_goals), 2)
+        self.assertEqual(pg.h_levelsum(), 4)
+        self.assertFalse(pg._unmet_goals)
+        self.assertEqual(pg._goal_level_max, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
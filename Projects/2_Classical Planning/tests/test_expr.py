@@ -0,0 +1,41 @@
+
+import pickle
+import unittest
+
+from aimacode.utils import Expr, expr, expr_handle_infix_ops, defaultkeydict, Symbol
+
+
+class TestExprInterning(unittest.TestCase):
+    def test_identical_expressions_are_shared(self):
+        literal = Expr('At', Expr('C1'), Expr('SFO'))
+        self.assertIs(expr('At(C1, SFO)'), literal)
+        self.assertIs(~literal, ~expr('At(C1, SFO)'))
+        self.assertIs(~~literal, literal)
+        self.assertNotEqual(literal, expr('At(C1, JFK)'))
+
+    def test_numeric_arguments_compare_structurally(self):
+        x = Expr('x')
+        self.assertEqual(Expr('+', x, 1), Expr('+', x, 1))
+        self.assertNotEqual(Expr('+', x, 1), Expr('+', x, 2))
+        self.assertEqual(len({Expr('+', x, 1), Expr('+', x, 1)}), 1)
+
+    def test_pickle_preserves_identity(self):
+        sentence = expr('P & ~Q ==> R')
+        self.assertIs(pickle.loads(pickle.dumps(sentence)), sentence)
+
+
+class TestExprParser(unittest.TestCase):
+    def test_fast_path_matches_eval(self):
+        for text in ['At(C1, SFO)', ' In ( C2 ,P1 ) ', 'P', 'F()', '~At(C1, SFO)',
+                     'At(C1, SFO) & ~Q', 'f(g(x), y)', 'P ==> Q', 'True']:
+            expected = eval(expr_handle_infix_ops(text), defaultkeydict(Symbol))
+            self.assertEqual(expr(text), expected)
+            self.assertEqual(type(expr(text)), type(expected))
+
+    def test_results_are_memoized(self):
+        self.assertIs(expr('Have(Cake)'), expr('Have(Cake)'))
+        self.assertIs(expr(~expr('Have(Cake)')), expr('~Have(Cake)'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+
+import unittest
+
+from air_cargo_problems import air_cargo_p1, air_cargo_p2
+from example_have_cake import have_cake
+from graphplan import graphplan, graphplan_steps
+from pddl import parse_domain, parse_problem, PddlProblem
+from validate import PlanValidator
+
+from tests.test_pddl import ROBOT_DOMAIN, ROBOT_PROBLEM
+
+
+class TestGraphPlan(unittest.TestCase):
+    def test_parallel_plans(self):
+        for problem, steps, length in [(have_cake(), 2, 2),
+                                       (air_cargo_p1(), 3, 6),
+                                       (air_cargo_p2(), 3, 9)]:
+            plan = graphplan_steps(problem)
+            self.assertEqual(len(plan), steps)
+            self.assertEqual(sum(len(step) for step in plan), length)
+
+    def test_node_solution_is_valid(self):
+        problem = air_cargo_p1()
+        node = graphplan(problem)
+        self.assertTrue(PlanValidator(problem).validate_node(node))
+
+    def test_unsolvable_problem(self):
+        # the corridor is one-way, so the robot cannot end up back in r2
+        task = parse_problem(ROBOT_PROBLEM.replace('(visited r3)', '(visited r4) (at r2)'))
+        problem = PddlProblem(parse_domain(ROBOT_DOMAIN), task)
+        self.assertIsNone(graphplan_steps(problem))
+        self.assertIsNone(graphplan(problem))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+
+import itertools
+import random
+import unittest
+
+from aimacode.logic import (
+    PropKB, PropDefiniteKB, pl_fc_entails, pl_resolution, CDCLSolver, dpll_satisfiable,
+    luby, pl_true, tt_entails, ResolutionProver, clause_literals
+)
+from aimacode.utils import Expr, expr
+
+
+def brute_force_satisfiable(num_vars, clauses):
+    for values in itertools.product([False, True], repeat=num_vars):
+        if all(any(values[abs(lit) - 1] == (lit > 0) for lit in clause) for clause in clauses):
+            return True
+    return False
+
+
+def pigeonhole(pigeons, holes):
+    var = lambda i, j: i * holes + j + 1
+    clauses = [[var(i, j) for j in range(holes)] for i in range(pigeons)]
+    clauses += [[-var(i, j), -var(k, j)] for j in range(holes)
+                for i in range(pigeons) for k in range(i + 1, pigeons)]
+    return clauses
+
+
+class TestPropKB(unittest.TestCase):
+    def test_tell_and_retract(self):
+        kb = PropKB(expr('A & (B | C)'))
+        kb.tell(expr('A'))
+        self.assertEqual(kb.clauses, {expr('A'), expr('B | C')})
+        kb.retract(expr('A & D'))
+        self.assertEqual(kb.clauses, {expr('B | C')})
+        self.assertTrue(pl_resolution(PropKB(expr('A & (A ==> B)')), expr('B')))
+
+
+class TestResolution(unittest.TestCase):
+    def wumpus_kb(self):
+        kb = PropKB()
+        for sentence in ['~P11', 'B11 <=> (P12 | P21)', 'B21 <=> (P11 | P22 | P31)', '~B11', 'B21']:
+            kb.tell(expr(sentence))
+        return kb
+
+    def test_entailment(self):
+        kb = self.wumpus_kb()
+        for query, entailed in [('~P12', True), ('~P21', True), ('P22 | P31', True),
+                                ('P22', False), ('P31', False)]:
+            for set_of_support in [True, False]:
+                self.assertEqual(pl_resolution(kb, expr(query), set_of_support), entailed)
+
+    def test_matches_truth_tables(self):
+        rng = random.Random(3)
+        symbols = 'ABCDE'
+        for _ in range(100):
+            kb = PropKB()
+            for _ in range(rng.randint(1, 6)):
+                kb.tell(expr(' | '.join(rng.choice(['', '~']) + rng.choice(symbols)
+                                        for _ in range(rng.randint(1, 3)))))
+            query = expr(rng.choice(['', '~']) + rng.choice(symbols))
+            entailed = tt_entails(Expr('&', *kb.clauses), query)
+            self.assertEqual(pl_resolution(kb, query, set_of_support=False), entailed)
+            # the set-of-support strategy is only complete for satisfiable KBs
+            if dpll_satisfiable(Expr('&', *kb.clauses)):
+                self.assertEqual(pl_resolution(kb, query), entailed)
+
+    def test_tautologies_are_dropped(self):
+        self.assertIsNone(clause_literals(expr('A | B | ~A')))
+        prover = ResolutionProver()
+        prover.add(expr('A | B | ~A'))
+        prover.add(expr('C | ~C'), support=False)
+        self.assertEqual(prover.clauses, set())
+
+    def test_subsumption(self):
+        prover = ResolutionProver()
+        prover.add(expr('A | B | C'), support=False)
+        prover.add(expr('A | B | D'))
+        # backward: A | B removes both of its supersets
+        prover.add(expr('A | B'))
+        self.assertEqual(prover.clauses, {clause_literals(expr('A | B'))})
+        self.assertEqual(prover.support, {clause_literals(expr('A | B'))})
+        # forward: a superset of a kept clause is not added
+        prover.add(expr('A | B | E'), support=False)
+        self.assertEqual(prover.clauses, {clause_literals(expr('A | B'))})
+        self.assertEqual(set(prover.index[expr('C')]), set())
+
+
+class TestPropDefiniteKB(unittest.TestCase):
+    def setUp(self):
+        self.kb = PropDefiniteKB()
+        for s in "P==>Q; (L&M)==>P; (B&L)==>M; (A&P)==>L; (A&B)==>L; A;B".split(';'):
+            self.kb.tell(expr(s))
+
+    def test_premise_index(self):
+        self.assertEqual(set(self.kb.clauses_with_premise(expr('L'))),
+                         {expr('(L&M)==>P'), expr('(B&L)==>M')})
+        self.kb.retract(expr('(B&L)==>M'))
+        self.assertEqual(self.kb.clauses_with_premise(expr('L')), [expr('(L&M)==>P')])
+        self.assertEqual(self.kb.clauses_with_premise(expr('Z')), [])
+
+    def test_forward_chaining(self):
+        self.assertTrue(self.kb.ask_if_true(expr('Q')))
+        self.assertFalse(self.kb.ask_if_true(expr('Z')))
+        self.kb.retract(expr('B'))
+        self.assertFalse(pl_fc_entails(self.kb, expr('Q')))
+
+    def test_repeated_premise_symbol(self):
+        kb = PropDefiniteKB(expr('A'))
+        kb.tell(expr('(A & A) ==> B'))
+        self.assertTrue(pl_fc_entails(kb, expr('B')))
+
+    def test_long_chain(self):
+        # quadratic forward chaining needs several seconds for this chain
+        kb = PropDefiniteKB(Expr('P0'))
+        for i in range(5000):
+            kb.tell(Expr('==>', Expr('P{}'.format(i)), Expr('P{}'.format(i + 1))))
+        self.assertTrue(pl_fc_entails(kb, Expr('P5000')))
+        self.assertFalse(pl_fc_entails(kb, Expr('P5001')))
+
+
+class TestCDCLSolver(unittest.TestCase):
+    def test_matches_brute_force(self):
+        rng = random.Random(1)
+        for _ in range(200):
+            n = rng.randint(3, 9)
+            clauses = [[rng.choice([-1, 1]) * rng.randint(1, n) for _ in range(rng.randint(1, 3))]
+                       for _ in range(rng.randint(1, 45))]
+            solver = CDCLSolver(n)
+            satisfiable = solver.add_clauses(clauses) and solver.solve()
+            self.assertEqual(satisfiable, brute_force_satisfiable(n, clauses))
+            if satisfiable:
+                model = set(solver.model())
+                self.assertTrue(all(any(lit in model for lit in clause) for clause in clauses))
+
+    def test_pigeonhole(self):
+        solver = CDCLSolver()
+        self.assertFalse(solver.add_clauses(pigeonhole(7, 6)) and solver.solve())
+        solver = CDCLSolver()
+        self.assertTrue(solver.add_clauses(pigeonhole(6, 6)) and solver.solve())
+
+    def test_incremental_clauses(self):
+        solver = CDCLSolver(2)
+        self.assertTrue(solver.add_clause([1, 2]) and solver.solve())
+        self.assertTrue(solver.add_clause([-1]) and solver.solve())
+        self.assertEqual(solver.model(), [-1, 2])
+        self.assertFalse(solver.add_clause([-2]))
+        self.assertFalse(solver.solve())
+
+    def test_luby(self):
+        self.assertEqual([luby(i) for i in range(1, 16)], [1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8])
+
+    def test_dpll_satisfiable(self):
+        self.assertEqual(dpll_satisfiable(expr('A & ~B')), {expr('A'): True, expr('B'): False})
+        self.assertFalse(dpll_satisfiable(expr('P & ~P')))
+        sentence = expr('(A | B) & (~A | C) & (~C | ~B) & (B <=> D)')
+        self.assertTrue(pl_true(sentence, dpll_satisfiable(sentence)))
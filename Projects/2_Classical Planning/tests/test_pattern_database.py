@@ -0,0 +1,77 @@
+
+import os
+import shutil
+import tempfile
+import unittest
+import unittest.mock
+
+from aimacode.search import Node, astar_search, breadth_first_search
+from air_cargo_problems import air_cargo_p1, air_cargo_p2, air_cargo_random
+import pattern_database
+from pattern_database import AirCargoPatterns, PatternDatabase
+
+
+class TestPatternDatabase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def problem(self, factory, *args):
+        problem = factory(*args)
+        problem.pdb_directory = self.directory
+        return problem
+
+    def test_distances(self):
+        # a counter that can be incremented (to 2) or reset, with goal value 2
+        database = PatternDatabase([3], [({0: 0}, {0: 1}), ({0: 1}, {0: 2}), ({}, {0: 0})], {0: 2})
+        database.build()
+        self.assertEqual([database.distance(i) for i in range(3)], [2, 1, 0])
+
+    def test_admissible_along_optimal_plan(self):
+        for problem in [self.problem(air_cargo_p1), self.problem(air_cargo_p2)]:
+            plan = breadth_first_search(problem).solution()
+            node = Node(problem.initial)
+            for remaining in range(len(plan), -1, -1):
+                self.assertLessEqual(problem.h_pdb(node), remaining)
+                if remaining:
+                    node = node.child_node(problem, plan[len(plan) - remaining])
+            self.assertEqual(problem.h_pdb(node), 0)
+
+    def test_astar_is_optimal(self):
+        problem = self.problem(air_cargo_p2)
+        self.assertEqual(len(astar_search(problem, problem.h_pdb).solution()), 9)
+
+    def test_tables_are_reused(self):
+        problem = self.problem(air_cargo_random, 3, 2, 3, 7)
+        first = problem.pattern_databases
+        files = sorted(os.listdir(self.directory))
+        self.assertEqual(len(files), len(first.databases))
+        second = AirCargoPatterns(problem, problem.pattern_size, self.directory)
+        self.assertEqual(sorted(os.listdir(self.directory)), files)
+        for a, b in zip(first.databases, second.databases):
+            self.assertEqual(a.distances, b.distances)
+
+    def test_tables_are_not_saved_by_default(self):
+        problem = air_cargo_p1()
+        with unittest.mock.patch.object(PatternDatabase, 'load') as load:
+            self.assertEqual(problem.h_pdb(Node(problem.initial)), 6)
+        load.assert_not_called()
+
+    def test_signature_includes_the_format_version(self):
+        database = PatternDatabase([3], [({0: 0}, {0: 1})], {0: 1})
+        signature = database.signature()
+        with unittest.mock.patch('pattern_database.FORMAT_VERSION', pattern_database.FORMAT_VERSION + 1):
+            self.assertNotEqual(database.signature(), signature)
+
+    def test_patterns_shrink_to_fit(self):
+        problem = self.problem(air_cargo_p2)
+        patterns = AirCargoPatterns(problem, pattern_size=3, max_size=5000)
+        # 3 planes at 3 airports and 3 cargos would need 27 * 6 ** 3 states
+        self.assertEqual([len(pattern) for pattern in patterns.patterns], [2 + 3, 1 + 3])
+        self.assertTrue(all(database.size <= 5000 for database in patterns.databases))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+
+import os
+import unittest
+
+from aimacode.search import Node, breadth_first_search
+from aimacode.utils import expr
+from pddl import parse_domain, parse_problem, PddlProblem, load_pddl
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'pddl_examples')
+
+ROBOT_DOMAIN = """
+(define (domain robot)  ; a robot moving along a one-way corridor
+  (:requirements :strips :typing)
+  (:types room)
+  (:predicates (at ?r - room) (connected ?from ?to - room) (visited ?r - room))
+  (:action move
+    :parameters (?from ?to - room)
+    :precondition (and (at ?from) (connected ?from ?to))
+    :effect (and (not (at ?from)) (at ?to) (visited ?to))))
+"""
+
+ROBOT_PROBLEM = """
+(define (problem corridor)
+  (:domain robot)
+  (:objects r1 r2 r3 r4 - room)
+  (:init (at r1) (connected r1 r2) (connected r2 r3) (connected r3 r4))
+  (:goal (and (visited r3) (at r4))))
+"""
+
+
+class TestPddl(unittest.TestCase):
+    def test_static_predicates_are_pruned(self):
+        problem = PddlProblem(parse_domain(ROBOT_DOMAIN), parse_problem(ROBOT_PROBLEM))
+        self.assertEqual(sorted(str(a) for a in problem.actions_list),
+                         ['move(r1, r2)', 'move(r2, r3)', 'move(r3, r4)'])
+        self.assertNotIn(expr('connected(r1, r2)'), problem.state_map)
+        for action in problem.actions_list:
+            self.assertEqual(len(action.precond_pos), 1)
+        self.assertEqual(len(breadth_first_search(problem).solution()), 3)
+
+    def test_air_cargo_example_matches_python_problem(self):
+        problem = load_pddl(os.path.join(EXAMPLES, 'air_cargo_domain.pddl'),
+                            os.path.join(EXAMPLES, 'air_cargo_p1.pddl'))
+        self.assertEqual(len(problem.actions_list), 20)
+        self.assertIn(expr('at_cargo(c1, sfo)'), problem.state_map)
+        self.assertEqual(len(breadth_first_search(problem).solution()), 6)
+        self.assertEqual(problem.h_pg_levelsum(Node(problem.initial)), 4)
+
+    def test_unsupported_input(self):
+        self.assertRaises(ValueError, parse_domain, "(define (domain d)")
+        self.assertRaises(ValueError, parse_problem, ROBOT_DOMAIN)
+
+
+if __name__ == '__main__':
+    unittest.main()
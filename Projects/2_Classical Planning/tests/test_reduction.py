@@ -0,0 +1,106 @@
+
+import unittest
+
+from aimacode.search import (
+    InstrumentedProblem, astar_search, breadth_first_search, uniform_cost_search
+)
+from aimacode.utils import Expr
+from air_cargo_problems import air_cargo_p1, air_cargo_p2
+from pddl import parse_domain, parse_problem, PddlProblem
+from external_search import external_breadth_first_search
+from reduction import ObjectSymmetries, ReducedProblem, StubbornSets, object_groups
+from run_search import SEARCHES, main
+from validate import PlanValidator
+
+SWITCH_DOMAIN = """
+(define (domain switches)
+  (:requirements :strips :typing)
+  (:types switch)
+  (:predicates (on ?s - switch) (off ?s - switch))
+  (:action turn-on
+    :parameters (?s - switch)
+    :precondition (off ?s)
+    :effect (and (on ?s) (not (off ?s))))
+  (:action turn-off
+    :parameters (?s - switch)
+    :precondition (on ?s)
+    :effect (and (off ?s) (not (on ?s)))))
+"""
+
+SWITCH_PROBLEM = """
+(define (problem five-switches)
+  (:domain switches)
+  (:objects s1 s2 s3 s4 s5 - switch)
+  (:init (off s1) (off s2) (off s3) (off s4) (off s5))
+  (:goal (and (on s1) (on s2) (on s3) (on s4) (on s5))))
+"""
+
+
+def solve(problem, search, *args):
+    ip = InstrumentedProblem(problem)
+    node = search(ip, *args)
+    return node, ip.succs
+
+
+class TestObjectSymmetries(unittest.TestCase):
+    def test_classes(self):
+        # the cargos of p1 have different goals, but the planes are interchangeable
+        problem = air_cargo_p1()
+        symmetries = ObjectSymmetries(problem, object_groups(problem))
+        self.assertEqual(symmetries.classes, [[Expr('P1'), Expr('P2')]])
+
+    def test_symmetric_states_share_a_key(self):
+        problem = air_cargo_p2()
+        symmetries = ObjectSymmetries(problem, object_groups(problem))
+        swap = {Expr('P1'): Expr('P2'), Expr('P2'): Expr('P1')}
+        index = {f: i for i, f in enumerate(problem.state_map)}
+        node, _ = solve(problem, breadth_first_search)
+        for state in [n.state for n in node.path()]:
+            swapped = [False] * len(state)
+            for f, value in zip(problem.state_map, state):
+                if value:
+                    swapped[index[Expr(f.op, *[swap.get(x, x) for x in f.args])]] = True
+            self.assertEqual(symmetries.canonical_key(state), symmetries.canonical_key(tuple(swapped)))
+
+    def test_searches_stay_optimal(self):
+        for search, args in [(breadth_first_search, ()), (uniform_cost_search, ()),
+                             (astar_search, ('h_max',))]:
+            problem = air_cargo_p2()
+            args = [getattr(problem, a) for a in args]
+            expected, expanded = solve(problem, search, *args)
+            node, reduced = solve(ReducedProblem(problem, partial_order=False), search, *args)
+            self.assertEqual(len(node.solution()), len(expected.solution()))
+            self.assertLess(reduced, expanded)
+            self.assertTrue(PlanValidator(problem).validate_node(node))
+
+    def test_run_search_rejects_searches_that_decode_keys(self):
+        index = [search for _, search, _ in SEARCHES].index(external_breadth_first_search) + 1
+        with self.assertRaises(ValueError):
+            main([1], [index], symmetry=True)
+
+
+class TestStubbornSets(unittest.TestCase):
+    def test_independent_actions_are_ordered(self):
+        problem = PddlProblem(parse_domain(SWITCH_DOMAIN), parse_problem(SWITCH_PROBLEM))
+        expected, expanded = solve(problem, breadth_first_search)
+        node, reduced = solve(ReducedProblem(problem, symmetry=False), breadth_first_search)
+        self.assertEqual(len(node.solution()), 5)
+        # the switches are turned on in a single order
+        self.assertEqual(reduced, 5)
+        self.assertLess(reduced, expanded)
+        self.assertTrue(PlanValidator(problem).validate_node(node))
+
+    def test_nothing_is_pruned_on_air_cargo(self):
+        problem = air_cargo_p1()
+        stubborn_sets = StubbornSets(problem)
+        node = breadth_first_search(problem)
+        for state in [n.state for n in node.path()]:
+            self.assertEqual(stubborn_sets.actions(state), problem.actions(state))
+
+    def test_searches_stay_optimal(self):
+        for search in [breadth_first_search, uniform_cost_search]:
+            problem = air_cargo_p1()
+            expected, _ = solve(problem, search)
+            node, _ = solve(ReducedProblem(problem), search)
+            self.assertEqual(len(node.solution()), len(expected.solution()))
+            self.assertTrue(PlanValidator(problem).validate_node(node))
@@ -0,0 +1,67 @@
+
+import unittest
+
+from aimacode.search import Node, breadth_first_search
+from example_have_cake import have_cake
+from air_cargo_problems import air_cargo_p1, air_cargo_p2, AirCargoProblem
+from aimacode.utils import expr
+from _utils import FluentState, create_expressions, make_relations
+
+
+class TestRelaxedHeuristics(unittest.TestCase):
+    def setUp(self):
+        self.cake_problem = have_cake()
+        self.ac_problem_1 = air_cargo_p1()
+        self.ac_problem_2 = air_cargo_p2()
+
+    def test_hmax_matches_planning_graph_maxlevel(self):
+        for problem in [self.cake_problem, self.ac_problem_1, self.ac_problem_2]:
+            node = Node(problem.initial)
+            self.assertEqual(problem.h_max(node), problem.h_pg_maxlevel(node))
+
+    def test_hadd(self):
+        self.assertEqual(self.cake_problem.h_add(Node(self.cake_problem.initial)), 1)
+        self.assertEqual(self.ac_problem_1.h_add(Node(self.ac_problem_1.initial)), 6)
+
+    def test_hff_relaxed_plan(self):
+        node = Node(self.ac_problem_1.initial)
+        plan = self.ac_problem_1.relaxed_task.relaxed_plan(node.state)
+        actions = [str(self.ac_problem_1.actions_list[a]) for a in plan]
+        self.assertEqual(self.ac_problem_1.h_ff(node), len(plan))
+        self.assertIn("Load(C1, P1, SFO)", actions)
+        self.assertIn("Unload(C1, P1, JFK)", actions)
+
+    def test_goal_state_has_zero_cost(self):
+        node = breadth_first_search(self.ac_problem_1)
+        for h in ['h_max', 'h_add', 'h_ff']:
+            self.assertEqual(getattr(self.ac_problem_1, h)(node), 0)
+
+
+class TestReachabilityPruning(unittest.TestCase):
+    def setUp(self):
+        # P2 is not at any airport, so it can never fly, load or unload
+        cargos, planes, airports = ['C1', 'C2'], ['P1', 'P2'], ['JFK', 'SFO']
+        relations = (make_relations('At', cargos + planes, airports) +
+                     make_relations('In', cargos, planes))
+        pos = create_expressions(['At(C1, SFO)', 'At(C2, JFK)', 'At(P1, SFO)'])
+        init = FluentState(pos, [r for r in relations if r not in pos])
+        goal = create_expressions(['At(C1, JFK)', 'At(C2, SFO)'])
+        self.problem = AirCargoProblem(cargos, planes, airports, init, goal)
+
+    def test_unreachable_actions_and_fluents_are_removed(self):
+        self.assertEqual(len(self.problem.actions_list), 10)
+        self.assertNotIn(expr('In(C1, P2)'), self.problem.state_map)
+        self.assertNotIn(expr('At(P2, SFO)'), self.problem.state_map)
+        self.assertTrue(all(a.args[0] != expr('P2') for a in self.problem.actions_list))
+
+    def test_pruned_problem_is_solvable(self):
+        node = breadth_first_search(self.problem)
+        self.assertEqual(len(node.solution()), 6)
+
+    def test_standard_problems_are_unchanged(self):
+        self.assertEqual(len(air_cargo_p1().actions_list), 20)
+        self.assertEqual(len(air_cargo_p2().actions_list), 72)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from results import DEFAULT_DATABASE, MemoryMeter, ResultsDatabase, compare
+from run_search import main
+
+
+def result(**values):
+    row = dict(problem='p1', search='astar_search', heuristic='h_max', status='solved',
+               plan_length=6, actions=20, expansions=40, goal_tests=42, new_nodes=170,
+               time=1.0, peak_memory_kb=20000)
+    row.update(values)
+    return row
+
+
+class TestResultsDatabase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'results.sqlite')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_store_and_read(self):
+        database = ResultsDatabase(self.path)
+        run = database.start_run(label='test', revision='abc123')
+        database.add(run, **result())
+        database.add(run, **result(search='breadth_first_search', heuristic=None))
+        database.close()
+
+        database = ResultsDatabase(self.path)
+        runs = database.runs()
+        self.assertEqual(len(runs), 1)
+        self.assertEqual((runs[0]['revision'], runs[0]['label'], runs[0]['results']), ('abc123', 'test', 2))
+        rows = database.results(run)
+        self.assertEqual(rows[0], result())
+        self.assertEqual(rows[1]['heuristic'], '')
+        database.close()
+
+    def test_run_search_records_every_search(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            main([1], [1, 8], record=self.path)
+        database = ResultsDatabase(self.path)
+        rows = database.results(database.runs()[-1]['run_id'])
+        self.assertEqual([(row['search'], row['heuristic']) for row in rows],
+                         [('breadth_first_search', ''), ('astar_search', 'h_unmet_goals')])
+        self.assertTrue(all(row['plan_length'] == 6 and row['expansions'] > 0 for row in rows))
+        database.close()
+
+
+    def test_default_database_is_next_to_the_script(self):
+        directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(DEFAULT_DATABASE, os.path.join(directory, 'results.sqlite'))
+
+
+class TestMemoryMeter(unittest.TestCase):
+    def test_later_searches_do_not_inherit_the_peak(self):
+        meter = MemoryMeter().start()
+        data = [0] * 10 ** 7
+        large = meter.peak_kb()
+        del data
+        meter = MemoryMeter().start()
+        data = [0] * 10 ** 5
+        small = meter.peak_kb()
+        del data
+        if not meter.reset:
+            self.skipTest("the peak memory of the process cannot be reset here")
+        self.assertGreater(large, 40000)
+        self.assertLess(small, large / 4)
+
+
+class TestCompare(unittest.TestCase):
+    def test_regressions(self):
+        baseline = [result(), result(problem='p2'), result(problem='p3')]
+        candidate = [result(time=1.02, peak_memory_kb=21000),
+                     result(problem='p2', expansions=41, plan_length=7, time=2.0),
+                     result(problem='p3', status='failed', plan_length=None),
+                     result(problem='p4')]
+        found = sorted((r.problem, r.field) for r in compare(baseline, candidate))
+        self.assertEqual(found, [('p2', 'expansions'), ('p2', 'plan_length'), ('p2', 'time'),
+                                 ('p3', 'status')])
+
+    def test_improvements_are_not_reported(self):
+        self.assertEqual(compare([result()], [result(expansions=10, time=0.1)]), [])
@@ -0,0 +1,55 @@
+
+import unittest
+
+from air_cargo_problems import air_cargo_p1, air_cargo_p2
+from example_have_cake import have_cake
+from graphplan import graphplan_steps
+from pddl import parse_domain, parse_problem, PddlProblem
+from satplan import SATPlanEncoding, bounded_satplan, satplan, satplan_steps
+from validate import PlanValidator
+
+from tests.test_pddl import ROBOT_DOMAIN, ROBOT_PROBLEM
+
+
+class TestSATPlanEncoding(unittest.TestCase):
+    def test_min_horizon(self):
+        self.assertEqual(SATPlanEncoding(have_cake()).min_horizon(), 1)
+        self.assertEqual(SATPlanEncoding(air_cargo_p1()).min_horizon(), 2)
+
+    def test_horizon_below_the_shortest_plan_is_unsatisfiable(self):
+        encoding = SATPlanEncoding(air_cargo_p1())
+        self.assertIsNone(encoding.solve(2))
+        self.assertEqual(len(encoding.solve(3)), 3)
+
+
+class TestSATPlan(unittest.TestCase):
+    def test_parallel_plans_match_graphplan(self):
+        for problem in [have_cake(), air_cargo_p1(), air_cargo_p2()]:
+            steps = satplan_steps(problem, processes=1)
+            self.assertEqual(len(steps), len(graphplan_steps(problem)))
+
+    def test_parallel_horizons_return_the_shortest_plan(self):
+        problem = air_cargo_p2()
+        steps = satplan_steps(problem, processes=3)
+        self.assertEqual(len(steps), len(graphplan_steps(problem)))
+
+    def test_node_solution_is_valid(self):
+        for processes in [1, 2]:
+            problem = air_cargo_p1()
+            node = satplan(problem, processes=processes)
+            self.assertTrue(PlanValidator(problem).validate_node(node))
+
+    def test_unsolvable_problem(self):
+        # the corridor is one-way, so the robot cannot end up back in r2
+        task = parse_problem(ROBOT_PROBLEM.replace('(visited r3)', '(visited r4) (at r2)'))
+        problem = PddlProblem(parse_domain(ROBOT_DOMAIN), task)
+        self.assertIsNone(satplan_steps(problem, processes=1, max_horizon=8))
+        self.assertIsNone(satplan(problem, processes=2, max_horizon=8))
+        self.assertIsNone(bounded_satplan(problem, processes=1))
+        # goals that are unreachable even in the relaxation need no bound
+        task = parse_problem(ROBOT_PROBLEM.replace('(visited r3)', '(visited r1)'))
+        self.assertIsNone(satplan_steps(PddlProblem(parse_domain(ROBOT_DOMAIN), task), processes=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
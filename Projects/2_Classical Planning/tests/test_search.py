@@ -0,0 +1,180 @@
+
+import unittest
+
+from aimacode.utils import Stack, FIFOQueue, PriorityQueue
+from aimacode.search import (
+    Node, breadth_first_search, depth_first_graph_search, uniform_cost_search,
+    astar_search, weighted_astar_search, enforced_hill_climbing,
+    anytime_repairing_astar, ara_star_solutions, iterative_deepening_astar_search,
+    recursive_best_first_search, bidirectional_search, ProfiledProblem,
+    InstrumentedProblem, greedy_best_first_graph_search
+)
+from air_cargo_problems import air_cargo_p1, air_cargo_p2
+from external_search import external_breadth_first_search
+from parallel_search import parallel_astar_search, parallel_greedy_best_first_graph_search
+
+
+class TestSuboptimalSearch(unittest.TestCase):
+    def setUp(self):
+        self.ac_problem_1 = air_cargo_p1()
+        self.ac_problem_2 = air_cargo_p2()
+
+    def test_weighted_astar_with_unit_weight_is_optimal(self):
+        for problem in [self.ac_problem_1, self.ac_problem_2]:
+            optimal = astar_search(problem, problem.h_max)
+            node = weighted_astar_search(problem, problem.h_max, weight=1)
+            self.assertEqual(len(node.solution()), len(optimal.solution()))
+
+    def test_weighted_astar_bound(self):
+        problem = self.ac_problem_2
+        node = weighted_astar_search(problem, problem.h_max, weight=3)
+        self.assertTrue(problem.goal_test(node.state))
+        self.assertLessEqual(len(node.solution()), 3 * 9)
+
+    def test_enforced_hill_climbing(self):
+        for problem in [self.ac_problem_1, self.ac_problem_2]:
+            node = enforced_hill_climbing(problem, problem.h_ff)
+            self.assertTrue(problem.goal_test(node.state))
+
+    def test_ara_star_solutions_improve(self):
+        problem = self.ac_problem_2
+        solutions = list(ara_star_solutions(problem, problem.h_max, weights=(5, 2, 1)))
+        costs = [node.path_cost for node, _ in solutions]
+        self.assertEqual(costs, sorted(costs, reverse=True))
+        self.assertEqual(costs[-1], 9)
+        self.assertEqual(anytime_repairing_astar(problem, problem.h_max).path_cost, 9)
+
+
+class TestMemoryBoundedSearch(unittest.TestCase):
+    def setUp(self):
+        self.ac_problem_1 = air_cargo_p1()
+        self.ac_problem_2 = air_cargo_p2()
+
+    def test_ida_star_is_optimal(self):
+        for problem, expected in [(self.ac_problem_1, 6), (self.ac_problem_2, 9)]:
+            node = iterative_deepening_astar_search(problem, problem.h_max)
+            self.assertEqual(len(node.solution()), expected)
+        node = iterative_deepening_astar_search(
+            self.ac_problem_1, self.ac_problem_1.h_max, table_size=0)
+        self.assertEqual(len(node.solution()), 6)
+
+    def test_recursive_best_first_search(self):
+        problem = self.ac_problem_1
+        self.assertEqual(len(recursive_best_first_search(problem, problem.h_max).solution()), 6)
+
+    def test_predecessors_invert_result(self):
+        problem = self.ac_problem_1
+        goal = astar_search(problem, problem.h_max).state
+        predecessors = list(problem.predecessors(goal))
+        self.assertTrue(predecessors)
+        for action, previous in predecessors:
+            self.assertEqual(problem.result(previous, action), goal)
+
+    def test_bidirectional_search(self):
+        for problem, expected in [(self.ac_problem_1, 6), (self.ac_problem_2, 9)]:
+            goal = astar_search(problem, problem.h_max).state
+            node = bidirectional_search(problem, goal)
+            self.assertEqual(node.state, goal)
+            self.assertEqual(len(node.solution()), expected)
+
+
+class TestExternalSearch(unittest.TestCase):
+    def test_matches_breadth_first_search(self):
+        for problem in [air_cargo_p1(), air_cargo_p2()]:
+            expected = len(breadth_first_search(problem).solution())
+            for locality in [None, 2]:
+                # a tiny buffer forces several sorted runs per layer
+                node = external_breadth_first_search(problem, buffer_size=50, locality=locality)
+                self.assertEqual(len(node.solution()), expected)
+                self.assertTrue(problem.goal_test(node.state))
+
+    def test_state_from_key(self):
+        problem = air_cargo_p1()
+        self.assertEqual(problem.state_from_key(problem.key(problem.initial)), problem.initial)
+
+
+class TestParallelSearch(unittest.TestCase):
+    def test_matches_serial_search(self):
+        cases = [(astar_search, parallel_astar_search, 'h_pg_levelsum'),
+                 (greedy_best_first_graph_search, parallel_greedy_best_first_graph_search, 'h_pg_setlevel')]
+        for serial, parallel, heuristic in cases:
+            problem = air_cargo_p1()
+            expected = InstrumentedProblem(problem)
+            expected_plan = serial(expected, getattr(problem, heuristic)).solution()
+            problem = air_cargo_p1()
+            actual = InstrumentedProblem(problem)
+            plan = parallel(actual, getattr(problem, heuristic), processes=2).solution()
+            self.assertEqual(actual.succs, expected.succs)
+            self.assertEqual([str(a) for a in plan], [str(a) for a in expected_plan])
+
+    def test_timed_heuristic(self):
+        counts = []
+        for search in [astar_search, parallel_astar_search]:
+            problem = air_cargo_p1()
+            ip = ProfiledProblem(problem)
+            args = {} if search is astar_search else {'processes': 2}
+            node = search(ip, ip.timed(problem.h_pg_levelsum), **args)
+            self.assertEqual(len(node.solution()), 6)
+            counts.append(ip.stats.heuristic_calls)
+        # the calls made in the worker processes are counted too
+        self.assertEqual(counts[0], counts[1])
+
+    def test_rejects_foreign_heuristic(self):
+        with self.assertRaises(ValueError):
+            parallel_astar_search(air_cargo_p1(), lambda node: 0)
+
+
+class TestFrontiers(unittest.TestCase):
+    def test_indexed_membership(self):
+        for frontier in [Stack(len), FIFOQueue(len), PriorityQueue(min, len, len)]:
+            frontier.extend(['a', 'bb', 'bb'])
+            self.assertIn('cc', frontier)  # keyed on length
+            self.assertNotIn('ddd', frontier)
+            while frontier:
+                frontier.pop()
+            self.assertNotIn('bb', frontier)
+
+    def test_priority_queue_indexes_items_by_key(self):
+        frontier = PriorityQueue(min, lambda node: node.path_cost, lambda node: node.state)
+        frontier.append(Node('A', path_cost=5))
+        frontier.append(Node('B', path_cost=3))
+        other = Node('A', path_cost=1)
+        self.assertIn(other, frontier)
+        self.assertIs(frontier[other], other)
+        self.assertIsNone(frontier[Node('C')])
+        self.assertEqual(frontier.pop().state, 'B')
+        self.assertEqual(frontier.pop().state, 'A')
+        self.assertNotIn(other, frontier)
+        self.assertFalse(frontier)
+
+    def test_graph_searches_use_problem_key(self):
+        problem = air_cargo_p1()
+        for search, expected in [(breadth_first_search, 6), (uniform_cost_search, 6)]:
+            self.assertEqual(len(search(problem).solution()), expected)
+        self.assertTrue(problem.goal_test(depth_first_graph_search(problem).state))
+
+
+class TestProfiledProblem(unittest.TestCase):
+    def test_stats(self):
+        problem = air_cargo_p1()
+        ip = ProfiledProblem(problem)
+        node = astar_search(ip, ip.timed(problem.h_max))
+        stats = ip.stats
+        self.assertEqual(len(node.solution()), 6)
+        self.assertEqual(stats.expansions, ip.succs)
+        self.assertGreater(stats.heuristic_calls, 0)
+        self.assertGreater(stats.cache_hits + stats.cache_misses, 0)
+        self.assertGreaterEqual(stats.peak_frontier, stats.mean_frontier)
+        self.assertGreater(stats.peak_explored_bytes, 0)
+        self.assertGreater(stats.actions_time, 0)
+        self.assertIn('nodes_per_second', stats.as_dict())
+
+    def test_timed_heuristic_keeps_its_name(self):
+        problem = air_cargo_p1()
+        h = ProfiledProblem(problem).timed(problem.h_max)
+        self.assertEqual(h.__name__, 'h_max')
+        self.assertEqual(h.__wrapped__, problem.h_max)
+
+
+if __name__ == '__main__':
+    unittest.main()
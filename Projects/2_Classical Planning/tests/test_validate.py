@@ -0,0 +1,67 @@
+
+import os
+import shutil
+import tempfile
+import unittest
+import unittest.mock
+
+from aimacode.search import breadth_first_search
+from air_cargo_problems import air_cargo_p1
+from _utils import pack_state
+from validate import PlanValidator, read_plan, validate_files
+
+
+class TestPlanValidator(unittest.TestCase):
+    def setUp(self):
+        self.problem = air_cargo_p1()
+        self.validator = PlanValidator(self.problem)
+        self.plan = breadth_first_search(self.problem).solution()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_valid_plan(self):
+        result = self.validator.validate(self.plan)
+        self.assertTrue(result)
+        self.assertEqual(result.steps, 6)
+        self.assertIsNone(result.failed_step)
+        self.assertTrue(self.validator.validate([str(a) for a in self.plan]).valid)
+
+    def test_replays_through_problem_result(self):
+        node = breadth_first_search(self.problem)
+        self.assertEqual(self.validator.validate(node.solution()).state, pack_state(node.state))
+        # a broken transition function is noticed, since the validator uses it
+        with unittest.mock.patch.object(self.problem, 'result', lambda state, action: state):
+            self.assertFalse(PlanValidator(self.problem).validate(self.plan))
+
+    def test_failures_report_the_step(self):
+        result = self.validator.validate(['Fly(P1, SFO, JFK)', 'Load(C1, P1, SFO)'])
+        self.assertEqual(result.failed_step, 1)
+        self.assertIn('At(P1, SFO)', result.reason)
+        result = self.validator.validate(self.plan[:-1])
+        self.assertEqual(result.failed_step, 5)
+        self.assertIn('goals not satisfied', result.reason)
+        self.assertEqual(self.validator.validate(['Teleport(C1)']).failed_step, 0)
+
+    def test_plan_files(self):
+        paths = []
+        for idx, plan in enumerate([self.plan, self.plan[1:]]):
+            path = os.path.join(self.directory, 'plan{}.txt'.format(idx))
+            with open(path, 'w') as f:
+                f.write('; plan {}\n'.format(idx))
+                f.write('\n'.join(str(action) for action in plan))
+            paths.append(path)
+        ipc = os.path.join(self.directory, 'ipc.txt')
+        with open(ipc, 'w') as f:
+            f.write('(Load C1 P1 SFO)\n(Fly P1 SFO JFK)\n')
+        self.assertEqual(len(read_plan(ipc)), 2)
+
+        for processes in [1, 2]:
+            results = validate_files(self.problem, paths + [ipc], processes)
+            self.assertEqual([path for path, _ in results], paths + [ipc])
+            self.assertEqual([r.valid for _, r in results], [True, False, False])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+
+import argparse
+import multiprocessing
+import sys
+
+from aimacode.utils import Expr, expr
+from _utils import pack_state, unpack_state
+
+
+class ValidationResult:
+    """ Outcome of replaying a plan
+
+    Attributes
+    ----------
+    valid : bool
+        True if every step was applicable and the final state satisfies the goal
+
+    steps : int
+        Number of steps that were executed successfully
+
+    cost : int
+        Cost of the executed steps (one per action)
+
+    failed_step : int or None
+        Index of the step that could not be executed, len(plan) if every step
+        was executed but the goal is not satisfied, or None for a valid plan
+
+    reason : str
+        Human readable description of the failure (empty for a valid plan)
+
+    state : int
+        Packed state (see `_utils.pack_state`) after the executed steps
+    """
+    def __init__(self, valid, steps, failed_step, reason, state):
+        self.valid = valid
+        self.steps = self.cost = steps
+        self.failed_step = failed_step
+        self.reason = reason
+        self.state = state
+
+    def __bool__(self):
+        return self.valid
+
+    def __repr__(self):
+        if self.valid:
+            return "valid plan of length {}".format(self.steps)
+        return "invalid plan: step {}: {}".format(self.failed_step, self.reason)
+
+
+class PlanValidator:
+    """ Replay plans for a planning problem
+
+    Each step checks the preconditions of the action in the current state and
+    then executes it with the `result` method of the problem, so the plan is
+    checked against exactly the transitions that the searches use; the goal
+    is checked with `goal_test`. The actions are looked up by name (e.g.,
+    "Load(C1, P1, SFO)") in a table built once from `actions_list`.
+    """
+    def __init__(self, problem):
+        self.problem = problem
+        self.state_map = list(problem.state_map)
+        self.index = {f: i for i, f in enumerate(self.state_map)}
+        self.initial = tuple(problem.initial)
+        self.actions = {Expr(action.name, *action.args): action for action in problem.actions_list}
+
+    def validate(self, plan, state=None):
+        """ Replay plan (a sequence of Action objects, or of Exprs/strings such
+        as "Load(C1, P1, SFO)") from state (a tuple of True/False values or a
+        packed state; the initial state by default)
+
+        Returns
+        -------
+        ValidationResult
+        """
+        if state is None:
+            state = self.initial
+        elif isinstance(state, int):
+            state = unpack_state(state, len(self.state_map))
+        for step, action in enumerate(plan):
+            if not isinstance(action, Expr):
+                action = expr(action) if isinstance(action, str) else Expr(action.name, *action.args)
+            known = self.actions.get(action)
+            if known is None:
+                return ValidationResult(False, step, step, "unknown action {}".format(action),
+                                        pack_state(state))
+            unmet = ([f for f in known.precond_pos if not state[self.index[f]]] +
+                     ['~{}'.format(f) for f in known.precond_neg if state[self.index[f]]])
+            if unmet:
+                return ValidationResult(False, step, step, "{} has unsatisfied preconditions: {}".format(
+                    action, ", ".join(sorted(str(f) for f in unmet))), pack_state(state))
+            state = self.problem.result(state, known)
+        step = len(plan)
+        if not self.problem.goal_test(state):
+            unmet = [g for g in self.problem.goal if not state[self.index[g]]]
+            return ValidationResult(False, step, step, "goals not satisfied: {}".format(
+                ", ".join(sorted(str(f) for f in unmet))), pack_state(state))
+        return ValidationResult(True, step, None, "", pack_state(state))
+
+    def validate_node(self, node):
+        """ Validate the solution of a search Node """
+        return self.validate(node.solution())
+
+
+def read_plan(path):
+    """ Read a plan file with one action per line
+
+    Lines may use the format printed by `run_search` (e.g., "Load(C1, P1, SFO)")
+    or IPC style (e.g., "(load c1 p1 sfo)", where hyphens in names become
+    underscores as in `pddl.py`). Blank lines and lines starting with ';' or
+    '#' are ignored.
+    """
+    plan = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line[0] in ';#':
+                continue
+            if line.startswith('('):
+                names = line.strip('()').replace('-', '_').split()
+                plan.append(Expr(names[0], *[Expr(name) for name in names[1:]]))
+            else:
+                plan.append(expr(line))
+    return plan
+
+
+_worker_validator = None
+
+
+def _init_worker(problem):
+    global _worker_validator
+    _worker_validator = PlanValidator(problem)
+
+
+def _validate_file(path):
+    try:
+        return path, _worker_validator.validate(read_plan(path))
+    except (OSError, SyntaxError, ValueError) as e:
+        return path, ValidationResult(False, 0, 0, "cannot read plan: {}".format(e), None)
+
+
+def validate_files(problem, paths, processes=None):
+    """ Validate many plan files for the same problem
+
+    The files are split among a pool of `processes` worker processes (one per
+    CPU by default; 1 validates them in this process), each of which compiles
+    the problem into a PlanValidator once.
+
+    Returns
+    -------
+    list of (path, ValidationResult) pairs in the same order as paths
+    """
+    paths = list(paths)
+    if processes == 1 or len(paths) < 2:
+        _init_worker(problem)
+        return [_validate_file(path) for path in paths]
+    chunksize = max(1, len(paths) // (4 * (processes or multiprocessing.cpu_count())))
+    with multiprocessing.Pool(processes, _init_worker, (problem,)) as pool:
+        return pool.map(_validate_file, paths, chunksize)
+
+
+if __name__ == "__main__":
+    from run_search import PROBLEMS
+    from pddl import load_pddl
+
+    parser = argparse.ArgumentParser(description="Validate plan files for an air cargo " +
+        "problem (or a PDDL problem) without running any search.")
+    parser.add_argument('plans', nargs='+', help="Plan files to validate (one action per line).")
+    parser.add_argument('-p', '--problem', type=int, choices=range(1, len(PROBLEMS)+1), metavar='',
+                        help="Index of the air cargo problem the plans solve. Choose from: {!s}".format(
+                            list(range(1, len(PROBLEMS)+1))))
+    parser.add_argument('--pddl', nargs=2, metavar=('DOMAIN', 'PROBLEM'), default=None,
+                        help="PDDL domain and problem files the plans solve.")
+    parser.add_argument('-j', '--processes', type=int, default=None,
+                        help="Number of worker processes (default: one per CPU).")
+    args = parser.parse_args()
+
+    if args.pddl is not None:
+        problem = load_pddl(*args.pddl)
+    elif args.problem is not None:
+        problem = PROBLEMS[args.problem - 1][1]()
+    else:
+        parser.error("one of -p/--problem or --pddl is required")
+
+    failures = 0
+    for path, result in validate_files(problem, args.plans, args.processes):
+        print("{}: {}".format(path, result))
+        failures += not result.valid
+    sys.exit(1 if failures else 0)